@@ -1,13 +1,21 @@
 # nba_integration.py
+import json
+import threading
 import unicodedata
+from pathlib import Path
+from typing import NamedTuple
 from nba_api.stats.static import players as nba_players
 from nba_api.live.nba.endpoints import scoreboard
 
 from nba_api.stats.static import players as static_players
 from nba_api.stats.endpoints import playergamelog
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta, date
 
+from scoring import DEFAULT_SCORING, ScoringSettings
+from upstream_client import nba_stats
+
 NAME_ALIASES = {
     # Memes or ESPN misspellings
     "Kristaps Perzingus Tingus Pingus": "Kristaps Porzingis",
@@ -35,55 +43,11 @@ def current_nba_season_str() -> str:
     return f"{start}-{end_short}"
 
 
-# Scoring weights – your league rules
-SCORING_RULES = {
-    "FGM": 2,
-    "FTM": 1,
-    "FTA": -1,
-    "FG3M": 1,   # 3PM
-    "REB": 1,
-    "AST": 2,
-    "STL": 4,
-    "BLK": 4,
-    "TOV": -2,   # Turnovers
-    "PTS": 1,
-    # DD/TD/QD handled separately
-}
-
-
-def _count_double_double_categories(pts: float, reb: float, ast: float, stl: float, blk: float) -> int:
-    """
-    Count how many stat categories are >= 10 among PTS, REB, AST, STL, BLK.
-    """
-    cats = [pts, reb, ast, stl, blk]
-    return sum(1 for v in cats if v >= 10)
-
-
-def _dd_td_qd_bonus(pts: float, reb: float, ast: float, stl: float, blk: float) -> float:
-    """
-    Compute DD/TD/QD bonus points.
-
-    Assumes stacking:
-      - Double-double: 5
-      - Triple-double: +8 (on top of DD)
-      - Quadruple-double: +13 (on top of DD+TD)
-
-    So a triple-double yields 13 total bonus,
-    a quadruple-double yields 26 total bonus.
-    """
-    n = _count_double_double_categories(pts, reb, ast, stl, blk)
+# Scoring weights – your league rules (the engine itself lives in scoring.py)
+SCORING_RULES = DEFAULT_SCORING.weights
 
-    bonus = 0.0
-    if n >= 2:
-        bonus += 5.0  # DD
-    if n >= 3:
-        bonus += 8.0  # TD
-    if n >= 4:
-        bonus += 13.0  # QD
-    return bonus
 
-
-def calc_fantasy_points_from_row(row) -> float:
+def calc_fantasy_points_from_row(row, scoring: ScoringSettings | None = None) -> float:
     """
     Calculate fantasy points for a single game using your league's scoring.
 
@@ -92,40 +56,35 @@ def calc_fantasy_points_from_row(row) -> float:
       - or any dict-like with keys:
         FGM, FTM, FTA, FG3M, REB, AST, STL, BLK, TOV, PTS
     """
-    # Safely pull stats, default to 0 if missing
-    def g(key):
-        if hasattr(row, "get"):
-            return row.get(key, 0)  # works for dict-like / Series
-        return row[key] if key in row else 0
-
-    fgm = float(g("FGM"))
-    ftm = float(g("FTM"))
-    fta = float(g("FTA"))
-    fg3m = float(g("FG3M"))  # 3PM
-    reb = float(g("REB"))
-    ast = float(g("AST"))
-    stl = float(g("STL"))
-    blk = float(g("BLK"))
-    tov = float(g("TOV"))
-    pts = float(g("PTS"))
-
-    # Base scoring
-    total = 0.0
-    total += SCORING_RULES["FGM"] * fgm
-    total += SCORING_RULES["FTM"] * ftm
-    total += SCORING_RULES["FTA"] * fta
-    total += SCORING_RULES["FG3M"] * fg3m
-    total += SCORING_RULES["REB"] * reb
-    total += SCORING_RULES["AST"] * ast
-    total += SCORING_RULES["STL"] * stl
-    total += SCORING_RULES["BLK"] * blk
-    total += SCORING_RULES["TOV"] * tov
-    total += SCORING_RULES["PTS"] * pts
-
-    # Double/Triple/Quad bonuses
-    total += _dd_td_qd_bonus(pts, reb, ast, stl, blk)
-
-    return total
+    return (scoring or DEFAULT_SCORING).score_one(row)
+
+
+def score_game_log_frame(df: pd.DataFrame, scoring: ScoringSettings | None = None) -> np.ndarray:
+    """
+    Columnar version of calc_fantasy_points_from_row: fantasy points for
+    every row of a game-log DataFrame at once. Missing stat columns count
+    as 0, same as the per-row scorer.
+    """
+    return (scoring or DEFAULT_SCORING).score(df)
+
+
+def history_rows_from_frame(df: pd.DataFrame, scoring: ScoringSettings | None = None) -> list[dict]:
+    """Score a game-log DataFrame and turn it into history rows in one pass."""
+    if df.empty:
+        return []
+    game_id_col = "GAME_ID" if "GAME_ID" in df.columns else "Game_ID" if "Game_ID" in df.columns else None
+    game_ids = df[game_id_col].tolist() if game_id_col else [None] * len(df)
+    return [
+        {
+            "date": gd.date(),
+            "fantasy_points": float(fp),
+            "opponent": matchup,   # e.g. "UTA vs LAL"
+            "game_id": gid,
+        }
+        for gd, fp, matchup, gid in zip(
+            df["GAME_DATE"], score_game_log_frame(df, scoring), df["MATCHUP"], game_ids
+        )
+    ]
 
 
 def strip_accents(s: str) -> str:
@@ -141,73 +100,183 @@ def clean_name(name: str) -> str:
     return strip_accents(name).lower().strip()
 
 
-def find_nba_player_id(name: str) -> int | None:
+# ─── Name resolution ──────────────────────────────────────────────────────────
+
+# Persisted ESPN playerId -> NBA player_id, so known players skip resolution
+XREF_PATH = Path("espn_nba_id_xref.json")
+
+# Suffix tokens are too common to say anything about who a player is
+_SUFFIX_TOKENS = {"jr", "jr.", "sr", "sr.", "ii", "iii", "iv"}
+
+
+class NameMatch(NamedTuple):
+    nba_id: int | None
+    method: str            # "xref", "exact", "prefix", "token" or "none"
+    candidates: list[int]  # more than one → ambiguous, nba_id is None
+
+    @property
+    def ambiguous(self) -> bool:
+        return self.nba_id is None and len(self.candidates) > 1
+
+
+class PlayerNameResolver:
+    """
+    Built once from nba_api's static player list:
+      - exact map: cleaned full name -> ids
+      - prefix trie over cleaned full names
+      - token inverted index: token -> ids
+      - ESPN id -> NBA id cross-reference, persisted to XREF_PATH
+
+    Each lookup is a handful of dict hits. When several players fit equally
+    well (and active status doesn't break the tie) the match is reported as
+    ambiguous instead of silently taking the first one.
+    """
+
+    def __init__(self, players_list: list[dict], xref_path: Path = XREF_PATH):
+        self.players = {p["id"]: p for p in players_list}
+        self.exact: dict[str, list[int]] = {}
+        self.tokens: dict[str, set[int]] = {}
+        self.trie: dict = {}
+        self.xref_path = Path(xref_path)
+        self.xref: dict[str, int] = {}
+        self._xref_lock = threading.Lock()
+
+        for pid, p in self.players.items():
+            full_clean = clean_name(p["full_name"])
+            self.exact.setdefault(full_clean, []).append(pid)
+            for tok in full_clean.split():
+                self.tokens.setdefault(tok, set()).add(pid)
+
+            node = self.trie
+            for ch in full_clean:
+                node = node.setdefault(ch, {})
+                node.setdefault("*", []).append(pid)  # every name under this prefix
+            node.setdefault("$", []).append(pid)       # names ending exactly here
+
+        if self.xref_path.exists():
+            try:
+                self.xref = {str(k): int(v) for k, v in json.loads(self.xref_path.read_text(encoding="utf-8")).items()}
+            except (OSError, ValueError) as e:
+                print(f"[PlayerNameResolver] could not read {self.xref_path}: {e}")
+
+    def _pick(self, ids, method: str) -> NameMatch:
+        ids = sorted(set(ids))
+        if len(ids) == 1:
+            return NameMatch(ids[0], method, ids)
+        active = [i for i in ids if self.players[i].get("is_active")]
+        if len(active) == 1:
+            return NameMatch(active[0], method, ids)
+        return NameMatch(None, method, ids)
+
+    def _prefix_ids(self, target_clean: str) -> list[int]:
+        """
+        Names that start with the target (truncated ESPN names), plus names
+        the target starts with (ESPN adds a suffix/extra token).
+        """
+        node = self.trie
+        shorter = []
+        for i, ch in enumerate(target_clean):
+            node = node.get(ch)
+            if node is None:
+                return shorter
+            # Only whole-word prefixes: "jaren jackson" for "jaren jackson jr."
+            nxt = target_clean[i + 1] if i + 1 < len(target_clean) else " "
+            if nxt in " .":
+                shorter.extend(node.get("$", []))
+        return node.get("*", []) or shorter
+
+    def resolve(self, name: str, espn_id: int | None = None) -> NameMatch:
+        if espn_id is not None and str(espn_id) in self.xref:
+            nba_id = self.xref[str(espn_id)]
+            return NameMatch(nba_id, "xref", [nba_id])
+        if not name:
+            return NameMatch(None, "none", [])
+
+        # Apply alias (for memes like Tingus Pingus, typos, etc)
+        canonical = NAME_ALIASES.get(name, name)
+        target_clean = clean_name(canonical)
+
+        # ---- 1) Exact cleaned full-name match ----
+        ids = self.exact.get(target_clean)
+        if ids:
+            return self._pick(ids, "exact")
+
+        # ---- 2) Prefix match (handles slight truncations) ----
+        ids = self._prefix_ids(target_clean)
+        if ids:
+            return self._pick(ids, "prefix")
+
+        # ---- 3) Token overlap (first/last swapped or partials) ----
+        scores: dict[int, int] = {}
+        for tok in target_clean.split():
+            if tok in _SUFFIX_TOKENS:
+                continue
+            for pid in self.tokens.get(tok, ()):
+                scores[pid] = scores.get(pid, 0) + 1
+        if scores:
+            best = max(scores.values())
+            return self._pick([pid for pid, n in scores.items() if n == best], "token")
+
+        return NameMatch(None, "none", [])
+
+    def remember(self, espn_id: int, nba_id: int) -> None:
+        """Record a resolved ESPN -> NBA mapping and persist the xref table."""
+        key = str(espn_id)
+        with self._xref_lock:
+            if self.xref.get(key) == nba_id:
+                return
+            self.xref[key] = int(nba_id)
+            tmp = self.xref_path.with_suffix(self.xref_path.suffix + ".tmp")
+            tmp.write_text(json.dumps(self.xref, indent=2, sort_keys=True), encoding="utf-8")
+            tmp.replace(self.xref_path)
+
+
+_resolver: PlayerNameResolver | None = None
+_resolver_lock = threading.Lock()
+
+
+def get_name_resolver() -> PlayerNameResolver:
+    global _resolver
+    if _resolver is None:
+        with _resolver_lock:
+            if _resolver is None:
+                _resolver = PlayerNameResolver(nba_players.get_players())
+    return _resolver
+
+
+def find_nba_player_id(name: str, espn_id: int | None = None) -> int | None:
     """
     Find the NBA player_id from a possibly messy ESPN name.
     Handles accents, memes, spacing issues, partial matches.
+
+    If espn_id is given, known players come straight from the persisted
+    cross-reference and new matches are added to it. Ambiguous names are
+    reported and return None rather than guessing.
     """
-    if not name:
+    resolver = get_name_resolver()
+    match = resolver.resolve(name, espn_id=espn_id)
+
+    if match.ambiguous:
+        options = ", ".join(
+            f"{resolver.players[i]['full_name']} ({i})" for i in match.candidates[:5]
+        )
+        print(f"[find_nba_player_id] ambiguous {match.method} match for '{name}': {options}")
         return None
 
-    # Apply alias (for memes like Tingus Pingus, typos, etc)
-    canonical = NAME_ALIASES.get(name, name)
-    target_clean = clean_name(canonical)
-
-    players_list = nba_players.get_players()
-
-    # ---- 0) Try nba_api's built-in full-name search first ----
-    # This often handles straightforward cases like "Santi Aldama" directly.
-    hits = nba_players.find_players_by_full_name(canonical)
-    if hits:
-        # If exactly one, just use it
-        if len(hits) == 1:
-            return hits[0]["id"]
-        # Otherwise try to pick the best cleaned-name match
-        for h in hits:
-            if clean_name(h["full_name"]) == target_clean:
-                return h["id"]
-        # Fallback: first hit
-        return hits[0]["id"]
-
-    # ---- 1) Exact cleaned full-name match ----
-    for p in players_list:
-        full_clean = clean_name(p["full_name"])
-        if full_clean == target_clean:
-            return p["id"]
-
-    # ---- 2) Startswith match (handles slight truncations) ----
-    for p in players_list:
-        full_clean = clean_name(p["full_name"])
-        if full_clean.startswith(target_clean) or target_clean.startswith(full_clean):
-            return p["id"]
-
-    # ---- 3) Token overlap (e.g. first/last swapped or partials) ----
-    t_tokens = target_clean.split()
-    for p in players_list:
-        full_clean = clean_name(p["full_name"])
-        f_tokens = full_clean.split()
-        if any(t in f_tokens for t in t_tokens):
-            return p["id"]
-
-    # ---- 4) Final fuzzy substring fallback ----
-    for p in players_list:
-        full_clean = clean_name(p["full_name"])
-        if target_clean in full_clean or full_clean in target_clean:
-            return p["id"]
-
-    return None
+    if match.nba_id is not None and espn_id is not None and match.method != "xref":
+        resolver.remember(espn_id, match.nba_id)
+
+    return match.nba_id
 
 def get_nba_game_logs(nba_player_id: int, season: str = "2025-26") -> pd.DataFrame:
-    gl = playergamelog.PlayerGameLog(
-        player_id=nba_player_id,
-        season=season,
-        season_type_all_star="Regular Season",
+    df = nba_stats.call(
+        lambda: playergamelog.PlayerGameLog(
+            player_id=nba_player_id,
+            season=season,
+            season_type_all_star="Regular Season",
+        ).get_data_frames()[0]
     )
-    df = gl.get_data_frames()[0]
     df["GAME_DATE"] = pd.to_datetime(df["GAME_DATE"], format="%b %d, %Y")
-
-    print(df.columns)  # <-- add this once to inspect
-
     return df
 
 
@@ -220,27 +289,7 @@ def build_fantasy_history_for_player(nba_player_id: int, season: str = "2025-26"
       { "date": date, "fantasy_points": float, "opponent": str, "game_id": str | None }
     """
     df = get_nba_game_logs(nba_player_id, season=season)
-    history = []
-
-    for _, row in df.iterrows():
-        game_date = row["GAME_DATE"].date()
-        fantasy_pts = calc_fantasy_points_from_row(row)
-
-        # handle both possible casings just in case
-        if hasattr(row, "get"):
-            game_id = row.get("GAME_ID", row.get("Game_ID", None))
-        else:
-            # fallback if it's some other dict-like
-            game_id = row["GAME_ID"] if "GAME_ID" in row else row.get("Game_ID")
-
-        history.append({
-            "date": game_date,
-            "fantasy_points": fantasy_pts,
-            "opponent": row["MATCHUP"],   # e.g. "UTA vs LAL"
-            "game_id": game_id,
-        })
-
-    return history
+    return history_rows_from_frame(df)
 
 def test():
     games = scoreboard.ScoreBoard()
@@ -1,21 +1,64 @@
 # api_server.py
 
 import os
-from fastapi import FastAPI, HTTPException, Query
+import threading
+import time
+from fastapi import FastAPI, HTTPException, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
+from pydantic import BaseModel
 
 import demo_mode
+import metrics
+import profiling
 
-# Only import live modules when demo mode is off (they trigger ESPN API calls on import)
+# Offline benchmarks: send ESPN / NBA traffic to upstream_standin.py instead
+if os.environ.get("UPSTREAM_STANDIN_URL"):
+    from upstream_standin import install_standin_redirect
+    install_standin_redirect(os.environ["UPSTREAM_STANDIN_URL"])
+
+# Only import live modules when demo mode is off (demo runs without ESPN/NBA deps).
+# The ESPN league itself is lazy: importing these costs no network round-trips.
 _DEMO = demo_mode.DEMO_ENABLED
+# Load the ESPN league in the background at startup (set to 0 to load on first request)
+_LEAGUE_WARMUP = os.environ.get("LEAGUE_WARMUP", "1") != "0"
+# Keep today / weekly odds precomputed in a background thread (set to 0 to disable)
+_PRECOMPUTE = os.environ.get("PRECOMPUTE", "1") != "0"
+# Largest `trials` /odds/today and /odds/custom accept (larger requests get a 422)
+MAX_TRIALS = int(os.environ.get("MAX_TRIALS", "100000"))
 if not _DEMO:
-    from simulate_matchup import run_today_matchups, run_custom_matchup
-    from weekly_sim import run_weekly_matchups
+    from fantasy import league
+    from league_snapshot import load_snapshot
+    from simulate_matchup import (
+        run_today_matchups, run_custom_matchup, prepare_custom_matchup, custom_matchup_response,
+    )
+    from live_odds import LIVE_PROJECTION_MODES
+    from weekly_sim import run_weekly_matchups, weekly_precision, WEEKLY_MAX_TRIALS, WEEKLY_QUICK_TRIALS
+    from league_registry import registry
     from patch_missing_players import main as patch_missing_players_main
+    from background_jobs import jobs
+    from sim_jobs import sim_jobs, QueueFull, SIM_JOB_MAX_TRIALS
+    from nbaTest import fetch_nba_live_games
+    from precompute import PrecomputedStore, PrecomputeScheduler, TODAY_TRIALS, WEEKLY_TRIALS
+    from odds_archive import archive_for, import_result_files, parse_bound, KINDS as ARCHIVE_KINDS
+
+# Serve a saved ESPN snapshot instead of the live league (offline runs / benchmarks)
+_SNAPSHOT_PATH = os.environ.get("ESPN_SNAPSHOT")
+_SOURCE = load_snapshot(_SNAPSHOT_PATH) if (_SNAPSHOT_PATH and not _DEMO) else None
+
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse whose encoding is recorded as the "serialization" stage."""
+
+    def render(self, content) -> bytes:
+        with metrics.stage("serialization"):
+            return super().render(content)
 
-app = FastAPI(title="Fantasy Live Odds API")
+
+app = FastAPI(title="Fantasy Live Odds API", default_response_class=TimedJSONResponse)
+# Opt-in per-request cProfile (PROFILING=1); must precede the route declarations
+profiling.install(app)
 
 # CORS for mobile / other frontends
 app.add_middleware(
@@ -26,46 +69,276 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def record_request_latency(request, call_next):
+    t0 = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template (/jobs/{job_id}), not the raw path
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        metrics.HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - t0, method=request.method, route=route, status=status,
+        )
+
 # Serve static files from ./static
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 
+def _warm_up_leagues():
+    for ctx in registry.contexts():
+        if ctx.is_default and _SOURCE is not None:
+            continue  # replaying a snapshot instead
+        try:
+            ctx.session.warm_up()
+            print(f"[api_server] league warm-up done: {ctx.session!r}")
+        except Exception as e:
+            print(f"[api_server] league {ctx.league_id} warm-up failed (will retry on first request): {e}")
+
+
+@app.on_event("startup")
+def start_league_warmup():
+    if _DEMO or not _LEAGUE_WARMUP:
+        return
+    threading.Thread(target=_warm_up_leagues, name="league-warmup", daemon=True).start()
+
+
+@app.on_event("startup")
+def start_odds_archive_import():
+    """Fold dated result files into the odds archive (files already imported are skipped)."""
+    if _DEMO:
+        return
+    threading.Thread(target=import_result_files, name="odds-archive-import", daemon=True).start()
+
+
+_precomputed = None
+
+
+@app.on_event("startup")
+def start_precompute():
+    global _precomputed
+    if _DEMO or not _PRECOMPUTE:
+        return
+    _precomputed = PrecomputedStore()
+    PrecomputeScheduler(
+        _precomputed, league, run_today_matchups, run_weekly_matchups, fetch_nba_live_games, source=_SOURCE,
+    ).start()
+
+
+@app.on_event("shutdown")
+def stop_sim_jobs():
+    if not _DEMO:
+        sim_jobs.shutdown()
+
+
+def _serve_precomputed(response: Response, name: str):
+    """Latest precomputed result for `name`, or None if there isn't one yet."""
+    entry = _precomputed.latest(name) if _precomputed is not None else None
+    if entry is None:
+        return None
+    response.headers["X-Precomputed-Version"] = str(entry["version"])
+    response.headers["X-Precomputed-Age"] = f"{time.time() - entry['computed_at']:.1f}"
+    return entry["data"]
+
+
 @app.get("/health")
 def health():
     return {"status": "ok", "demo_mode": _DEMO}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics_endpoint():
+    """Prometheus text exposition of stage timings, latencies, cache and trial counters."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/ready")
+def ready():
+    """
+    Readiness probe: 200 once the ESPN league is loaded (always in demo mode),
+    503 while warm-up is still running.
+    """
+    if _DEMO or _SOURCE is not None or league.is_ready:
+        return {"ready": True, "demo_mode": _DEMO}
+    raise HTTPException(status_code=503, detail="ESPN league still loading")
+
+
 # ─── Main odds endpoints ───────────────────────────────────────────────────────
+#
+# The un-prefixed endpoints serve the default league; /leagues/{league_id}/...
+# serve any league registered in league_registry (FANTASY_LEAGUES).
+
+def _league_ctx(league_id: int | None = None):
+    if _DEMO:
+        raise HTTPException(status_code=503, detail="Not available in demo mode.")
+    if league_id is None:
+        return registry.default
+    ctx = registry.get(league_id)
+    if ctx is None:
+        raise HTTPException(status_code=404, detail=f"Unknown league {league_id}")
+    return ctx
+
+
+def _source_for(ctx):
+    """League data to simulate for ctx (an ESPN_SNAPSHOT replaces the default league)."""
+    if ctx.is_default and _SOURCE is not None:
+        return _SOURCE
+    return ctx.session
+
+
+def _source_version(ctx):
+    """Version of the league data results are computed from (cache key part)."""
+    src = _source_for(ctx)
+    if src is _SOURCE:
+        return _SOURCE.snapshot_version
+    # Load first so the first request doesn't key on the pre-load version
+    return src.warm_up().snapshot_version
+
+
+def _cached(ctx, response: Response, key: tuple, compute):
+    """Serve `compute()` through the league's single-flight odds cache."""
+    data, status, age = ctx.odds_cache.get_or_compute(key, compute, version=_source_version(ctx))
+    response.headers["X-Cache"] = status
+    response.headers["X-Cache-Age"] = f"{age:.1f}"
+    return data
+
+
+def _check_live_mode(mode: str | None):
+    if mode is not None and mode not in LIVE_PROJECTION_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown mode '{mode}'. Expected one of: {', '.join(LIVE_PROJECTION_MODES)}",
+        )
+
+
+def _odds_today(ctx, response: Response, trials: int, mode: str | None):
+    _check_live_mode(mode)
+    if ctx.is_default and trials == TODAY_TRIALS and mode is None:
+        data = _serve_precomputed(response, "today")
+        if data is not None:
+            return data
+    source = _source_for(ctx)
+    return _cached(
+        ctx,
+        response,
+        ("today", trials, mode),
+        lambda: run_today_matchups(trials=trials, mode=mode, source=source),
+    )
+
+
+def _odds_weekly(ctx, response: Response, trials: int):
+    trials = min(trials, WEEKLY_MAX_TRIALS)
+    response.headers["X-Trials"] = str(trials)
+
+    precomputed = _serve_precomputed(response, "weekly") if ctx.is_default else None
+    if precomputed is not None and WEEKLY_TRIALS >= trials:
+        return {**precomputed, "precision": weekly_precision(precomputed)}
+
+    source = _source_for(ctx)
+    key = (trials, _source_version(ctx))
+    quick = min(trials, WEEKLY_QUICK_TRIALS)
+    # For a low-trial request (no precomputed result) the quick run is the answer
+    final = precomputed is None and quick >= trials
+    ref = ctx.weekly_refinements.get_or_start(
+        key,
+        lambda: precomputed if precomputed is not None else run_weekly_matchups(
+            trials=quick, save=False, source=source,
+        ),
+        None if final else (lambda: run_weekly_matchups(trials=trials, save=True, source=source)),
+        weekly_precision,
+    )
+    return ref.to_response()
+
+
+def _odds_weekly_result(ctx, result_id: str, wait: float):
+    ref = ctx.weekly_refinements.wait(result_id, wait)
+    if ref is None:
+        raise HTTPException(status_code=404, detail=f"Unknown result '{result_id}'")
+    return ref.to_response()
+
+
+def _odds_custom(ctx, response: Response, team1: str, team2: str, trials: int, mode: str | None):
+    _check_live_mode(mode)
+    source = _source_for(ctx)
+    try:
+        return _cached(
+            ctx,
+            response,
+            ("custom", team1.lower(), team2.lower(), trials, mode),
+            lambda: run_custom_matchup(team1, team2, trials=trials, mode=mode, source=source),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+def _odds_history(ctx, team: str | None, start: str | None, end: str | None, kind: str | None):
+    if kind is not None and kind not in ARCHIVE_KINDS:
+        raise HTTPException(status_code=400, detail=f"kind must be one of: {', '.join(ARCHIVE_KINDS)}")
+    try:
+        lo, hi = parse_bound(start), parse_bound(end, end=True)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Bad date: {e}")
+    rows = archive_for(ctx.league_id).query(team=team, start=lo, end=hi, kind=kind)
+    return {"league_id": ctx.league_id, "team": team, "from": start, "to": end, "count": len(rows), "rows": rows}
+
 
 @app.get("/odds/today")
-def odds_today(trials: int = 20000):
+def odds_today(
+    response: Response,
+    trials: int = Query(20000, ge=1, le=MAX_TRIALS, description="Number of Monte Carlo trials"),
+    mode: str | None = Query(None, description="Live projection: 'linear' or 'statline'"),
+):
     """
     Returns live-adjusted Monte Carlo odds for all today's matchups.
+    Identical requests share one computation and are cached briefly
+    (X-Cache header: hit / stale / miss / coalesced).
     In demo mode: serves cached data with clock-based live game progression.
     """
     if _DEMO:
         return demo_mode.run_demo_today()
-    data = run_today_matchups(trials=trials)
-    return data
+    return _odds_today(_league_ctx(), response, trials, mode)
 
 
 @app.get("/odds/weekly")
-def odds_weekly(trials: int = 20000):
+def odds_weekly(
+    response: Response,
+    trials: int = Query(20000, ge=1, description="Monte Carlo trials (capped server-side)"),
+):
     """
     Returns weekly Monte Carlo odds for all current matchups.
+
+    Answers immediately: from the precompute scheduler when it already ran
+    at least `trials` trials, otherwise with its result (or a quick
+    low-trial run) as an estimate while `trials` trials are refined in the
+    background. Fetch the refined result from /odds/weekly/results/{result_id}.
+    Every response carries "precision" (win-prob standard error).
     In demo mode: serves cached data with live today-state overlaid.
     """
     if _DEMO:
         return demo_mode.run_demo_weekly()
-    data = run_weekly_matchups(trials=10000, save=True)
-    return data
+    return _odds_weekly(_league_ctx(), response, trials)
+
+
+@app.get("/odds/weekly/results/{result_id}")
+def odds_weekly_result(
+    result_id: str,
+    wait: float = Query(0, ge=0, le=30, description="Seconds to wait for a pending refinement"),
+):
+    """Current (estimate or refined) result of a progressive /odds/weekly request."""
+    return _odds_weekly_result(_league_ctx(), result_id, wait)
 
 
 @app.get("/odds/custom")
 def odds_custom(
+    response: Response,
     team1: str = Query(..., description="First fantasy team name"),
     team2: str = Query(..., description="Second fantasy team name"),
-    trials: int = Query(20000, description="Number of Monte Carlo trials"),
+    trials: int = Query(20000, ge=1, le=MAX_TRIALS, description="Number of Monte Carlo trials"),
+    mode: str | None = Query(None, description="Live projection: 'linear' or 'statline'"),
 ):
     """
     Returns live-adjusted Monte Carlo odds for a specific pair of fantasy teams.
@@ -76,21 +349,198 @@ def odds_custom(
             status_code=503,
             detail="Custom matchup not available in demo mode. Disable DEMO_DATE to use this endpoint.",
         )
-    try:
-        return run_custom_matchup(team1, team2, trials=trials)
-    except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
+    return _odds_custom(_league_ctx(), response, team1, team2, trials, mode)
+
+
+_HISTORY_FROM = Query(None, alias="from", description="ISO date or datetime (inclusive)")
+_HISTORY_TO = Query(None, alias="to", description="ISO date (whole day included) or datetime (exclusive)")
+_HISTORY_KIND = Query(None, description="'today' or 'weekly' (both when omitted)")
 
 
-@app.get("/patch_missing_players")
+@app.get("/odds/history")
+def odds_history(
+    team: str | None = Query(None, description="Fantasy team name (all teams when omitted)"),
+    start: str | None = _HISTORY_FROM,
+    end: str | None = _HISTORY_TO,
+    kind: str | None = _HISTORY_KIND,
+):
+    """
+    Archived odds snapshots (projected score, win probability, current
+    score per team) between `from` and `to`, oldest first. Only the
+    archive partitions overlapping the range are read.
+    """
+    return _odds_history(_league_ctx(), team, start, end, kind)
+
+
+# ─── Per-league endpoints ──────────────────────────────────────────────────────
+
+@app.get("/leagues")
+def leagues():
+    """Registered leagues and their load state."""
+    return [ctx.to_dict() for ctx in registry.contexts()] if not _DEMO else []
+
+
+@app.get("/leagues/memory")
+def leagues_memory():
+    """Approximate memory held per league (loaded League, odds cache, weekly results)."""
+    _league_ctx()
+    return registry.memory()
+
+
+@app.get("/leagues/{league_id}/odds/today")
+def league_odds_today(
+    league_id: int,
+    response: Response,
+    trials: int = Query(20000, ge=1, le=MAX_TRIALS, description="Number of Monte Carlo trials"),
+    mode: str | None = Query(None, description="Live projection: 'linear' or 'statline'"),
+):
+    return _odds_today(_league_ctx(league_id), response, trials, mode)
+
+
+@app.get("/leagues/{league_id}/odds/weekly")
+def league_odds_weekly(
+    league_id: int,
+    response: Response,
+    trials: int = Query(20000, ge=1, description="Monte Carlo trials (capped server-side)"),
+):
+    return _odds_weekly(_league_ctx(league_id), response, trials)
+
+
+@app.get("/leagues/{league_id}/odds/weekly/results/{result_id}")
+def league_odds_weekly_result(
+    league_id: int,
+    result_id: str,
+    wait: float = Query(0, ge=0, le=30, description="Seconds to wait for a pending refinement"),
+):
+    return _odds_weekly_result(_league_ctx(league_id), result_id, wait)
+
+
+@app.get("/leagues/{league_id}/odds/custom")
+def league_odds_custom(
+    league_id: int,
+    response: Response,
+    team1: str = Query(..., description="First fantasy team name"),
+    team2: str = Query(..., description="Second fantasy team name"),
+    trials: int = Query(20000, ge=1, le=MAX_TRIALS, description="Number of Monte Carlo trials"),
+    mode: str | None = Query(None, description="Live projection: 'linear' or 'statline'"),
+):
+    return _odds_custom(_league_ctx(league_id), response, team1, team2, trials, mode)
+
+
+@app.get("/leagues/{league_id}/odds/history")
+def league_odds_history(
+    league_id: int,
+    team: str | None = Query(None, description="Fantasy team name (all teams when omitted)"),
+    start: str | None = _HISTORY_FROM,
+    end: str | None = _HISTORY_TO,
+    kind: str | None = _HISTORY_KIND,
+):
+    return _odds_history(_league_ctx(league_id), team, start, end, kind)
+
+
+@app.get("/patch_missing_players", status_code=202)
 def patch_missing_players():
+    """
+    Queue a history refresh (backfill missing players, ingest new games)
+    and return its job id; poll /patch_missing_players/{job_id} for status.
+    """
     if _DEMO:
         raise HTTPException(status_code=503, detail="Not available in demo mode.")
+    job = jobs.submit("patch_missing_players", patch_missing_players_main)
+    return {"status": job.status, "job_id": job.id}
+
+
+@app.get("/patch_missing_players/{job_id}")
+def patch_missing_players_status(job_id: str):
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'")
+    return job.to_dict()
+
+
+# ─── Simulation jobs ───────────────────────────────────────────────────────────
+
+class SimulateRequest(BaseModel):
+    team1: str
+    team2: str
+    trials: int = 20000
+    mode: str | None = None
+    league_id: int | None = None  # default league when omitted
+
+
+@app.post("/jobs/simulate", status_code=202)
+def jobs_simulate(req: SimulateRequest):
+    """
+    Queue a custom-matchup simulation in the worker process pool and return
+    its job id; poll GET /jobs/{job_id} for progress and the result.
+    429 when too many simulations are already queued or running.
+    """
+    # Reject bad parameters before _league_ctx, which may load the league from ESPN
+    _check_live_mode(req.mode)
+    if not 1 <= req.trials <= SIM_JOB_MAX_TRIALS:
+        raise HTTPException(status_code=400, detail=f"trials must be between 1 and {SIM_JOB_MAX_TRIALS}")
+    source = _source_for(_league_ctx(req.league_id))
     try:
-        patch_missing_players_main()
-        return {"status": "success", "message": "Missing players patched successfully."}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        job = sim_jobs.submit(
+            "custom",
+            lambda: prepare_custom_matchup(req.team1, req.team2, mode=req.mode, source=source),
+            custom_matchup_response,
+            trials=req.trials,
+            params=req.dict(),
+        )
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"status": job.status, "job_id": job.id}
+
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    """Status, progress and result of a simulation (or maintenance) job."""
+    job = None if _DEMO else (sim_jobs.get(job_id) or jobs.get(job_id))
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'")
+    return job.to_dict()
+
+
+@app.delete("/jobs/{job_id}")
+def job_cancel(job_id: str):
+    """Cancel a queued or running simulation job."""
+    job = None if _DEMO else sim_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown simulation job '{job_id}'")
+    return job.to_dict()
+
+
+# ─── Profiles ──────────────────────────────────────────────────────────────────
+
+def _require_profiling():
+    if not profiling.PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling is disabled. Set PROFILING=1.")
+
+
+@app.get("/debug/profiles")
+def debug_profiles():
+    """Stored request profiles, newest first."""
+    _require_profiling()
+    return profiling.list_profiles()
+
+
+@app.get("/debug/profiles/{profile_id}")
+def debug_profile(
+    profile_id: str,
+    format: str = Query("collapsed", description="'collapsed' (folded stacks) or 'pstats' (cProfile dump)"),
+):
+    _require_profiling()
+    path = profiling.profile_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Unknown profile '{profile_id}'")
+    if format == "pstats":
+        return FileResponse(path, media_type="application/octet-stream", filename=path.name)
+    if format == "collapsed":
+        return PlainTextResponse(profiling.collapsed_stacks(path))
+    raise HTTPException(status_code=400, detail="format must be 'collapsed' or 'pstats'")
 
 
 # ─── Demo control endpoints ────────────────────────────────────────────────────
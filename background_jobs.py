@@ -0,0 +1,117 @@
+# background_jobs.py
+"""
+Minimal in-process job queue for long-running maintenance work, so API
+requests can enqueue it and return a job id instead of blocking.
+
+    job = jobs.submit("patch_missing_players", patch_missing_players_main)
+    jobs.get(job.id).to_dict()  # {"id", "name", "status", "result", "error", ...}
+
+Jobs run one at a time on a single worker thread (they typically rewrite
+the same files). Submitting a job while one with the same name is still
+queued or running returns the existing job instead of queueing a duplicate.
+"""
+
+import queue
+import threading
+import time
+import traceback
+import uuid
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+# Finished jobs kept around for status lookups
+MAX_FINISHED_JOBS = 100
+
+
+class Job:
+    def __init__(self, name: str, fn, args: tuple, kwargs: dict):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def done(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobRegistry:
+    def __init__(self, name: str = "jobs"):
+        self.name = name
+        self._jobs: dict[str, Job] = {}
+        self._queue: "queue.Queue[Job]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name=f"{self.name}-worker", daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            job.status = RUNNING
+            job.started_at = time.time()
+            print(f"[JobRegistry] {job.name} {job.id} started")
+            try:
+                job.result = job.fn(*job.args, **job.kwargs)
+                job.status = SUCCEEDED
+            except Exception as e:
+                job.error = str(e)
+                job.status = FAILED
+                traceback.print_exc()
+            job.finished_at = time.time()
+            print(f"[JobRegistry] {job.name} {job.id} {job.status} "
+                  f"in {job.finished_at - job.started_at:.1f}s")
+            self._prune()
+
+    def _prune(self):
+        with self._lock:
+            finished = [j for j in self._jobs.values() if j.done]
+            finished.sort(key=lambda j: j.finished_at)
+            for j in finished[:-MAX_FINISHED_JOBS]:
+                del self._jobs[j.id]
+
+    def submit(self, name: str, fn, *args, **kwargs) -> Job:
+        with self._lock:
+            for j in self._jobs.values():
+                if j.name == name and not j.done:
+                    return j
+            job = Job(name, fn, args, kwargs)
+            self._jobs[job.id] = job
+            self._ensure_worker()
+        self._queue.put(job)
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        return self._jobs.get(job_id)
+
+    def list(self) -> list[Job]:
+        return sorted(self._jobs.values(), key=lambda j: j.created_at, reverse=True)
+
+
+# Shared registry for maintenance jobs (history patching / ingestion)
+jobs = JobRegistry("maintenance")
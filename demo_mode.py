@@ -18,6 +18,7 @@ Control endpoints (when server is running):
 import math
 import os
 import json
+import threading
 import time
 from datetime import date, timedelta
 from pathlib import Path
@@ -196,6 +197,35 @@ def get_demo_status() -> dict:
 
 
 # ─── Cache loaders ────────────────────────────────────────────────────────────
+#
+# The frontend polls, so the cache files are parsed once and kept in memory,
+# already reduced to what a request needs (per-team lookups, per-matchup
+# weekly sums). A file whose mtime or size changed is reloaded on the next
+# request; otherwise a request only does the clock-fraction arithmetic.
+
+_cache_lock = threading.Lock()
+_cache_entries: dict[str, tuple] = {}  # name -> (file stamps, built value)
+
+
+def _file_stamp(path: Path) -> tuple | None:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _cached(name: str, paths: list[Path], build):
+    """build() once per version of `paths` (missing files count as a version)."""
+    stamps = tuple(_file_stamp(p) for p in paths)
+    with _cache_lock:
+        entry = _cache_entries.get(name)
+        if entry is None or entry[0] != stamps:
+            entry = _cache_entries[name] = (stamps, build())
+            if entry[1] is not None:
+                print(f"[demo_mode] loaded {name} index")
+        return entry[1]
+
 
 def _load_json(path: Path) -> dict | None:
     if not path.exists():
@@ -205,12 +235,98 @@ def _load_json(path: Path) -> dict | None:
         return json.load(f)
 
 
+def _weekly_path() -> Path:
+    return Path(f"{DEMO_WEEK_START.isoformat()}_weekly_odds.json")
+
+
+def _daily_path() -> Path:
+    return Path(f"{DEMO_DATE.isoformat()}_projScore.json")
+
+
 def _weekly_cache() -> dict | None:
-    return _load_json(Path(f"{DEMO_WEEK_START.isoformat()}_weekly_odds.json"))
+    return _load_json(_weekly_path())
 
 
 def _daily_cache() -> dict | None:
-    return _load_json(Path(f"{DEMO_DATE.isoformat()}_projScore.json"))
+    return _load_json(_daily_path())
+
+
+def _build_today_index() -> dict | None:
+    """
+    Per-team projected score / tie prob / logo for the demo day.
+    The projScore cache has values from the actual day simulation (most
+    accurate); the weekly cache's daily_scores is the fallback.
+    """
+    daily = _daily_cache()
+    weekly = None if daily else _weekly_cache()
+    if not daily and not weekly:
+        return None
+
+    demo_today_str = DEMO_DATE.isoformat()
+    teams: dict[str, dict] = {}
+    pairs: list[tuple[str, str]] = []
+    for m in (daily or weekly).get("matchups", []):
+        h, a = m["home_team"], m["away_team"]
+        if daily:
+            h_proj = float(m.get("home_avg", 0.0))
+            a_proj = float(m.get("away_avg", 0.0))
+            tie = float(m.get("tie_prob", 0.0))
+        else:
+            ds = m.get("daily_scores", {}).get(demo_today_str, {})
+            h_proj = float(ds.get("team1", m.get("home_avg", 0.0) / 7))
+            a_proj = float(ds.get("team2", m.get("away_avg", 0.0) / 7))
+            tie = 0.0
+        teams[h] = {"proj": h_proj, "tie_prob": tie, "url": m.get("home_team_url", "")}
+        teams[a] = {"proj": a_proj, "tie_prob": tie, "url": m.get("away_team_url", "")}
+        pairs.append((h, a))
+    return {"teams": teams, "pairs": pairs}
+
+
+def _today_index() -> dict | None:
+    return _cached("today", [_daily_path(), _weekly_path()], _build_today_index)
+
+
+def _build_weekly_index() -> list[dict] | None:
+    """
+    Weekly matchups with everything that doesn't move with the clock
+    precomputed: the cached today projection and the projected points of
+    the days before (base) and after (future) the demo day.
+    """
+    weekly = _weekly_cache()
+    if not weekly:
+        return None
+
+    demo_today_str = DEMO_DATE.isoformat()
+    out = []
+    for m in weekly.get("matchups", []):
+        daily_scores = m.get("daily_scores", {})
+        today = daily_scores.get(demo_today_str, {})
+        # Base accumulated score = sum of projected daily scores for days before today.
+        # Using projected daily scores (not ESPN actuals) keeps pre-game win
+        # probabilities calibrated to match the cached Monte Carlo output.
+        before = [v for d, v in daily_scores.items() if d < demo_today_str]
+        # Future days: projected scores for days after demo_date still in the week
+        after = [v for d, v in daily_scores.items() if d > demo_today_str]
+        out.append({
+            "home_team": m["home_team"],
+            "away_team": m["away_team"],
+            "tie_prob": m["tie_prob"],
+            "trials": m["trials"],
+            "home_team_url": m["home_team_url"],
+            "away_team_url": m["away_team_url"],
+            "daily_scores": daily_scores,
+            "h_cached_today": float(today.get("team1", 0.0)),
+            "a_cached_today": float(today.get("team2", 0.0)),
+            "h_base": sum(float(v.get("team1", 0.0)) for v in before),
+            "a_base": sum(float(v.get("team2", 0.0)) for v in before),
+            "h_future": sum(float(v.get("team1", 0.0)) for v in after),
+            "a_future": sum(float(v.get("team2", 0.0)) for v in after),
+        })
+    return out
+
+
+def _weekly_index() -> list[dict] | None:
+    return _cached("weekly", [_weekly_path()], _build_weekly_index)
 
 
 # ─── run_demo_today ───────────────────────────────────────────────────────────
@@ -223,56 +339,20 @@ def run_demo_today() -> dict:
     Prefers the daily projScore cache for win probs and daily projections;
     falls back to the weekly cache's daily_scores if projScore is missing.
     """
-    daily = _daily_cache()
-    weekly = _weekly_cache()
-
-    if not daily and not weekly:
+    index = _today_index()
+    if index is None:
         return {
             "error": (
                 "No demo cache found. "
                 f"Need {DEMO_DATE}_projScore.json or {DEMO_WEEK_START}_weekly_odds.json"
             )
         }
+    return _demo_today(index, _game_fraction())
 
-    demo_today_str = DEMO_DATE.isoformat()
-
-    # Build per-team lookup for today's projected score and win probability.
-    # The projScore cache has values from the actual day simulation (most accurate).
-    # The weekly cache's daily_scores is the fallback.
-    today_proj: dict[str, float] = {}
-    today_win_probs: dict[str, float] = {}
-    today_tie_probs: dict[str, float] = {}
-    team_urls: dict[str, str] = {}
-    matchup_pairs: list[tuple[str, str]] = []
-
-    if daily:
-        for m in daily.get("matchups", []):
-            h, a = m["home_team"], m["away_team"]
-            today_proj[h] = float(m.get("home_avg", 0.0))
-            today_proj[a] = float(m.get("away_avg", 0.0))
-            today_win_probs[h] = float(m.get("home_win_prob", 0.5))
-            today_win_probs[a] = float(m.get("away_win_prob", 0.5))
-            today_tie_probs[h] = float(m.get("tie_prob", 0.0))
-            today_tie_probs[a] = float(m.get("tie_prob", 0.0))
-            team_urls[h] = m.get("home_team_url", "")
-            team_urls[a] = m.get("away_team_url", "")
-            matchup_pairs.append((h, a))
-
-    elif weekly:
-        for m in weekly.get("matchups", []):
-            h, a = m["home_team"], m["away_team"]
-            ds = m.get("daily_scores", {}).get(demo_today_str, {})
-            today_proj[h] = float(ds.get("team1", m.get("home_avg", 0.0) / 7))
-            today_proj[a] = float(ds.get("team2", m.get("away_avg", 0.0) / 7))
-            today_win_probs[h] = 0.5
-            today_win_probs[a] = 0.5
-            today_tie_probs[h] = 0.0
-            today_tie_probs[a] = 0.0
-            team_urls[h] = m.get("home_team_url", "")
-            team_urls[a] = m.get("away_team_url", "")
-            matchup_pairs.append((h, a))
 
-    frac = _game_fraction()
+def _demo_today(index: dict, frac: float) -> dict:
+    demo_today_str = DEMO_DATE.isoformat()
+    teams = index["teams"]
     is_live = 0.0 < frac < 1.0
 
     results = []
@@ -280,9 +360,9 @@ def run_demo_today() -> dict:
     proj_scores: dict[str, float] = {}
     win_probs: dict[str, float] = {}
 
-    for home, away in matchup_pairs:
-        h_proj = today_proj.get(home, 0.0)
-        a_proj = today_proj.get(away, 0.0)
+    for home, away in index["pairs"]:
+        h_proj = teams[home]["proj"]
+        a_proj = teams[away]["proj"]
         h_current = round(h_proj * frac + _scoring_noise(home, frac, h_proj), 2)
         a_current = round(a_proj * frac + _scoring_noise(away, frac, a_proj), 2)
 
@@ -311,10 +391,10 @@ def run_demo_today() -> dict:
             "away_avg": a_proj_final,
             "home_win_prob": h_win_prob,
             "away_win_prob": a_win_prob,
-            "tie_prob": today_tie_probs.get(home, 0.0),
+            "tie_prob": teams[home]["tie_prob"],
             "trials": 10000,
-            "home_team_url": team_urls.get(home, ""),
-            "away_team_url": team_urls.get(away, ""),
+            "home_team_url": teams[home]["url"],
+            "away_team_url": teams[away]["url"],
             "home_current_score": h_current,
             "away_current_score": a_current,
         })
@@ -348,15 +428,16 @@ def run_demo_weekly() -> dict:
     Returns weekly odds with live today-state overlaid using clock fraction.
 
     Weekly projected scores and win probabilities come from the cached weekly_odds.
-    The "today live" layer is computed by run_demo_today() and merged in.
+    The "today live" layer is computed as in run_demo_today(), at the same
+    clock fraction, and merged in.
 
     home_current_score  = base accumulated score (Mon-day_before_demo) + today partial
     home_today_score    = today's partial score so far (daily_proj × fraction)
     home_today_remaining_proj = projected remaining today
     home_today_total_proj     = full projected daily score
     """
-    weekly = _weekly_cache()
-    if not weekly:
+    weekly = _weekly_index()
+    if weekly is None:
         return {
             "error": (
                 f"No weekly cache for week of {DEMO_WEEK_START}. "
@@ -364,30 +445,25 @@ def run_demo_weekly() -> dict:
             )
         }
 
-    today_data = run_demo_today()
-    if "error" in today_data:
-        return today_data
+    today_index = _today_index()
+    if today_index is None:
+        return run_demo_today()  # the error response
+    frac = _game_fraction()
+    today_data = _demo_today(today_index, frac)
 
     today_current = today_data.get("current_scores", {})
     today_proj_map = today_data.get("proj_scores", {})
     is_live = today_data.get("is_live", False)
-    frac = _game_fraction()
     demo_today_str = DEMO_DATE.isoformat()
 
     matchups = []
 
-    for m in weekly.get("matchups", []):
+    for m in weekly:
         home, away = m["home_team"], m["away_team"]
 
         # Today's projected daily total and current partial score
-        h_today_proj = today_proj_map.get(
-            home,
-            float(m.get("daily_scores", {}).get(demo_today_str, {}).get("team1", 0.0)),
-        )
-        a_today_proj = today_proj_map.get(
-            away,
-            float(m.get("daily_scores", {}).get(demo_today_str, {}).get("team2", 0.0)),
-        )
+        h_today_proj = today_proj_map.get(home, m["h_cached_today"])
+        a_today_proj = today_proj_map.get(away, m["a_cached_today"])
         h_today_current = today_current.get(home, round(h_today_proj * frac, 2))
         a_today_current = today_current.get(away, round(a_today_proj * frac, 2))
         # Pace-based remaining: if a team is outscoring their projection,
@@ -405,37 +481,19 @@ def run_demo_weekly() -> dict:
             a_today_remaining = round(max(0.0, a_today_proj - a_today_current), 2)
 
         # Clone daily_scores and update today's entry with live values
-        daily_scores = dict(m.get("daily_scores", {}))
+        daily_scores = dict(m["daily_scores"])
         if demo_today_str in daily_scores:
             daily_scores[demo_today_str] = {
                 "team1": h_today_current,
                 "team2": a_today_current,
             }
 
-        # Base accumulated score = sum of projected daily scores for days before today.
-        # Using projected daily scores (not ESPN actuals) keeps pre-game win
-        # probabilities calibrated to match the cached Monte Carlo output.
-        h_base = sum(float(v.get("team1", 0.0)) for d, v in daily_scores.items() if d < demo_today_str)
-        a_base = sum(float(v.get("team2", 0.0)) for d, v in daily_scores.items() if d < demo_today_str)
-
-        h_total = round(h_base + h_today_current, 2)
-        a_total = round(a_base + a_today_current, 2)
-
-        # Future days: sum projected scores for days after demo_date still in the week
-        h_future = sum(
-            float(v.get("team1", 0.0))
-            for d, v in daily_scores.items()
-            if d > demo_today_str
-        )
-        a_future = sum(
-            float(v.get("team2", 0.0))
-            for d, v in daily_scores.items()
-            if d > demo_today_str
-        )
+        h_total = round(m["h_base"] + h_today_current, 2)
+        a_total = round(m["a_base"] + a_today_current, 2)
 
         # Remaining this week = rest of today + all future days
-        h_remaining = round(h_today_remaining + h_future, 2)
-        a_remaining = round(a_today_remaining + a_future, 2)
+        h_remaining = round(h_today_remaining + m["h_future"], 2)
+        a_remaining = round(a_today_remaining + m["a_future"], 2)
 
         # Dynamic projected final = what's been scored + what's still coming
         h_proj_final = round(h_total + h_remaining, 2)
@@ -1,4 +1,6 @@
 # NBA Import
+import threading
+import time
 from datetime import datetime, timedelta, date
 import scipy.stats as stats
 
@@ -11,11 +13,81 @@ from datetime import datetime, timedelta, date
 sys.path.append('A:\espn-api\espn-api')
 #This is not an API FROM ESPN, this is an API for Fantasy from SPN
 from espn_api.basketball import League, Matchup, Player, Team
+from upstream_client import espn
+from league_index import get_league_index
 
-league = League(league_id=538595081, year=2026,
-                espn_s2='AECrq3n2a056zbwdJi7Cny73%2BlS0gpyt0BzVNowetvcsdgI%2BAZ5d7o90xOhnooEGoPQu95%2BVCj%2Fsdb3EELbdXuLiA1YHzrAonEIP1TLLVlES4KPHh4jdDZ9bcddu4k0sALh7QipurlQVUgJsLc8WT%2BkKpFIacloHpGxbtK%2BVPoowAqPH3YlEpxL2S6Ca9Nqqzml9QvUlNmvYL4iky%2F4G735Mf3yVor3Et%2FGgbrvSwfOfh370S6FV9c5nZZjzcCfpFiZbpZVQdmFpVQsgXipWnn9q0wUapcojXArHPDJyD02YYQ%3D%3D',
-                swid='{F3126586-12DD-4281-9D5B-515865B5FC66}')
-team = league.teams[1]
+LEAGUE_ID = 538595081
+LEAGUE_YEAR = 2026
+ESPN_S2 = 'AECrq3n2a056zbwdJi7Cny73%2BlS0gpyt0BzVNowetvcsdgI%2BAZ5d7o90xOhnooEGoPQu95%2BVCj%2Fsdb3EELbdXuLiA1YHzrAonEIP1TLLVlES4KPHh4jdDZ9bcddu4k0sALh7QipurlQVUgJsLc8WT%2BkKpFIacloHpGxbtK%2BVPoowAqPH3YlEpxL2S6Ca9Nqqzml9QvUlNmvYL4iky%2F4G735Mf3yVor3Et%2FGgbrvSwfOfh370S6FV9c5nZZjzcCfpFiZbpZVQdmFpVQsgXipWnn9q0wUapcojXArHPDJyD02YYQ%3D%3D'
+SWID = '{F3126586-12DD-4281-9D5B-515865B5FC66}'
+
+
+class LeagueSession:
+    """
+    Lazily-built ESPN League.
+
+    Constructing an espn_api League fetches the league, teams and rosters,
+    so we don't do it at import time. The first attribute access (e.g.
+    league.teams) loads it; everything else is passed straight through to
+    the underlying League, so `from fantasy import league` works as before.
+
+    warm_up() / is_ready let the API server load it in the background at
+    startup and report readiness; refresh() swaps in a fresh League.
+    """
+
+    def __init__(self, league_id: int, year: int, espn_s2: str | None = None, swid: str | None = None):
+        self.league_id = league_id
+        self.year = year
+        self._espn_s2 = espn_s2
+        self._swid = swid
+        self._league: League | None = None
+        self._lock = threading.Lock()
+        # Bumped every time a new League is loaded; lets caches key on it
+        self.snapshot_version = 0
+        self.loaded_at: float | None = None
+
+    def _load(self) -> League:
+        lg = espn.call(League, league_id=self.league_id, year=self.year,
+                       espn_s2=self._espn_s2, swid=self._swid)
+        self._league = lg
+        self.snapshot_version += 1
+        self.loaded_at = time.time()
+        return lg
+
+    @property
+    def league(self) -> League:
+        if self._league is None:
+            with self._lock:
+                if self._league is None:
+                    self._load()
+        return self._league
+
+    @property
+    def is_ready(self) -> bool:
+        return self._league is not None
+
+    def warm_up(self) -> "LeagueSession":
+        """Load the league now (no-op if already loaded)."""
+        _ = self.league
+        return self
+
+    def refresh(self) -> League:
+        """Refetch the league from ESPN and bump snapshot_version."""
+        with self._lock:
+            return self._load()
+
+    def __getattr__(self, name):
+        # Only called for attributes not found on the session itself
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.league, name)
+
+    def __repr__(self):
+        state = "ready" if self.is_ready else "not loaded"
+        return f"LeagueSession(league_id={self.league_id}, year={self.year}, {state})"
+
+
+league = LeagueSession(LEAGUE_ID, LEAGUE_YEAR, espn_s2=ESPN_S2, swid=SWID)
 
 from flask import Flask, request, jsonify
 from flask_cors import CORS
@@ -44,7 +116,7 @@ def weeklyblindprojections():
     projections = []
     nbaDATA = fetch_nba_live_games()
 
-    for boxscore in box_scores:
+    for boxscore in box:
         home_team_name = boxscore.home_team.team_name
         away_team_name = boxscore.away_team.team_name
         home_team_projected_points = 0
@@ -131,44 +203,37 @@ def simplePrediction(home_team: int, away_team: int, homeFirstGame: int, homelas
 
 
 def playerAVGPoints(player: Player, team_name: str) -> float:
-    # Find the fantasy team by its name
-    leagueTeam = None
-    for teamSearch in league.teams:
-        if teamSearch.team_name == team_name:
-            leagueTeam = teamSearch
-            break
+    # O(1) lookups through the league index instead of scanning every roster
+    idx = get_league_index(league)
+    leagueTeam = idx.team_of(player.playerId)
 
-    if leagueTeam is None:
+    # Player not on that fantasy team (or not rostered at all): treat as 0
+    if leagueTeam is None or leagueTeam.team_name != team_name:
         return 0.0
 
-    # Find the matching player on that team
-    for playerCheck in leagueTeam.roster:
-        if player.name == playerCheck.name:
-            stats = playerCheck.stats or {}
+    playerCheck = idx.player(player.playerId)
+    stats = playerCheck.stats or {}
 
-            # Prefer the stats for the current league year, e.g. '2026_total'
-            year_key = f"{league.year}_total"
-            total_stats = stats.get(year_key)
+    # Prefer the stats for the current league year, e.g. '2026_total'
+    year_key = f"{league.year}_total"
+    total_stats = stats.get(year_key)
 
-            # If that key isn't there, fall back to any *_total key
-            if total_stats is None:
-                for k, v in stats.items():
-                    if k.endswith("_total"):
-                        total_stats = v
-                        break
+    # If that key isn't there, fall back to any *_total key
+    if total_stats is None:
+        for k, v in stats.items():
+            if k.endswith("_total"):
+                total_stats = v
+                break
 
-            if not total_stats:
-                return 0.0
-
-            avg = total_stats.get("applied_avg")
+    if not total_stats:
+        return 0.0
 
-            try:
-                return float(avg)
-            except (TypeError, ValueError):
-                return 0.0
+    avg = total_stats.get("applied_avg")
 
-    # Player not found on that team: treat as 0
-    return 0.0
+    try:
+        return float(avg)
+    except (TypeError, ValueError):
+        return 0.0
 
 from datetime import datetime
 
@@ -469,10 +534,5 @@ def debug_player_raw_by_name(fantasy_team_name: str, player_name: str):
     debug_player_raw(target_player)
 
 
-
-box_scores = league.box_scores()
-box_scores2 = league.box_scores(matchup_period=3)
-
-
 if __name__ == "__main__":
     debug_player_raw_by_name("Sarr Fox 64", "Anthony Davis")
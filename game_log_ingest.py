@@ -0,0 +1,145 @@
+# game_log_ingest.py
+"""
+Date-driven, incremental ingestion of NBA game logs into the fantasy
+history file.
+
+Instead of refetching every tracked player's full season through
+PlayerGameLog, LeagueGameLogs pulls every player row league-wide for the
+dates since the oldest watermark, one LeagueGameLog request per window.
+Rows are scored in bulk, and ingest_player_games upserts only one
+player's new games (matched on nba_player_id), so each player is its own
+unit of work sharing those few requests.
+
+Each entry records its own watermark ("updated_through", see
+ingest_scheduler).
+
+Only dates before today (in LA) are ingested, so a game that is still in
+progress is never recorded half-finished.
+"""
+
+from datetime import date, timedelta
+
+import pandas as pd
+from nba_api.stats.endpoints import leaguegamelog
+
+from NBAintegration import history_rows_from_frame
+from upstream_client import nba_stats
+
+# Dates per LeagueGameLog request; a whole week's slate is well under the row cap
+MAX_DAYS_PER_REQUEST = 14
+
+
+def fetch_league_game_logs(season: str, date_from: date | None, date_to: date) -> pd.DataFrame:
+    """All player game-log rows league-wide between two dates (inclusive)."""
+    df = nba_stats.call(
+        lambda: leaguegamelog.LeagueGameLog(
+            season=season,
+            season_type_all_star="Regular Season",
+            player_or_team_abbreviation="P",
+            date_from_nullable=date_from.strftime("%m/%d/%Y") if date_from else "",
+            date_to_nullable=date_to.strftime("%m/%d/%Y"),
+        ).get_data_frames()[0]
+    )
+    df["GAME_DATE"] = pd.to_datetime(df["GAME_DATE"])
+    return df
+
+
+def _date_windows(start: date | None, end: date):
+    if start is None:
+        # No watermark: one season-to-date pull
+        yield None, end
+        return
+    while start <= end:
+        stop = min(start + timedelta(days=MAX_DAYS_PER_REQUEST - 1), end)
+        yield start, stop
+        start = stop + timedelta(days=1)
+
+
+def upsert_game_rows(history: dict, pid_str: str, rows: list[dict]) -> int:
+    """Append rows whose game_id (or date, if no id) isn't already recorded."""
+    entry = history[pid_str]
+    existing_hist = entry.setdefault("history", [])
+    existing_game_ids = {h.get("game_id") for h in existing_hist if h.get("game_id")}
+    existing_dates = {h.get("date") for h in existing_hist}
+
+    to_add = []
+    for row in rows:
+        game_id = row.get("game_id")
+        if game_id and game_id in existing_game_ids:
+            continue
+        if not game_id and row["date"] in existing_dates:
+            continue
+        to_add.append(row)
+        if game_id:
+            existing_game_ids.add(game_id)
+
+    if to_add:
+        existing_hist.extend(to_add)
+        existing_hist.sort(key=lambda h: h.get("date", ""))
+    return len(to_add)
+
+
+class LeagueGameLogs:
+    """
+    League-wide game logs for date_from..through (None = season start),
+    fetched lazily one window (MAX_DAYS_PER_REQUEST days) at a time and
+    kept for the run, so every player's ingest shares the same few
+    requests. Each window is scored in bulk when it arrives.
+    """
+
+    def __init__(self, season: str, date_from: date | None, through: date):
+        self.season = season
+        self.through = through
+        self.windows = list(_date_windows(date_from, through))
+        self.requests = 0
+        self._by_player: dict[tuple, dict[int, tuple[pd.DataFrame, list[dict]]]] = {}
+
+    def _window(self, window: tuple) -> dict[int, tuple[pd.DataFrame, list[dict]]]:
+        by_player = self._by_player.get(window)
+        if by_player is None:
+            df = fetch_league_game_logs(self.season, *window)
+            self.requests += 1
+            rows = [{**row, "date": row["date"].isoformat()} for row in history_rows_from_frame(df)]
+            player_ids = df["PLAYER_ID"].astype(int).to_numpy()
+            by_player = {}
+            for nba_id in set(player_ids.tolist()):
+                mask = player_ids == nba_id
+                by_player[nba_id] = (df[mask], [r for r, keep in zip(rows, mask) if keep])
+            self._by_player[window] = by_player
+        return by_player
+
+    def player_games(self, nba_id: int, since: date | None) -> tuple[list[pd.DataFrame], list[dict]]:
+        """
+        (raw frames, scored history rows) for one NBA player from every
+        window that ends on or after `since` (all windows when None).
+        """
+        frames, rows = [], []
+        for window in self.windows:
+            if since is not None and window[1] < since:
+                continue
+            games = self._window(window).get(int(nba_id))
+            if games is not None:
+                frames.append(games[0])
+                rows.extend(games[1])
+        return frames, rows
+
+
+def ingest_player_games(history: dict, pid_str: str, logs: LeagueGameLogs, since: date | None,
+                        cube=None) -> int:
+    """
+    Upsert one history entry's new games (from `since` on) out of `logs`
+    and stamp it with updated_through = logs.through, its freshness
+    watermark. With cube, the raw stat rows go into that StatCube too.
+
+    Returns the number of rows added.
+    """
+    entry = history[pid_str]
+    frames, rows = logs.player_games(entry["nba_player_id"], since)
+    if cube is not None:
+        for df in frames:
+            cube.upsert_frame(df)
+    added = upsert_game_rows(history, pid_str, rows)
+    if added:
+        print(f"  -> Added {added} new games for {entry.get('name')}")
+    entry["updated_through"] = logs.through.isoformat()
+    return added
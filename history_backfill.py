@@ -0,0 +1,275 @@
+# history_backfill.py
+"""
+Concurrent, resumable backfill of fantasy history for a set of ESPN players.
+
+    players_data, errors = run_backfill(players, season)
+
+- Work runs on a small thread pool; every nba_api request still goes
+  through upstream_client.nba_stats, so the global rate limit holds no
+  matter how many workers there are.
+- Each finished player is written to its own checkpoint file
+  (.backfill/<season>/<espn_id>.json). A restarted run skips anything
+  already checkpointed, so a crash loses at most the in-flight players.
+- Progress (done / skipped / failed, rate, ETA) is printed as it goes and
+  available from BackfillProgress.snapshot().
+- Raw per-game stats are kept in the checkpoint too and, when a StatCube
+  is passed, stored in it during the merge (see stat_cube.py).
+- With output_path, the merged result is written atomically
+  (temp file + rename) once everything is done, and this run's
+  checkpoints are cleared so the next backfill starts fresh.
+
+A history written before the stat cube existed has no raw stats to
+rescore from. `python history_backfill.py seed-cube [history.json]`
+fills the cube once from a season-to-date LeagueGameLog pull (plus a
+PlayerGameLog for any tracked player it doesn't fully cover).
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from pathlib import Path
+
+from NBAintegration import current_nba_season_str, find_nba_player_id, get_nba_game_logs, history_rows_from_frame
+from game_log_ingest import fetch_league_game_logs
+from stat_cube import CUBE_STATS, StatCube, cube_path_for, frame_stat_matrix
+from upstream_client import nba_stats
+
+CHECKPOINT_ROOT = Path(".backfill")
+HISTORY_PATH = Path("fantasy_player_history_2025-26.json")
+
+
+def serialize_history_rows(rows):
+    """Convert rows from build_fantasy_history_for_player into JSON-friendly dicts."""
+    hist_serializable = []
+    for h in rows:
+        date_val = h["date"]
+        date_str = date_val.isoformat() if hasattr(date_val, "isoformat") else str(date_val)
+        hist_serializable.append(
+            {
+                "date": date_str,
+                "fantasy_points": float(h["fantasy_points"]),
+                "opponent": h["opponent"],
+                "game_id": h["game_id"],
+            }
+        )
+    return hist_serializable
+
+
+def atomic_write_json(path, data, indent: int | None = 2) -> None:
+    """Write JSON to a temp file next to `path`, then rename over it."""
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(json.dumps(data, indent=indent), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+class BackfillProgress:
+    def __init__(self, total: int):
+        self.total = total
+        self.done = 0
+        self.skipped = 0
+        self.failed = 0
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+
+    def record(self, outcome: str) -> None:
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            finished = self.done + self.failed
+            elapsed = time.time() - self.started_at
+            remaining = self.total - self.skipped - finished
+            rate = finished / elapsed if elapsed > 0 else 0.0
+            return {
+                "total": self.total,
+                "done": self.done,
+                "skipped": self.skipped,
+                "failed": self.failed,
+                "remaining": remaining,
+                "elapsed_seconds": round(elapsed, 1),
+                "players_per_minute": round(rate * 60, 2),
+                "eta_seconds": round(remaining / rate, 1) if rate > 0 else None,
+            }
+
+
+def _checkpoint_path(checkpoint_dir: Path, espn_id) -> Path:
+    return checkpoint_dir / f"{espn_id}.json"
+
+
+def _backfill_one(p, season: str, checkpoint_dir: Path) -> tuple[str, str | None]:
+    espn_id = getattr(p, "playerId", None)
+    name = getattr(p, "name", None)
+
+    nba_id = find_nba_player_id(name, espn_id=espn_id)
+    if nba_id is None:
+        return "failed", f"Could not find NBA ID for '{name}' (ESPN ID {espn_id})"
+
+    try:
+        df = get_nba_game_logs(nba_id, season=season)
+        rows = history_rows_from_frame(df)
+    except Exception as e:
+        return "failed", f"Error fetching history for {name} (NBA ID {nba_id}): {e}"
+
+    record = {
+        "espn_player_id": espn_id,
+        "nba_player_id": nba_id,
+        "name": name,
+        "proTeam": getattr(p, "proTeam", None),
+        "season": season,
+        "history": serialize_history_rows(rows),
+        # Raw stats for the cube; popped before the record reaches the history
+        "raw_stats": {
+            "columns": list(CUBE_STATS),
+            "stats": frame_stat_matrix(df).tolist(),
+        },
+    }
+    atomic_write_json(_checkpoint_path(checkpoint_dir, espn_id), record, indent=None)
+    return "done", None
+
+
+def run_backfill(
+    players,
+    season: str,
+    checkpoint_dir: Path | None = None,
+    concurrency: int | None = None,
+    merge_into: dict | None = None,
+    output_path=None,
+    cube=None,
+) -> tuple[dict, list[str]]:
+    """
+    Backfill history for `players` (ESPN player objects, deduped by playerId).
+
+    Returns (players_data, errors) where players_data maps str(espn_id) to
+    the history record. With merge_into, those records are added to that
+    dict (and it is what gets written/returned). With cube, every player's
+    raw stats are stored in that StatCube (the caller saves it).
+    """
+    checkpoint_dir = Path(checkpoint_dir or CHECKPOINT_ROOT / season)
+    checkpoint_dir.mkdir(parents=True, exist_ok=True)
+    concurrency = concurrency or nba_stats.concurrency
+
+    unique = {}
+    for p in players:
+        if getattr(p, "playerId", None) is not None and getattr(p, "name", None):
+            unique.setdefault(p.playerId, p)
+
+    progress = BackfillProgress(len(unique))
+    pending = []
+    for espn_id, p in unique.items():
+        if _checkpoint_path(checkpoint_dir, espn_id).exists():
+            progress.record("skipped")
+        else:
+            pending.append(p)
+
+    print(f"[run_backfill] {len(unique)} players, {progress.skipped} already checkpointed, "
+          f"{len(pending)} to fetch (concurrency {concurrency})")
+
+    errors: list[str] = []
+
+    def work(p):
+        outcome, err = _backfill_one(p, season, checkpoint_dir)
+        progress.record(outcome)
+        snap = progress.snapshot()
+        status = "ok" if outcome == "done" else f"!! {err}"
+        print(f"  [{snap['done'] + snap['failed']}/{snap['total'] - snap['skipped']}] {p.name}: {status} "
+              f"({snap['players_per_minute']}/min, eta {snap['eta_seconds']}s)")
+        if err:
+            errors.append(err)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(work, pending))
+
+    players_data = merge_into if merge_into is not None else {}
+    for espn_id in unique:
+        cp = _checkpoint_path(checkpoint_dir, espn_id)
+        if cp.exists():
+            record = json.loads(cp.read_text(encoding="utf-8"))
+            raw = record.pop("raw_stats", None)
+            if cube is not None and raw and raw["columns"] == list(CUBE_STATS):
+                hist = record["history"]
+                cube.upsert_rows(
+                    record["nba_player_id"],
+                    [h["game_id"] for h in hist],
+                    [h["date"] for h in hist],
+                    [h["opponent"] for h in hist],
+                    raw["stats"],
+                )
+            players_data[str(espn_id)] = record
+
+    if output_path is not None:
+        atomic_write_json(output_path, players_data)
+        print(f"[run_backfill] saved history for {len(players_data)} players → {output_path}")
+        # Safely in the history store now; checkpoints only matter for resuming
+        clear_checkpoints(season, unique, checkpoint_dir)
+
+    print(f"[run_backfill] progress: {progress.snapshot()}")
+    return players_data, errors
+
+
+def clear_checkpoints(season: str, espn_ids=None, checkpoint_dir: Path | None = None) -> None:
+    """Drop a season's checkpoints (all, or just `espn_ids`) so the next run refetches them."""
+    checkpoint_dir = Path(checkpoint_dir or CHECKPOINT_ROOT / season)
+    if espn_ids is None:
+        paths = checkpoint_dir.glob("*.json")
+    else:
+        paths = [_checkpoint_path(checkpoint_dir, i) for i in espn_ids]
+    for cp in paths:
+        cp.unlink(missing_ok=True)
+
+
+def seed_cube(history: dict, season: str, cube: StatCube) -> dict:
+    """
+    Store the raw stats of every game already in `history` in `cube`.
+
+    One season-to-date LeagueGameLog request covers every tracked player;
+    players whose history still has games the cube lacks afterwards get
+    their own PlayerGameLog. Already-stored games are just overwritten, so
+    running it again is harmless.
+    """
+    tracked: dict[int, set[str]] = {}
+    for entry in history.values():
+        nba_id = entry.get("nba_player_id")
+        if nba_id is None or entry.get("season") not in (None, season):
+            continue
+        game_ids = tracked.setdefault(int(nba_id), set())
+        game_ids.update(str(h["game_id"]) for h in entry.get("history", []) if h.get("game_id"))
+
+    summary = {"players": len(tracked), "games_added": 0, "requests": 0, "failed": []}
+    if not tracked:
+        return summary
+
+    df = fetch_league_game_logs(season, None, date.today())
+    summary["requests"] += 1
+    summary["games_added"] += cube.upsert_frame(df[df["PLAYER_ID"].isin(tracked.keys())])
+
+    for nba_id, game_ids in tracked.items():
+        if game_ids <= cube.game_ids_for(nba_id):
+            continue
+        try:
+            summary["games_added"] += cube.upsert_frame(get_nba_game_logs(nba_id, season=season))
+        except Exception as e:
+            summary["failed"].append(f"Error fetching game log for NBA ID {nba_id}: {e}")
+        summary["requests"] += 1
+
+    print(f"[seed_cube] {summary['games_added']} games for {summary['players']} players "
+          f"in {summary['requests']} requests ({len(summary['failed'])} failed)")
+    return summary
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] != ["seed-cube"]:
+        print("usage: python history_backfill.py seed-cube [history.json]")
+        sys.exit(2)
+    history_path = Path(sys.argv[2]) if len(sys.argv) > 2 else HISTORY_PATH
+    cube_path = cube_path_for(history_path)
+    cube = StatCube.load(cube_path)
+    summary = seed_cube(json.loads(history_path.read_text(encoding="utf-8")), current_nba_season_str(), cube)
+    cube.save(cube_path)
+    for e in summary["failed"]:
+        print(f"!! {e}")
@@ -0,0 +1,163 @@
+# ingest_scheduler.py
+"""
+Freshness-driven refresh of the fantasy history file.
+
+Every history entry carries an "updated_through" date: the last game date
+its rows were ingested through. A refresh only touches players that can
+actually have something new:
+
+  - rostered players missing from the history   -> full-season backfill
+  - players whose NBA team has a scheduled game
+    after their watermark (and before today)    -> one ingest item each
+
+Everyone else is skipped without a request. A player's watermark is their
+updated_through, or (never ingested by the scheduler) the date of their
+own latest recorded game. The ingest items share one set of league-wide
+game-log pulls starting at the oldest watermark (LeagueGameLogs), but
+each is retried with jittered exponential backoff on its own, so one
+player's failure doesn't redo or fail anyone else.
+
+    summary = refresh_history(history, season, league)
+"""
+
+import os
+import random
+import time
+from collections import deque
+from datetime import date, timedelta
+from functools import partial
+
+from NBAintegration import find_nba_player_id
+from game_log_ingest import LeagueGameLogs, ingest_player_games
+from history_backfill import run_backfill
+from nbaTest import _la_today, get_schedule_index
+
+INGEST_MAX_ATTEMPTS = int(os.environ.get("INGEST_MAX_ATTEMPTS", "3"))
+INGEST_BACKOFF_BASE = float(os.environ.get("INGEST_BACKOFF_BASE", "5"))
+INGEST_BACKOFF_CAP = float(os.environ.get("INGEST_BACKOFF_CAP", "120"))
+
+
+def _last_history_date(entry: dict) -> date | None:
+    dates = [h.get("date") for h in entry.get("history", []) if h.get("date")]
+    return date.fromisoformat(max(dates)[:10]) if dates else None
+
+
+def player_watermark(entry: dict) -> date | None:
+    """Date this player's history is known complete through."""
+    if entry.get("updated_through"):
+        return date.fromisoformat(entry["updated_through"])
+    return _last_history_date(entry)
+
+
+def plan_refresh(history: dict, lg, through: date,
+                 schedule_index=None) -> tuple[list, dict[str, date | None], int]:
+    """
+    Decide what a refresh needs to do.
+
+    Returns (missing_players, stale, fresh_count) where stale maps history
+    keys to their current watermark.
+    """
+    idx = schedule_index or get_schedule_index()
+    missing = []
+    stale: dict[str, date | None] = {}
+    fresh = 0
+
+    for team in lg.teams:
+        for p in team.roster:
+            pid_str = str(p.playerId)
+            entry = history.get(pid_str)
+            if entry is None:
+                missing.append(p)
+                continue
+
+            watermark = player_watermark(entry)
+            last_game = idx.last_game_on_or_before(p.proTeam, through)
+            if watermark is None or (last_game is not None and last_game > watermark):
+                stale[pid_str] = watermark
+            else:
+                fresh += 1
+
+    return missing, stale, fresh
+
+
+def _backoff(attempt: int) -> float:
+    return random.uniform(0, min(INGEST_BACKOFF_CAP, INGEST_BACKOFF_BASE * (2 ** attempt)))
+
+
+def refresh_history(history: dict, season: str, lg, through: date | None = None,
+                    cube=None) -> dict:
+    """
+    Plan and run a refresh of `history` in place. The caller saves it and
+    then drops the backfill checkpoints for summary["backfilled_ids"].
+    With cube, raw stats for everything fetched also go into that StatCube.
+
+    Returns a summary dict (counts, requests made, failures).
+    """
+    # Yesterday in LA: the server's date (UTC) is already tomorrow from 5 pm PT
+    through = through or (_la_today() - timedelta(days=1))
+    missing, stale, fresh = plan_refresh(history, lg, through)
+
+    print(f"[refresh_history] through {through}: {len(missing)} missing, "
+          f"{len(stale)} stale, {fresh} already fresh")
+
+    summary = {
+        "through": through.isoformat(),
+        "backfilled": 0,
+        "backfilled_ids": [],
+        "refreshed": len(stale),
+        "skipped_fresh": fresh,
+        "rows_added": 0,
+        "requests": 0,
+        "failed": [],
+    }
+
+    def backfill():
+        data, errors = run_backfill(missing, season, merge_into=history, cube=cube)
+        for p in missing:
+            entry = data.get(str(p.playerId))
+            if entry is not None:
+                entry["updated_through"] = through.isoformat()
+                summary["backfilled"] += 1
+                summary["backfilled_ids"].append(p.playerId)
+        summary["failed"].extend(errors)
+
+    # League-wide pulls from the oldest watermark cover every stale player
+    watermarks = list(stale.values())
+    oldest = None if None in watermarks or not watermarks else min(watermarks) + timedelta(days=1)
+    logs = LeagueGameLogs(season, oldest, through)
+
+    def ingest(pid_str):
+        entry = history[pid_str]
+        if not entry.get("nba_player_id"):
+            entry["nba_player_id"] = find_nba_player_id(entry.get("name"), espn_id=entry.get("espn_player_id"))
+            if not entry["nba_player_id"]:
+                # Nothing to retry: the name resolver is local
+                summary["failed"].append(f"ingest {entry.get('name')}: no NBA ID")
+                return
+        since = stale[pid_str] + timedelta(days=1) if stale[pid_str] is not None else None
+        summary["rows_added"] += ingest_player_games(history, pid_str, logs, since, cube=cube)
+
+    work = deque()
+    if missing:
+        work.append(("backfill", backfill))
+    for pid_str in stale:
+        work.append((f"ingest {history[pid_str].get('name') or pid_str}", partial(ingest, pid_str)))
+
+    while work:
+        name, fn = work.popleft()
+        for attempt in range(INGEST_MAX_ATTEMPTS):
+            try:
+                fn()
+                break
+            except Exception as e:
+                if attempt == INGEST_MAX_ATTEMPTS - 1:
+                    print(f"[refresh_history] {name} failed after {INGEST_MAX_ATTEMPTS} attempts: {e}")
+                    summary["failed"].append(f"{name}: {e}")
+                    break
+                delay = _backoff(attempt)
+                print(f"[refresh_history] {name} failed ({e}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    summary["requests"] = logs.requests
+    print(f"[refresh_history] done: {summary}")
+    return summary
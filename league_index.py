@@ -0,0 +1,96 @@
+# league_index.py
+"""
+Lookup tables over an ESPN league (live League, LeagueSession or
+league_snapshot.SnapshotLeague), so per-player lookups are dict hits
+instead of scans over every team and roster.
+
+    idx = get_league_index(league)
+    idx.player(player_id)          -> rostered player object
+    idx.team_of(player_id)         -> fantasy team that rosters them
+    idx.team("Team Burnett")       -> fantasy team by exact name
+    idx.team("team burnett", case_insensitive=True)
+    idx.players_on_pro_team("LAL") -> rostered players on that NBA team
+
+The index is built once per league snapshot: get_league_index() keeps it
+(weakly, per league object) together with the league's snapshot_version,
+which LeagueSession bumps on every (re)load and SnapshotLeague sets from
+its capture time.
+"""
+
+import threading
+import weakref
+
+
+class LeagueIndex:
+    def __init__(self, lg):
+        self.players_by_id: dict[int, object] = {}
+        self.team_by_player_id: dict[int, object] = {}
+        self.teams_by_name: dict[str, object] = {}
+        self.teams_by_lower_name: dict[str, object] = {}
+        # Keyed by ESPN proTeam code as it appears on the player ("NO", "GS", ...)
+        self.players_by_pro_team: dict[str, list] = {}
+
+        for team in lg.teams:
+            self.teams_by_name[team.team_name] = team
+            self.teams_by_lower_name[team.team_name.lower()] = team
+            for p in team.roster:
+                self.players_by_id[p.playerId] = p
+                self.team_by_player_id[p.playerId] = team
+                pro = getattr(p, "proTeam", None)
+                if pro:
+                    self.players_by_pro_team.setdefault(pro, []).append(p)
+
+        # Read after walking the teams: a lazy LeagueSession loads (and bumps
+        # its version) on the first .teams access
+        self.version = getattr(lg, "snapshot_version", None)
+
+    def player(self, player_id: int):
+        return self.players_by_id.get(player_id)
+
+    def team_of(self, player_id: int):
+        return self.team_by_player_id.get(player_id)
+
+    def team(self, name: str, case_insensitive: bool = False):
+        if case_insensitive:
+            return self.teams_by_lower_name.get(name.lower())
+        return self.teams_by_name.get(name)
+
+    def players_on_pro_team(self, pro_team: str) -> list:
+        return self.players_by_pro_team.get(pro_team, [])
+
+
+def roster_signature(lg) -> tuple:
+    """Who is on which team in which slot; changes on adds/drops/lineup moves."""
+    return tuple(sorted(
+        (t.team_id, p.playerId, getattr(p, "lineupSlot", None))
+        for t in lg.teams
+        for p in t.roster
+    ))
+
+
+# Weak keys: an index goes away with its league, and a new league can never
+# be handed another (collected) league's index
+_index_cache: "weakref.WeakKeyDictionary[object, LeagueIndex]" = weakref.WeakKeyDictionary()
+_index_lock = threading.Lock()
+
+
+def get_league_index(lg) -> LeagueIndex:
+    """
+    Return the index for `lg`, rebuilding it only when the league's
+    snapshot_version has changed since it was last built. Leagues without a
+    snapshot_version (a bare espn_api League) get a fresh, uncached index
+    each call.
+    """
+    version = getattr(lg, "snapshot_version", None)
+    if version is None:
+        return LeagueIndex(lg)
+    idx = _index_cache.get(lg)
+    if idx is not None and idx.version == version:
+        return idx
+
+    with _index_lock:
+        # Building may trigger a lazy league load, which bumps the version
+        idx = LeagueIndex(lg)
+        if idx.version is not None:
+            _index_cache[lg] = idx
+    return idx
@@ -0,0 +1,156 @@
+# league_registry.py
+"""
+Serve several ESPN fantasy leagues from one process.
+
+Each league gets its own LeagueContext: a lazy LeagueSession (its own
+ESPN cookies and snapshot_version), its own odds ResultCache and its own
+weekly RefinementStore. What doesn't depend on the league stays shared:
+the NBA schedule (nbaTest), the player history file and stat cube, the
+scoring engine and the upstream rate limiters. Leagues are configured via
+FANTASY_LEAGUES (a JSON list, or a path to a JSON file):
+
+    [{"league_id": 538595081, "year": 2026},
+     {"league_id": 123456, "year": 2026, "espn_s2": "...", "swid": "{...}"}]
+
+The default league (fantasy.LEAGUE_ID, what `from fantasy import league`
+gives) is always registered and reuses that session and the shared caches,
+so the un-prefixed endpoints keep working unchanged.
+
+    ctx = registry.get(123456)
+    run_today_matchups(source=ctx.session)
+    registry.memory()   # {league_id: {"league_bytes", "odds_cache_bytes", ...}}
+"""
+
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+
+from fantasy import LEAGUE_ID, LEAGUE_YEAR, LeagueSession, league
+from progressive import RefinementStore, weekly_refinements
+from result_cache import new_odds_cache, odds_cache
+
+# Objects bigger than this many nodes are reported as a lower bound
+MEMORY_WALK_LIMIT = int(os.environ.get("LEAGUE_MEMORY_WALK_LIMIT", "2000000"))
+
+
+def deep_sizeof(obj, seen: set | None = None, limit: int = MEMORY_WALK_LIMIT) -> int:
+    """
+    Approximate retained size of obj in bytes: sys.getsizeof over everything
+    reachable through containers and instance __dict__s, each object counted
+    once. Modules, classes and functions are not followed.
+    """
+    seen = set() if seen is None else seen
+    total = 0
+    stack = [obj]
+    while stack and len(seen) < limit:
+        o = stack.pop()
+        if id(o) in seen or isinstance(o, (type, type(sys), type(deep_sizeof))):
+            continue
+        seen.add(id(o))
+        total += sys.getsizeof(o, 0)
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, (list, tuple, set, frozenset)):
+            stack.extend(o)
+        else:
+            d = getattr(o, "__dict__", None)
+            if d is not None:
+                stack.append(d)
+            for slot in getattr(type(o), "__slots__", ()):
+                if hasattr(o, slot):
+                    stack.append(getattr(o, slot))
+    return total
+
+
+class LeagueContext:
+    def __init__(self, league_id: int, year: int, session: LeagueSession, cache, refinements: RefinementStore,
+                 is_default: bool = False):
+        self.league_id = league_id
+        self.year = year
+        self.session = session
+        self.odds_cache = cache
+        self.weekly_refinements = refinements
+        self.is_default = is_default
+
+    def memory(self) -> dict:
+        seen: set = set()
+        loaded = self.session._league
+        return {
+            "league_id": self.league_id,
+            "year": self.year,
+            "loaded": loaded is not None,
+            "snapshot_version": self.session.snapshot_version,
+            "league_bytes": deep_sizeof(loaded, seen) if loaded is not None else 0,
+            "odds_cache_entries": len(self.odds_cache._entries),
+            "odds_cache_bytes": deep_sizeof(self.odds_cache._entries, seen),
+            "weekly_results": len(self.weekly_refinements._by_id),
+            "weekly_results_bytes": deep_sizeof(self.weekly_refinements._by_id, seen),
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "league_id": self.league_id,
+            "year": self.year,
+            "default": self.is_default,
+            "ready": self.session.is_ready,
+            "snapshot_version": self.session.snapshot_version,
+        }
+
+
+def load_league_configs(raw: str | None = None) -> list[dict]:
+    """Parse FANTASY_LEAGUES (inline JSON or a path to a JSON file)."""
+    raw = raw if raw is not None else os.environ.get("FANTASY_LEAGUES", "")
+    raw = raw.strip()
+    if not raw:
+        return []
+    if not raw.startswith("["):
+        raw = Path(raw).read_text(encoding="utf-8")
+    configs = json.loads(raw)
+    for c in configs:
+        if "league_id" not in c:
+            raise ValueError(f"FANTASY_LEAGUES entry without league_id: {c}")
+    return configs
+
+
+class LeagueRegistry:
+    def __init__(self, configs: list[dict] | None = None):
+        self._lock = threading.Lock()
+        self._contexts: dict[int, LeagueContext] = {
+            LEAGUE_ID: LeagueContext(LEAGUE_ID, LEAGUE_YEAR, league, odds_cache, weekly_refinements, is_default=True),
+        }
+        for c in configs or []:
+            self.add(int(c["league_id"]), int(c.get("year", LEAGUE_YEAR)), c.get("espn_s2"), c.get("swid"))
+
+    def add(self, league_id: int, year: int = LEAGUE_YEAR, espn_s2: str | None = None,
+            swid: str | None = None) -> LeagueContext:
+        with self._lock:
+            ctx = self._contexts.get(league_id)
+            if ctx is None:
+                ctx = self._contexts[league_id] = LeagueContext(
+                    league_id,
+                    year,
+                    LeagueSession(league_id, year, espn_s2=espn_s2, swid=swid),
+                    new_odds_cache(f"odds:{league_id}"),
+                    RefinementStore(f"weekly:{league_id}"),
+                )
+                print(f"[LeagueRegistry] registered league {league_id} ({year})")
+            return ctx
+
+    def get(self, league_id: int) -> LeagueContext | None:
+        return self._contexts.get(league_id)
+
+    @property
+    def default(self) -> LeagueContext:
+        return self._contexts[LEAGUE_ID]
+
+    def contexts(self) -> list[LeagueContext]:
+        return list(self._contexts.values())
+
+    def memory(self) -> dict[int, dict]:
+        return {ctx.league_id: ctx.memory() for ctx in self.contexts()}
+
+
+registry = LeagueRegistry(load_league_configs())
@@ -0,0 +1,235 @@
+# league_snapshot.py
+"""
+Persisted ESPN league snapshots for offline / replay runs.
+
+A snapshot captures everything the simulators read from espn_api:
+teams, rosters, lineup slots, injury flags, pro teams, season averages
+and the current box-score totals. It is written as a small gzipped JSON
+file per scoring period:
+
+    snapshots/espn_<league_id>_<year>_sp<scoring_period>.json.gz
+
+load_snapshot() returns a SnapshotLeague, which quacks like the parts of
+espn_api's League that simulate_matchup / weekly_sim / live_odds use
+(.teams, .box_scores(), .currentMatchupPeriod, .scoringPeriodId,
+.settings.matchup_periods, .year), so it can be passed wherever those
+functions take a `source` league.
+
+CLI:
+    python league_snapshot.py            # save a snapshot of the live league
+    python league_snapshot.py PATH       # print a summary of a saved snapshot
+"""
+
+import gzip
+import json
+import sys
+from datetime import date, datetime, timezone
+from zoneinfo import ZoneInfo
+from pathlib import Path
+from types import SimpleNamespace
+
+# Bump when the on-disk layout changes; load_snapshot refuses newer files
+SNAPSHOT_FORMAT_VERSION = 1
+SNAPSHOT_DIR = Path("snapshots")
+LA = ZoneInfo("America/Los_Angeles")
+
+
+# ─── Capture ──────────────────────────────────────────────────────────────────
+
+def _season_avg(player, year: int) -> float | None:
+    stats = getattr(player, "stats", None) or {}
+    total = stats.get(f"{year}_total")
+    if total is None:
+        for k, v in stats.items():
+            if str(k).endswith("_total"):
+                total = v
+                break
+    if not total:
+        return None
+    try:
+        return float(total.get("applied_avg"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _player_record(player, year: int) -> dict:
+    return {
+        "id": player.playerId,
+        "name": player.name,
+        "pro": getattr(player, "proTeam", None),
+        "slot": getattr(player, "lineupSlot", None),
+        "inj": bool(getattr(player, "injured", False)),
+        "inj_status": getattr(player, "injuryStatus", None),
+        "pts": float(getattr(player, "points", 0.0) or 0.0),
+        "avg": _season_avg(player, year),
+    }
+
+
+def _box_record(box, year: int) -> dict:
+    return {
+        "home": box.home_team.team_id,
+        "away": box.away_team.team_id,
+        "home_score": float(box.home_score or 0.0),
+        "away_score": float(box.away_score or 0.0),
+        "home_lineup": [_player_record(p, year) for p in box.home_lineup],
+        "away_lineup": [_player_record(p, year) for p in box.away_lineup],
+    }
+
+
+def capture_snapshot(lg) -> dict:
+    """Serialize the parts of a live League the simulators depend on."""
+    from upstream_client import espn
+
+    year = lg.year
+    period_boxes = espn.call(lg.box_scores, matchup_total=False)
+    total_boxes = espn.call(lg.box_scores, matchup_total=True, matchup_period=lg.currentMatchupPeriod)
+
+    return {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "captured_at": datetime.now(tz=timezone.utc).isoformat(timespec="seconds"),
+        # The fantasy "today" (LA date) the snapshot belongs to
+        "game_day": datetime.now(tz=timezone.utc).astimezone(LA).date().isoformat(),
+        "league_id": getattr(lg, "league_id", None),
+        "year": year,
+        "scoring_period": lg.scoringPeriodId,
+        "matchup_period": lg.currentMatchupPeriod,
+        "matchup_periods": getattr(lg.settings, "matchup_periods", {}),
+        "teams": [
+            {
+                "id": t.team_id,
+                "name": t.team_name,
+                "logo": t.logo_url,
+                "roster": [_player_record(p, year) for p in t.roster],
+            }
+            for t in lg.teams
+        ],
+        "box_scores": {
+            "period": [_box_record(b, year) for b in period_boxes],
+            "total": [_box_record(b, year) for b in total_boxes],
+        },
+    }
+
+
+def snapshot_path(league_id, year: int, scoring_period: int, directory: Path = SNAPSHOT_DIR) -> Path:
+    return Path(directory) / f"espn_{league_id}_{year}_sp{int(scoring_period):03d}.json.gz"
+
+
+def save_snapshot(lg, directory: Path = SNAPSHOT_DIR) -> Path:
+    """Capture the league and write it to the per-scoring-period file."""
+    snap = capture_snapshot(lg)
+    path = snapshot_path(snap["league_id"], snap["year"], snap["scoring_period"], directory)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with gzip.open(tmp, "wt", encoding="utf-8") as f:
+        json.dump(snap, f, separators=(",", ":"))
+    tmp.replace(path)
+    print(f"[league_snapshot] saved {path} ({path.stat().st_size} bytes)")
+    return path
+
+
+# ─── Replay ───────────────────────────────────────────────────────────────────
+
+def _make_player(rec: dict, year: int) -> SimpleNamespace:
+    stats = {}
+    if rec.get("avg") is not None:
+        stats[f"{year}_total"] = {"applied_avg": rec["avg"]}
+    return SimpleNamespace(
+        playerId=rec["id"],
+        name=rec["name"],
+        proTeam=rec.get("pro"),
+        lineupSlot=rec.get("slot"),
+        injured=rec.get("inj", False),
+        injuryStatus=rec.get("inj_status"),
+        points=rec.get("pts", 0.0),
+        stats=stats,
+    )
+
+
+class SnapshotLeague:
+    """Read-only stand-in for espn_api's League, backed by a snapshot."""
+
+    is_snapshot = True
+    is_ready = True
+
+    def __init__(self, data: dict):
+        version = data.get("format_version")
+        if version is None or version > SNAPSHOT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format version: {version}")
+
+        self.data = data
+        self.league_id = data.get("league_id")
+        self.year = data["year"]
+        self.scoringPeriodId = data["scoring_period"]
+        self.currentMatchupPeriod = data["matchup_period"]
+        self.settings = SimpleNamespace(matchup_periods=data.get("matchup_periods", {}))
+        self.snapshot_version = data["captured_at"]
+        self.game_day = date.fromisoformat(data["game_day"])
+
+        self.teams = []
+        teams_by_id = {}
+        for t in data["teams"]:
+            team = SimpleNamespace(
+                team_id=t["id"],
+                team_name=t["name"],
+                logo_url=t.get("logo", ""),
+                roster=[_make_player(p, self.year) for p in t["roster"]],
+            )
+            self.teams.append(team)
+            teams_by_id[team.team_id] = team
+
+        self._boxes = {
+            kind: [
+                SimpleNamespace(
+                    home_team=teams_by_id[b["home"]],
+                    away_team=teams_by_id[b["away"]],
+                    home_score=b["home_score"],
+                    away_score=b["away_score"],
+                    home_lineup=[_make_player(p, self.year) for p in b["home_lineup"]],
+                    away_lineup=[_make_player(p, self.year) for p in b["away_lineup"]],
+                )
+                for b in boxes
+            ]
+            for kind, boxes in data["box_scores"].items()
+        }
+
+    def box_scores(self, matchup_period: int = None, scoring_period: int = None, matchup_total: bool = True):
+        """
+        Same signature as League.box_scores. Only the snapshot's own
+        scoring period / matchup period were captured.
+        """
+        if matchup_period not in (None, self.currentMatchupPeriod):
+            raise ValueError(f"Snapshot only has matchup period {self.currentMatchupPeriod}, not {matchup_period}")
+        if scoring_period not in (None, self.scoringPeriodId):
+            raise ValueError(f"Snapshot only has scoring period {self.scoringPeriodId}, not {scoring_period}")
+        return list(self._boxes["total" if matchup_total else "period"])
+
+    def warm_up(self) -> "SnapshotLeague":
+        return self
+
+    def __repr__(self):
+        return (f"SnapshotLeague(league_id={self.league_id}, year={self.year}, "
+                f"scoring_period={self.scoringPeriodId}, captured_at={self.snapshot_version})")
+
+
+def load_snapshot(path) -> SnapshotLeague:
+    path = Path(path)
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "rt", encoding="utf-8") as f:
+        return SnapshotLeague(json.load(f))
+
+
+def latest_snapshot_path(directory: Path = SNAPSHOT_DIR) -> Path | None:
+    """Most recent snapshot file in `directory` (by scoring period in the name)."""
+    files = sorted(Path(directory).glob("espn_*_sp*.json.gz"))
+    return files[-1] if files else None
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        snap = load_snapshot(sys.argv[1])
+        print(snap)
+        for t in snap.teams:
+            print(f"  {t.team_name}: {len(t.roster)} players")
+    else:
+        from fantasy import league
+        save_snapshot(league)
@@ -1,18 +1,26 @@
 import json
 import random
+import time
 from datetime import date, datetime, timedelta
 from pathlib import Path
 from typing import Dict, Any
-from time import sleep
 
 from zoneinfo import ZoneInfo
 
+import numpy as np
+
 from fantasy import league  # your ESPN league object
 
 # NEW: use nba_api.live scoreboard instead of HTTP APIs
 from nba_api.live.nba.endpoints import scoreboard as live_scoreboard
 from nba_api.stats.endpoints import BoxScoreTraditionalV2
 
+from scoring import DEFAULT_SCORING, ScoringSettings
+from stat_cube import parse_minutes
+from upstream_client import espn, nba_live, nba_stats
+from league_index import get_league_index
+from metrics import LIVE_GAMES, stage
+
 
 # -----------------------------
 # History loading / distribution
@@ -22,7 +30,7 @@ HISTORY_PATH = Path("fantasy_player_history_2025-26.json")
 
 
 def load_history(path: Path = HISTORY_PATH) -> Dict[str, Any]:
-    with path.open("r", encoding="utf-8") as f:
+    with stage("history_load"), path.open("r", encoding="utf-8") as f:
         return json.load(f)
 
 
@@ -109,6 +117,7 @@ def fetch_nba_live_games() -> dict:
               "gameId": "...",
               "gameStatus": int,          # 1 not started, 2 live, 3 final
               "gameStatusText": "...",
+              "gameDate": "YYYY-MM-DD",  # the scoreboard's game day
               "period": int,             # current period
               "gameClock": "MM:SS" or "",
               "regulationPeriods": int,
@@ -121,10 +130,10 @@ def fetch_nba_live_games() -> dict:
           ]
         }
     """
-    sb = live_scoreboard.ScoreBoard()
-    data = sb.get_dict()
+    data = nba_live.call(lambda: live_scoreboard.ScoreBoard().get_dict())
 
     response = []
+    game_date = data.get("scoreboard", {}).get("gameDate")
     for g in data.get("scoreboard", {}).get("games", []):
         home = g.get("homeTeam", {}) or {}
         away = g.get("awayTeam", {}) or {}
@@ -134,6 +143,7 @@ def fetch_nba_live_games() -> dict:
                 "gameId": g.get("gameId"),
                 "gameStatus": g.get("gameStatus"),
                 "gameStatusText": g.get("gameStatusText"),
+                "gameDate": game_date,
                 "period": g.get("period", 0),
                 "gameClock": g.get("gameClock", ""),
                 "regulationPeriods": g.get("regulationPeriods", 4),
@@ -156,67 +166,103 @@ def fetch_nba_live_games() -> dict:
 # def fetch_nba_live_games_apisports(): ...
 
 
-def compute_game_fraction_from_api_nba(game: dict) -> float:
+REG_PERIOD_MINUTES = 12.0
+OT_PERIOD_MINUTES = 5.0
+
+
+def _parse_game_clock(clock, period_length: float) -> float:
     """
-    Compute fraction of the game completed using the *live scoreboard* structure:
+    Minutes left in the current period from a live scoreboard clock.
+    Accepts "MM:SS" and the ISO form the live feed uses ("PT05:23.00").
+    If there's no clock info, assume halfway through the period.
+    """
+    if isinstance(clock, str) and clock.startswith("PT") and "M" in clock:
+        try:
+            mins, rest = clock[2:].split("M", 1)
+            secs = float(rest.rstrip("S") or 0)
+            return int(mins) + secs / 60.0
+        except ValueError:
+            return period_length / 2.0
 
-        game["gameStatus"]      # 1 not started, 2 in progress, 3 final
-        game["period"]          # current period (1..4, 5+ for OT)
-        game["gameClock"]       # "MM:SS" or ""
-        game["regulationPeriods"]  # usually 4
+    if isinstance(clock, str) and ":" in clock:
+        try:
+            mins, secs = clock.split(":")
+            return int(mins) + int(float(secs)) / 60.0
+        except ValueError:
+            return period_length / 2.0
+
+    return period_length / 2.0
 
-    We'll treat regulation periods as 12 minutes each, and OT as 5 minutes.
-    This doesn't need to be perfect, just "good enough" for your sim.
+
+def compute_game_minutes_from_api_nba(game: dict) -> tuple[float, float]:
+    """
+    Return (minutes_elapsed, minutes_remaining) for a live scoreboard game.
+
+    Regulation periods are 12 minutes and OT periods 5. Once a game is in
+    OT the remaining time is whatever is left on the OT clock, so the
+    total grows with each extra period instead of overflowing 48.
     """
-    status = int(game.get("gameStatus", 0))
+    status = int(game.get("gameStatus", 0) or 0)
+    total_reg_periods = int(game.get("regulationPeriods") or 4)
+    reg_minutes = total_reg_periods * REG_PERIOD_MINUTES
 
     # 1 = not started, 3 = final
     if status == 1:
-        return 0.0
-    if status == 3:
-        return 1.0
+        return 0.0, reg_minutes
 
     period = int(game.get("period") or 1)
-    clock = game.get("gameClock") or ""
-    total_reg_periods = int(game.get("regulationPeriods") or 4)
+    completed_reg_periods = max(0, min(period - 1, total_reg_periods))
+    completed_ot_periods = max(0, (period - 1) - total_reg_periods)
+    minutes_before = (
+        completed_reg_periods * REG_PERIOD_MINUTES
+        + completed_ot_periods * OT_PERIOD_MINUTES
+    )
 
-    # Basic lengths
-    REG_MIN = 12.0
-    OT_MIN = 5.0
+    if status == 3:
+        # Final: everything played so far, nothing left
+        in_ot = period > total_reg_periods
+        last_length = OT_PERIOD_MINUTES if in_ot else REG_PERIOD_MINUTES
+        return max(reg_minutes, minutes_before + last_length), 0.0
 
-    # total regulation minutes (we don't know how many OT we'll get ahead of time)
-    total_minutes = total_reg_periods * REG_MIN
+    period_length = REG_PERIOD_MINUTES if period <= total_reg_periods else OT_PERIOD_MINUTES
+    minutes_left_in_period = _parse_game_clock(game.get("gameClock") or "", period_length)
+    minutes_left_in_period = max(0.0, min(period_length, minutes_left_in_period))
 
-    # Parse clock "MM:SS"
-    if isinstance(clock, str) and ":" in clock:
-        try:
-            mins, secs = clock.split(":")
-            mins = int(mins)
-            secs = int(secs)
-            minutes_left_in_period = mins + secs / 60.0
-        except Exception:
-            minutes_left_in_period = REG_MIN / 2.0
-    else:
-        # If there's no clock info, assume halfway through the current period
-        minutes_left_in_period = REG_MIN / 2.0
+    minutes_elapsed = minutes_before + (period_length - minutes_left_in_period)
 
-    # Determine length of current period (reg vs OT)
     if period <= total_reg_periods:
-        period_length = REG_MIN
+        minutes_remaining = reg_minutes - minutes_elapsed
     else:
-        period_length = OT_MIN
+        minutes_remaining = minutes_left_in_period
 
-    # Minutes before this period
-    completed_reg_periods = max(0, min(period - 1, total_reg_periods))
-    completed_ot_periods = max(0, (period - 1) - total_reg_periods)
+    return minutes_elapsed, max(0.0, minutes_remaining)
 
-    minutes_before = completed_reg_periods * REG_MIN + completed_ot_periods * OT_MIN
-    minutes_elapsed = minutes_before + (period_length - minutes_left_in_period)
 
-    frac = minutes_elapsed / total_minutes
+def compute_game_fraction_from_api_nba(game: dict) -> float:
+    """
+    Compute fraction of the game completed using the *live scoreboard* structure:
 
-    # Clamp to [0, 1] so OT doesn't blow it up too badly
-    return max(0.0, min(1.0, frac))
+        game["gameStatus"]      # 1 not started, 2 in progress, 3 final
+        game["period"]          # current period (1..4, 5+ for OT)
+        game["gameClock"]       # "MM:SS" / "PT05:23.00" or ""
+        game["regulationPeriods"]  # usually 4
+
+    In OT the denominator includes the OT periods played so far, so the
+    fraction keeps moving toward 1.0 instead of sticking there until final.
+    """
+    status = int(game.get("gameStatus", 0) or 0)
+
+    # 1 = not started, 3 = final
+    if status == 1:
+        return 0.0
+    if status == 3:
+        return 1.0
+
+    elapsed, remaining = compute_game_minutes_from_api_nba(game)
+    total = elapsed + remaining
+    if total <= 0:
+        return 0.0
+    return max(0.0, min(1.0, elapsed / total))
 
 
 def get_game_row(games_df, game_id: str):
@@ -276,73 +322,77 @@ def player_has_game_today(player, team_to_game_map: Dict[str, str]) -> bool:
 # Boxscore → fantasy points
 # -----------------------------
 
-def get_player_partial_boxscore(game_id: str, nba_player_id: int):
+# Game-level box score cache: one BoxScoreTraditionalV2 fetch serves every
+# rostered player in that game. Entries for live games expire after a short
+# TTL; once a game is final its box score never changes, so we keep it.
+BOXSCORE_LIVE_TTL_SECONDS = 30.0
+
+_boxscore_cache: dict[str, dict] = {}
+
+
+def _boxscore_entry_fresh(entry: dict) -> bool:
+    if entry["final"]:
+        return True
+    return (time.time() - entry["fetched_at"]) < BOXSCORE_LIVE_TTL_SECONDS
+
+
+def get_game_boxscore(game_id: str, game_status: int | None = None) -> dict[int, dict]:
     """
-    Fetch the partial boxscore row for a given player in a given game.
+    Return {PLAYER_ID: stat row} for every player in a game.
+
+    game_status is the live scoreboard status (1 not started, 2 live, 3 final).
+    Final games are cached permanently; anything else is refetched after
+    BOXSCORE_LIVE_TTL_SECONDS.
     """
-    sleep(2)  # avoid nba_api rate limiting
-    box = BoxScoreTraditionalV2(game_id=game_id)
-    stats_df = box.player_stats.get_data_frame()
-    row = stats_df[stats_df["PLAYER_ID"] == nba_player_id]
-    if row.empty:
-        return None
-    return row.iloc[0]
+    entry = _boxscore_cache.get(game_id)
+    final = game_status == 3
 
+    if entry is not None and (entry["final"] or not final) and _boxscore_entry_fresh(entry):
+        return entry["rows"]
 
-def compute_fantasy_from_stat_row(row) -> float:
-    """
-    Compute fantasy points from a BoxScoreTraditionalV2 row
-    using your league’s scoring settings.
-    """
-    pts = row["PTS"]
-    reb = row["REB"]
-    ast = row["AST"]
-    stl = row["STL"]
-    blk = row["BLK"]
-    tov = row["TOV"]
-    fgm = row["FGM"]
-    ftm = row["FTM"]
-    fta = row["FTA"]
-    tpm = row["FG3M"]
-
-    # Compute double / triple / quad doubles based on 5 main counting stats
-    cat_vals = [
-        pts,
-        reb,
-        ast,
-        stl,
-        blk,
-    ]
-    double_cats = sum(1 for v in cat_vals if v >= 10)
+    stats_df = nba_stats.call(
+        lambda: BoxScoreTraditionalV2(game_id=game_id).player_stats.get_data_frame()
+    )
 
-    dd = 1 if double_cats >= 2 else 0
-    td = 1 if double_cats >= 3 else 0
-    qd = 1 if double_cats >= 4 else 0
+    rows = {int(r["PLAYER_ID"]): r for r in stats_df.to_dict("records")}
+    _boxscore_cache[game_id] = {
+        "rows": rows,
+        "fetched_at": time.time(),
+        "final": final,
+    }
+    return rows
 
-    score = 0
-    score += fgm * 2           # Field Goals Made (FGM) 2
-    score += ftm * 1           # Free Throws Made (FTM) 1
-    score += fta * -1          # Free Throws Attempted (FTA) -1
-    score += tpm * 1           # Three Pointers Made (3PM) 1
-    score += reb * 1           # Rebounds (REB) 1
-    score += ast * 2           # Assists (AST) 2
-    score += stl * 4           # Steals (STL) 4
-    score += blk * 4           # Blocks (BLK) 4
-    score += tov * -2          # Turnovers (TO) -2
-    score += dd * 5            # Double Doubles (DD) 5
-    score += td * 8            # Triple Doubles (TD) 8
-    score += qd * 13           # Quadruple Doubles (QD) 13
-    score += pts * 1           # Points (PTS) 1
 
-    return float(score)
+def clear_boxscore_cache() -> None:
+    _boxscore_cache.clear()
 
 
-def build_fantasy_points_map() -> dict[int, float]:
+def get_player_partial_boxscore(game_id: str, nba_player_id: int, game_status: int | None = None):
+    """
+    Fetch the partial boxscore row for a given player in a given game.
+    Served from the game-level cache, so repeated calls for players in the
+    same game share one fetch.
+    """
+    rows = get_game_boxscore(game_id, game_status=game_status)
+    return rows.get(int(nba_player_id))
+
+
+def compute_fantasy_from_stat_row(row, scoring: ScoringSettings | None = None) -> float:
+    """
+    Compute fantasy points from a BoxScoreTraditionalV2 row
+    using your league’s scoring settings (scoring.DEFAULT_SCORING unless
+    given, e.g. ScoringSettings.from_espn_league(league)).
+    """
+    return (scoring or DEFAULT_SCORING).score_one(row)
+
+
+def build_fantasy_points_map(source=None) -> dict[int, float]:
     """
     Build a dict of ESPN playerId -> current fantasy points from ESPN box scores.
     """
+    lg = source if source is not None else league
     points_map: dict[int, float] = {}
-    box_scores = league.box_scores(matchup_total=True)
+    box_scores = espn.call(lg.box_scores, matchup_total=True)
 
     for box in box_scores:
         for p in box.home_lineup + box.away_lineup:
@@ -353,69 +403,148 @@ def build_fantasy_points_map() -> dict[int, float]:
     return points_map
 
 
+LIVE_PROJECTION_MODES = ("linear", "statline")
+
+
+def _box_stat(row, key: str) -> float:
+    val = row.get(key) if row is not None else None
+    try:
+        val = float(val)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if val != val else val
+
+
 def build_live_state_for_league(
     history_map: dict[str, dict],
     game_day: date | None = None,
+    mode: str = "linear",
+    source=None,
 ) -> dict[int, dict]:
     """
-    Use live NBA scoreboard to see which teams have live games and
-    ESPN's own box_scores to get current fantasy points.
+    Use live NBA scoreboard to see which teams have live or finished games
+    today and ESPN's own box_scores to get current fantasy points. Players
+    whose game is final get fraction_done 1.0, so they score exactly their
+    actual points; players whose game hasn't started are left out.
 
     Returns: dict[espn_player_id] = {
         "has_game_today": True,
         "fraction_done": float (0..1),
         "fantasy_points_so_far": float,
+        "minutes_elapsed": float,      # game clock minutes played so far
+        "minutes_remaining": float,    # OT-aware
+        "period": int,
+        "game_status": int,            # 2 in progress, 3 final
     }
-    """
-    team_frac = build_live_team_fraction_map()
-    points_map = build_fantasy_points_map()
 
-    live_state: dict[int, dict] = {}
+    With mode="statline" each live game's box score is fetched once and
+    players we can map to an NBA id also get a "stat_line" entry
+    ({"MIN", "PF", "FGA", "FTA", "TOV"}) for project_live_rest_of_game().
+    Final games have nothing left to project, so they get no stat line.
 
-    for team in league.teams:
-        for p in team.roster:
-            raw_team = getattr(p, "proTeam", None)
-            nba_team = map_pro_team_to_nba(raw_team)
+    source is the league to read rosters from (default: the live ESPN
+    league). Snapshots carry no live NBA state, so they yield {}.
+    """
+    lg = source if source is not None else league
+    if getattr(lg, "is_snapshot", False):
+        print("[build_live_state_for_league] snapshot source: no live state")
+        return {}
 
-            if not nba_team:
-                continue
+    if isinstance(game_day, datetime):
+        game_day = game_day.date()
+    day_iso = game_day.isoformat() if game_day is not None else None
 
-            info = team_frac.get(nba_team.upper())
-            if not info:
-                # this team is not currently in a live game
-                continue
-            if info.get("status") != 2:
-                # not live (1 = not started, 3 = final)
-                continue
+    team_frac = build_live_team_fraction_map()
+    points_map = build_fantasy_points_map(lg)
 
-            frac = info.get("fraction", 0.0)
+    live_state: dict[int, dict] = {}
+    idx = get_league_index(lg)
+
+    # Walk NBA teams (30) rather than every rostered player
+    for raw_team, players in idx.players_by_pro_team.items():
+        nba_team = map_pro_team_to_nba(raw_team)
+
+        if not nba_team:
+            continue
+
+        info = team_frac.get(nba_team.upper())
+        if not info:
+            # this team is not currently in a live game
+            continue
+        status = info.get("status")
+        if status not in (2, 3):
+            # not started: drawn from history like any other day
+            continue
+        if status == 3 and day_iso and info.get("game_date") not in (None, day_iso):
+            # the scoreboard still shows an earlier day's final
+            continue
+
+        # Final games are kept with their actual points and nothing left
+        frac = 1.0 if status == 3 else info.get("fraction", 0.0)
+
+        for p in players:
             fp_so_far = points_map.get(p.playerId, 0.0)
 
             live_state[p.playerId] = {
                 "has_game_today": True,
                 "fraction_done": frac,
                 "fantasy_points_so_far": fp_so_far,
+                "minutes_elapsed": info.get("minutes_elapsed", 0.0),
+                "minutes_remaining": info.get("minutes_remaining", 0.0),
+                "period": info.get("period", 0),
+                "game_id": info.get("game_id"),
+                "game_status": status,
             }
 
-    print(f"[build_live_state_for_league] live_state players: {len(live_state)}")
+    if mode == "statline":
+        attach_live_stat_lines(live_state, history_map)
+
+    print(f"[build_live_state_for_league] live_state players: {len(live_state)} (mode={mode})")
     return live_state
 
 
+def attach_live_stat_lines(live_state: dict[int, dict], history_map: dict[str, dict]) -> None:
+    """
+    Add each live player's box score line to their live_state entry.
+    Box scores come from the game-level cache, so this is one fetch per
+    live game per poll regardless of how many rostered players are in it.
+    """
+    for pid, state in live_state.items():
+        game_id = state.get("game_id")
+        nba_id = (history_map.get(str(pid)) or {}).get("nba_player_id")
+        if not game_id or not nba_id or state.get("game_status") == 3:
+            continue
+
+        try:
+            rows = get_game_boxscore(game_id, game_status=state.get("game_status"))
+        except Exception as e:
+            print(f"[attach_live_stat_lines] box score fetch failed for {game_id}: {e}")
+            continue
+
+        row = rows.get(int(nba_id))
+        state["stat_line"] = {
+            "MIN": parse_minutes(row.get("MIN") if row is not None else None),
+            "PF": _box_stat(row, "PF"),
+            "FGA": _box_stat(row, "FGA"),
+            "FTA": _box_stat(row, "FTA"),
+            "TOV": _box_stat(row, "TOV"),
+        }
+
+
 def build_live_team_fraction_map() -> dict[str, float]:
     """
     Returns a dict keyed by team code for games returned by the live scoreboard:
-      {"NOP": {"fraction": 0.42, "status": 2}, ...}
+      {"NOP": {"fraction": 0.42, "status": 2, "game_id": "0022500123"}, ...}
     We only treat status==2 as live; status 1 = not started, 3 = final.
     """
     data = fetch_nba_live_games()
     games = data.get("response", []) or []
     team_frac: dict[str, dict] = {}
 
-    print(f"[build_live_team_fraction_map] live games count: {len(games)}")
-
     for g in games:
         status = int(g.get("gameStatus", 0) or 0)
         frac = compute_game_fraction_from_api_nba(g)
+        minutes_elapsed, minutes_remaining = compute_game_minutes_from_api_nba(g)
 
         teams = g.get("teams", {}) or {}
         home = teams.get("home", {}) or {}
@@ -424,12 +553,22 @@ def build_live_team_fraction_map() -> dict[str, float]:
         home_code = home.get("code")
         away_code = away.get("code")
 
+        info = {
+            "fraction": frac,
+            "status": status,
+            "game_id": g.get("gameId"),
+            "game_date": g.get("gameDate"),
+            "period": int(g.get("period") or 0),
+            "minutes_elapsed": minutes_elapsed,
+            "minutes_remaining": minutes_remaining,
+        }
         if home_code:
-            team_frac[home_code.upper()] = {"fraction": frac, "status": status}
+            team_frac[home_code.upper()] = info
         if away_code:
-            team_frac[away_code.upper()] = {"fraction": frac, "status": status}
+            team_frac[away_code.upper()] = info
 
-    print("[build_live_team_fraction_map] team_frac:", team_frac)
+    for status in (1, 2, 3):
+        LIVE_GAMES.set(sum(1 for g in games if int(g.get("gameStatus", 0) or 0) == status), status=status)
     return team_frac
 
 
@@ -441,10 +580,12 @@ def simulate_player_tonight_linear(
     player,
     history_map: Dict[str, Any],
     live_state: Dict[int, Dict[str, Any]],
+    rng=None,
 ) -> float:
     """
     Simulate this player's final fantasy score for tonight,
     using the "linear scoring / return-to-mean for the rest of game" assumption.
+    rng is a random.Random to draw from (default: the module-level generator).
 
     - If no game today → returns 0.0
     - If game not started → draws a full-game from history (same as before)
@@ -469,7 +610,7 @@ def simulate_player_tonight_linear(
         return P_curr
 
     # Sample a full-game score from historical distribution
-    F = random.choice(dist)
+    F = (rng or random).choice(dist)
 
     # Assume scoring is linear through the game:
     # rest-of-game points = F * fraction_of_game_remaining
@@ -478,6 +619,119 @@ def simulate_player_tonight_linear(
     return P_curr + rest_points
 
 
+# -----------------------------
+# Stat-line aware rest-of-game projection
+# -----------------------------
+
+# Weight on in-game pace grows with minutes played: w = MIN / (MIN + prior)
+PACE_PRIOR_MINUTES = 12.0
+# Pace vs. season average is clipped so one hot quarter doesn't run away
+PACE_RATIO_MIN = 0.5
+PACE_RATIO_MAX = 1.5
+# No minutes by halftime → most likely a DNP/coach's decision
+DNP_ELAPSED_MINUTES = 24.0
+DNP_REMAINING_FACTOR = 0.1
+# Share of remaining minutes kept under foul trouble
+FOULED_OUT = 6
+FIVE_FOULS_FACTOR = 0.75
+EARLY_FOUL_TROUBLE_FACTOR = 0.85
+
+
+def _foul_factor(pf: np.ndarray, period: np.ndarray) -> np.ndarray:
+    """
+    Fraction of remaining minutes we expect a player to keep given fouls.
+    'Early' trouble is the usual coaching rule: 2 in Q1, 3 in Q2, 4 in Q3.
+    """
+    factor = np.ones_like(pf, dtype=float)
+    early = (period >= 1) & (period <= 3) & (pf >= period + 1)
+    factor[early] = EARLY_FOUL_TROUBLE_FACTOR
+    factor[pf >= 5] = FIVE_FOULS_FACTOR
+    factor[pf >= FOULED_OUT] = 0.0
+    return factor
+
+
+def project_live_rest_of_game(
+    players,
+    history_map: Dict[str, Any],
+    live_state: Dict[int, Dict[str, Any]],
+    trials: int,
+    rng: np.random.Generator | None = None,
+) -> Dict[int, np.ndarray]:
+    """
+    Vectorized live projection for every live player in `players`.
+
+    Returns {espn_player_id: array of `trials` final-tonight scores}.
+
+    Each draw is P_curr + F * remaining_frac * adj * fouls, where F is a
+    full-game sample from history and remaining_frac is OT-aware. When the
+    player has a box score line (mode="statline"):
+      - adj blends 1.0 with their fantasy pace vs. season average so far,
+        weighted by minutes played (pace tracks both usage and role)
+      - players with 0 minutes past halftime are treated as likely DNPs
+      - fouls scale down the minutes we expect them to keep
+    Without a stat line adj = fouls = 1, i.e. the linear model.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+
+    live = []
+    for p in players:
+        state = live_state.get(p.playerId)
+        if state and state.get("has_game_today", False):
+            live.append((p, state))
+
+    draws: Dict[int, np.ndarray] = {}
+    if not live:
+        return draws
+
+    reg_minutes = 4 * REG_PERIOD_MINUTES
+
+    dists = [player_fp_distribution(p, history_map) or [] for p, _ in live]
+    lengths = np.array([len(d) for d in dists])
+    padded = np.zeros((len(live), max(1, lengths.max())), dtype=float)
+    for i, d in enumerate(dists):
+        padded[i, : len(d)] = d
+
+    p_curr = np.array([float(st["fantasy_points_so_far"]) for _, st in live])
+    elapsed = np.array([
+        float(st.get("minutes_elapsed", float(st["fraction_done"]) * reg_minutes)) for _, st in live
+    ])
+    remaining = np.array([
+        float(st.get("minutes_remaining", max(0.0, 1.0 - float(st["fraction_done"])) * reg_minutes))
+        for _, st in live
+    ])
+    period = np.array([int(st.get("period") or 0) for _, st in live])
+
+    has_line = np.array([bool(st.get("stat_line")) for _, st in live])
+    box_min = np.array([float((st.get("stat_line") or {}).get("MIN", 0.0)) for _, st in live])
+    box_pf = np.array([float((st.get("stat_line") or {}).get("PF", 0.0)) for _, st in live])
+
+    # Sample one full-game score per player per trial
+    idx = (rng.random((len(live), trials)) * np.maximum(lengths, 1)[:, None]).astype(int)
+    F = np.take_along_axis(padded, idx, axis=1)
+
+    mean_f = np.divide(
+        padded.sum(axis=1), lengths, out=np.zeros(len(live)), where=lengths > 0
+    )
+    expected_so_far = mean_f * (elapsed / reg_minutes)
+    pace = np.divide(p_curr, expected_so_far, out=np.ones(len(live)), where=expected_so_far > 0)
+    pace = np.clip(pace, PACE_RATIO_MIN, PACE_RATIO_MAX)
+
+    w = box_min / (box_min + PACE_PRIOR_MINUTES)
+    adj = (1.0 - w) + w * pace
+    adj[(box_min <= 0) & (elapsed >= DNP_ELAPSED_MINUTES)] = DNP_REMAINING_FACTOR
+    adj = np.where(has_line, adj, 1.0)
+    fouls = np.where(has_line, _foul_factor(box_pf, period), 1.0)
+
+    scale = (remaining / reg_minutes) * adj * fouls
+    scale[lengths == 0] = 0.0  # no history → finish with what they have
+
+    final = p_curr[:, None] + F * scale[:, None]
+    for i, (p, _) in enumerate(live):
+        draws[p.playerId] = final[i]
+    return draws
+
+
 def team_live_score_today(team, history_map: Dict[str, Any], live_state: Dict[int, Dict[str, Any]]) -> float:
     """
     Sum simulated *tonight's* fantasy points for all players on this fantasy team.
@@ -559,7 +813,7 @@ def find_matchup_box(team_name_a: str, team_name_b: str):
     """
     Find the current box score object for a given pair of team names.
     """
-    for box in league.box_scores(matchup_total=True):
+    for box in espn.call(league.box_scores, matchup_total=True):
         h = box.home_team.team_name
         a = box.away_team.team_name
         if {h, a} == {team_name_a, team_name_b}:
@@ -0,0 +1,118 @@
+# load_test.py
+"""
+Concurrent load harness for api_server.
+
+Drives /odds/today, /odds/weekly and /odds/custom at a fixed concurrency
+and reports per-endpoint p50/p95/p99 latency, error counts and throughput.
+Intended to run against a server wired to upstream_standin.py so ESPN and
+stats.nba.com are never hit:
+
+    python upstream_standin.py serve --latency-ms 100 &
+    UPSTREAM_STANDIN_URL=http://127.0.0.1:8900 uvicorn api_server:app --port 8000 &
+    python load_test.py --concurrency 16 --requests 300 \\
+        --team1 "Team Burnett" --team2 "DominAYTON"
+"""
+
+import argparse
+import itertools
+import json
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+
+def percentile(sorted_vals: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already-sorted list."""
+    if not sorted_vals:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_vals)))
+    return sorted_vals[min(rank, len(sorted_vals)) - 1]
+
+
+def build_targets(args) -> list[tuple[str, str]]:
+    targets = []
+    for ep in args.endpoints.split(","):
+        ep = ep.strip()
+        params = {"trials": args.trials}
+        if ep == "custom":
+            if not (args.team1 and args.team2):
+                raise SystemExit("--team1/--team2 are required for the custom endpoint")
+            params.update(team1=args.team1, team2=args.team2)
+        targets.append((ep, f"{args.base_url.rstrip('/')}/odds/{ep}?{urlencode(params)}"))
+    return targets
+
+
+def run(args) -> dict:
+    targets = build_targets(args)
+    plan = itertools.islice(itertools.cycle(targets), args.requests)
+
+    lock = threading.Lock()
+    latencies: dict[str, list[float]] = {name: [] for name, _ in targets}
+    errors: dict[str, int] = {name: 0 for name, _ in targets}
+
+    def hit(target):
+        name, url = target
+        t0 = time.perf_counter()
+        ok = True
+        try:
+            with urlopen(url, timeout=args.timeout) as resp:
+                resp.read()
+        except (HTTPError, URLError, TimeoutError, OSError):
+            ok = False
+        elapsed = time.perf_counter() - t0
+        with lock:
+            latencies[name].append(elapsed)
+            if not ok:
+                errors[name] += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(hit, plan))
+    wall = time.perf_counter() - start
+
+    report = {"concurrency": args.concurrency, "wall_seconds": round(wall, 3), "endpoints": {}}
+    total = 0
+    for name, vals in latencies.items():
+        vals.sort()
+        total += len(vals)
+        report["endpoints"][name] = {
+            "requests": len(vals),
+            "errors": errors[name],
+            "p50_ms": round(percentile(vals, 50) * 1000, 1),
+            "p95_ms": round(percentile(vals, 95) * 1000, 1),
+            "p99_ms": round(percentile(vals, 99) * 1000, 1),
+            "max_ms": round((vals[-1] if vals else 0.0) * 1000, 1),
+        }
+    report["requests"] = total
+    report["throughput_rps"] = round(total / wall, 2) if wall > 0 else 0.0
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test the odds API")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--endpoints", default="today,weekly,custom",
+                        help="comma-separated subset of today,weekly,custom")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=100, help="total requests across endpoints")
+    parser.add_argument("--trials", type=int, default=2000)
+    parser.add_argument("--team1")
+    parser.add_argument("--team2")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--json", action="store_true", help="print the raw JSON report")
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{report['requests']} requests in {report['wall_seconds']}s "
+              f"@ concurrency {report['concurrency']} → {report['throughput_rps']} req/s")
+        print(f"{'endpoint':10} {'n':>6} {'err':>5} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+        for name, r in report["endpoints"].items():
+            print(f"{name:10} {r['requests']:6d} {r['errors']:5d} {r['p50_ms']:8.1f}ms "
+                  f"{r['p95_ms']:8.1f}ms {r['p99_ms']:8.1f}ms {r['max_ms']:8.1f}ms")
@@ -0,0 +1,213 @@
+# metrics.py
+"""
+Process-wide counters and histograms, rendered in the Prometheus text
+exposition format at /metrics.
+
+    from metrics import stage, count_trials
+
+    with stage("history_load"):
+        hist = load_history()
+    count_trials("weekly", trials, seconds)
+
+Recording is a dict lookup plus a few additions under a lock; nothing is
+formatted until somebody scrapes. Values that already live elsewhere
+(e.g. ResultCache.stats) are read at scrape time via register_collector().
+
+Pipeline stages recorded in fantasy_stage_seconds:
+  espn_fetch, scoreboard_fetch, nba_stats_fetch  (upstream_client calls)
+  history_load, entry_building, simulation, serialization
+"""
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _label_str(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help, labelnames=()):
+        super().__init__(name, help, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_label_str(self.labelnames, k)} {_fmt(v)}" for k, v in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts..., +Inf count], sum
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][i] += 1
+            entry[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = sorted((k, (list(v[0]), v[1])) for k, v in self._values.items())
+        lines = self.header()
+        for key, (counts, total) in items:
+            running = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                running += n
+                le = _label_str(self.labelnames, key, f'le="{_fmt(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {running}")
+            labels = _label_str(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_fmt(total)}")
+            lines.append(f"{self.name}_count{labels} {running}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: list[_Metric] = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, fn):
+        """fn() -> list of exposition lines, called at scrape time."""
+        self._collectors.append(fn)
+        return fn
+
+    def render(self) -> str:
+        lines = []
+        for m in self._metrics:
+            lines.extend(m.render())
+        for fn in self._collectors:
+            try:
+                lines.extend(fn())
+            except Exception as e:
+                print(f"[Registry.render] collector {getattr(fn, '__name__', fn)} failed: {e}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "fantasy_stage_seconds", "Time spent per pipeline stage", ("stage",),
+))
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "fantasy_http_request_seconds", "API request latency", ("method", "route", "status"),
+))
+UPSTREAM_RETRIES = REGISTRY.register(Counter(
+    "fantasy_upstream_retries_total", "Upstream calls retried after an error", ("upstream",),
+))
+SIM_TRIALS = REGISTRY.register(Counter(
+    "fantasy_sim_trials_total", "Monte Carlo trials run", ("kind",),
+))
+SIM_TRIALS_PER_SECOND = REGISTRY.register(Gauge(
+    "fantasy_sim_trials_per_second", "Throughput of the most recent simulation", ("kind",),
+))
+
+LIVE_GAMES = REGISTRY.register(Gauge(
+    "fantasy_live_games", "Games on today's scoreboard by status (1 scheduled, 2 live, 3 final)", ("status",),
+))
+
+
+def stage(name: str):
+    """Context manager timing one pipeline stage."""
+    return STAGE_SECONDS.time(stage=name)
+
+
+def count_trials(kind: str, trials: int, seconds: float):
+    SIM_TRIALS.inc(trials, kind=kind)
+    if seconds > 0:
+        SIM_TRIALS_PER_SECOND.set(trials / seconds, kind=kind)
+
+
+_CACHES = []
+
+
+def register_cache(cache):
+    """Expose a ResultCache's hit / stale / miss / coalesced / error counts."""
+    _CACHES.append(cache)
+
+
+@REGISTRY.register_collector
+def _collect_caches():
+    lines = [
+        "# HELP fantasy_cache_requests_total Result cache lookups by outcome",
+        "# TYPE fantasy_cache_requests_total counter",
+    ]
+    for cache in _CACHES:
+        for status, n in sorted(cache.stats.items()):
+            lines.append(f'fantasy_cache_requests_total{{cache="{_escape(cache.name)}",status="{status}"}} {n}')
+    return lines
+
+
+def render() -> str:
+    return REGISTRY.render()
@@ -1,11 +1,14 @@
 import os
 import json
+from bisect import bisect_right
 from datetime import datetime, date
 from zoneinfo import ZoneInfo
 from typing import Set, Optional, Union
 
 from nba_api.live.nba.endpoints import scoreboard as live_scoreboard
 
+from upstream_client import nba_live
+
 
 team_name_mapping = {
     'ATL': 'Atlanta Hawks', 'BOS': 'Boston Celtics', 'BKN': 'Brooklyn Nets', 'CHA': 'Charlotte Hornets',
@@ -30,6 +33,9 @@ TEAM_CODE_CANON = {
     "GSW": "GSW",
     "SA": "SAS",
     "SAS": "SAS",
+    "NY": "NYK",
+    "UTAH": "UTA",
+    "WSH": "WAS",
     # add more aliases here if you bump into them
 }
 
@@ -73,8 +79,7 @@ def fetch_nba_live_games() -> dict:
         }
     """
     print("[fetch_nba_live_games] API call to nba_api.live scoreboard")
-    games = live_scoreboard.ScoreBoard()
-    data = games.get_dict()
+    data = nba_live.call(lambda: live_scoreboard.ScoreBoard().get_dict())
 
     response = []
     for g in data.get("scoreboard", {}).get("games", []):
@@ -122,6 +127,74 @@ def fetch_nba_schedule(path: str | None = None) -> dict:
 SCHEDULE_DATA = fetch_nba_schedule()
 
 
+def _schedule_game_date(game: dict) -> Optional[date]:
+    # You chose EST before because UTC in this file had some weird edge cases.
+    game_utc = game.get("gameDateEST") or game.get("gameDateUTC") or ""
+    if not game_utc:
+        return None
+    try:
+        # gameDateEST looks like "2025-12-12T00:00:00Z"
+        return datetime.fromisoformat(game_utc.replace("Z", "+00:00")).date()
+    except ValueError:
+        return None
+
+
+class ScheduleIndex:
+    """
+    The schedule JSON bucketed once into per-date and per-team lookups:
+
+        teams_by_date[date] -> {"MEM", "UTA", ...}
+        dates_by_team["MEM"] -> sorted list of game dates
+        regular_season_start -> first regular-season game date
+    """
+
+    def __init__(self, schedule: dict):
+        self.teams_by_date: dict[date, Set[str]] = {}
+        dates_by_team: dict[str, Set[date]] = {}
+        self.regular_season_start: Optional[date] = None
+
+        for date_bucket in schedule.get("leagueSchedule", {}).get("gameDates", []):
+            for game in date_bucket.get("games", []):
+                game_date = _schedule_game_date(game)
+                if game_date is None:
+                    continue
+                # Regular-season game ids start with "002" (preseason "001")
+                if str(game.get("gameId", "")).startswith("002") and (
+                    self.regular_season_start is None or game_date < self.regular_season_start
+                ):
+                    self.regular_season_start = game_date
+                for side in ("homeTeam", "awayTeam"):
+                    tri = (game.get(side, {}) or {}).get("teamTricode")
+                    if tri:
+                        tri = tri.upper()
+                        self.teams_by_date.setdefault(game_date, set()).add(tri)
+                        dates_by_team.setdefault(tri, set()).add(game_date)
+
+        self.dates_by_team: dict[str, list[date]] = {t: sorted(ds) for t, ds in dates_by_team.items()}
+
+    def teams_on(self, game_day: date) -> Set[str]:
+        return set(self.teams_by_date.get(game_day, ()))
+
+    def last_game_on_or_before(self, team: Optional[str], day: date) -> Optional[date]:
+        """Most recent scheduled game date for `team` that is <= day."""
+        dates = self.dates_by_team.get(canonical_team(team) or "", [])
+        i = bisect_right(dates, day)
+        return dates[i - 1] if i else None
+
+
+_schedule_indexes: dict[int, ScheduleIndex] = {}
+
+
+def get_schedule_index(schedule: Optional[dict] = None) -> ScheduleIndex:
+    """Index for `schedule` (default SCHEDULE_DATA), built once per schedule dict."""
+    if schedule is None:
+        schedule = SCHEDULE_DATA
+    idx = _schedule_indexes.get(id(schedule))
+    if idx is None:
+        idx = _schedule_indexes[id(schedule)] = ScheduleIndex(schedule)
+    return idx
+
+
 # ---------------------------------------------------------------------------
 # Public helpers
 # ---------------------------------------------------------------------------
@@ -143,41 +216,8 @@ def teams_playing_on(
     if isinstance(game_day, datetime):
         game_day = game_day.date()
 
-    if schedule is None:
-        schedule = SCHEDULE_DATA
-
-    playing: Set[str] = set()
-    league_sched = schedule.get("leagueSchedule", {})
-
     # --- 1) Try local JSON schedule ---
-    for date_bucket in league_sched.get("gameDates", []):
-        for game in date_bucket.get("games", []):
-            # You chose EST before because UTC in this file had some weird edge cases.
-            game_utc = game.get("gameDateEST") or game.get("gameDateUTC") or ""
-            if not game_utc:
-                continue
-
-            try:
-                # gameDateEST looks like "2025-12-12T00:00:00Z"
-                game_date = datetime.fromisoformat(
-                    game_utc.replace("Z", "+00:00")
-                ).date()
-            except ValueError:
-                continue
-
-            if game_date != game_day:
-                continue
-
-            home = game.get("homeTeam", {}) or {}
-            away = game.get("awayTeam", {}) or {}
-
-            home_tri = home.get("teamTricode")
-            away_tri = away.get("teamTricode")
-
-            if home_tri:
-                playing.add(home_tri.upper())
-            if away_tri:
-                playing.add(away_tri.upper())
+    playing: Set[str] = get_schedule_index(schedule).teams_on(game_day)
 
     if playing:
         #print(f"[teams_playing_on] (local JSON) {game_day}: {sorted(playing)}")
@@ -0,0 +1,400 @@
+# odds_archive.py
+"""
+Append-only, columnar time series of every odds snapshot we compute.
+
+Each today / weekly run adds one row per team: when it was computed, the
+matchup, the team, its projected score, win probability and current
+score. Rows live under ODDS_ARCHIVE_DIR (default .odds_archive/), one
+directory per league and one partition per calendar month (UTC):
+
+    <league_id>/strings.json          team / matchup names, row values are indices
+    <league_id>/imported.json         result files already imported
+    <league_id>/2026-01/ts.f8         float64 epoch seconds
+    <league_id>/2026-01/kind.u1       0 = today, 1 = weekly
+    <league_id>/2026-01/matchup.i4    "<home> vs <away>" string id
+    <league_id>/2026-01/team.i4       team string id
+    <league_id>/2026-01/proj.f4       projected score
+    <league_id>/2026-01/win_prob.f4
+    <league_id>/2026-01/current.f4    NaN when unknown
+
+Appending writes a few bytes to the end of each column file. A range
+query only opens the partitions overlapping [start, end) and reads the
+team column first, so charting one team over a month touches one
+partition and a handful of fixed-width arrays instead of every dated
+*_projScore.json. A crash between column writes leaves columns of
+unequal length; readers use the shortest.
+
+    archive = archive_for(lg)
+    archive.record(result, kind="today")
+    archive.query(team="Sarr Fox 64", start=..., end=...)
+
+The dated *_projScore.json / *_weekly_odds.json files written before the
+archive existed are loaded by import_result_files() (also `python
+odds_archive.py import`). They carry no computation time, so their rows
+are stamped with local midnight of the file's date. Every archived file
+name is listed in imported.json -- runs that write a dated file claim it
+there too -- so no snapshot is appended twice.
+"""
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from fantasy import LEAGUE_ID
+
+ODDS_ARCHIVE_DIR = Path(os.environ.get("ODDS_ARCHIVE_DIR", ".odds_archive"))
+LA = ZoneInfo("America/Los_Angeles")
+
+COLUMNS = {
+    "ts": np.dtype("<f8"),
+    "kind": np.dtype("u1"),
+    "matchup": np.dtype("<i4"),
+    "team": np.dtype("<i4"),
+    "proj": np.dtype("<f4"),
+    "win_prob": np.dtype("<f4"),
+    "current": np.dtype("<f4"),
+}
+KINDS = ("today", "weekly")
+
+# 2026-01-05_projScore.json, 538595081_2026-01-05_weekly_odds.json
+_RESULT_FILE = re.compile(r"^(?:(\d+)_)?(\d{4}-\d{2}-\d{2})_(projScore|weekly_odds)\.json$")
+
+
+def _column_path(partition: Path, name: str) -> Path:
+    return partition / f"{name}.{COLUMNS[name].kind}{COLUMNS[name].itemsize}"
+
+
+def _atomic_write(path: Path, text: str):
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _month(ts: float) -> str:
+    return time.strftime("%Y-%m", time.gmtime(ts))
+
+
+def _months_between(start: float, end: float) -> list[str]:
+    """Partition names covering [start, end)."""
+    first = datetime.fromtimestamp(start, timezone.utc).replace(day=1)
+    last = datetime.fromtimestamp(max(start, end - 1e-6), timezone.utc)
+    months = []
+    y, m = first.year, first.month
+    while (y, m) <= (last.year, last.month):
+        months.append(f"{y:04d}-{m:02d}")
+        y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+    return months
+
+
+def day_start(d: date) -> float:
+    """Epoch seconds of local (LA) midnight on d."""
+    return datetime(d.year, d.month, d.day, tzinfo=LA).timestamp()
+
+
+class OddsArchive:
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+        self._strings: list[str] | None = None
+        self._ids: dict[str, int] = {}
+        self._imported: set | None = None
+
+    # ─── Strings ──────────────────────────────────────────────────────────────
+
+    def _load_strings(self) -> list[str]:
+        if self._strings is None:
+            try:
+                self._strings = json.loads((self.directory / "strings.json").read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError):
+                self._strings = []
+            self._ids = {s: i for i, s in enumerate(self._strings)}
+        return self._strings
+
+    def _intern(self, s: str, added: list) -> int:
+        i = self._ids.get(s)
+        if i is None:
+            i = self._ids[s] = len(self._strings)
+            self._strings.append(s)
+            added.append(s)
+        return i
+
+    # ─── Dated result files ───────────────────────────────────────────────────
+
+    def _load_imported(self) -> set:
+        if self._imported is None:
+            try:
+                self._imported = set(json.loads((self.directory / "imported.json").read_text(encoding="utf-8")))
+            except (OSError, json.JSONDecodeError):
+                self._imported = set()
+        return self._imported
+
+    def is_archived(self, name: str) -> bool:
+        with self._lock:
+            return name in self._load_imported()
+
+    def claim_file(self, name: str) -> bool:
+        """
+        Mark a dated result file as archived. False if it already was: its
+        rows are in the archive (from the run that wrote it, or an import).
+        """
+        with self._lock:
+            if name in self._load_imported():
+                return False
+            self._imported.add(name)
+            self.directory.mkdir(parents=True, exist_ok=True)
+            _atomic_write(self.directory / "imported.json", json.dumps(sorted(self._imported)))
+            return True
+
+    # ─── Writing ──────────────────────────────────────────────────────────────
+
+    def append(self, rows: list[dict]) -> int:
+        """
+        Append rows ({"ts", "kind", "matchup", "team", "proj", "win_prob",
+        "current"}). Returns the number of rows written.
+        """
+        if not rows:
+            return 0
+        with self._lock:
+            self._load_strings()
+            added: list[str] = []
+            by_month: dict[str, dict[str, list]] = {}
+            for r in rows:
+                cols = by_month.setdefault(_month(r["ts"]), {name: [] for name in COLUMNS})
+                cols["ts"].append(r["ts"])
+                cols["kind"].append(KINDS.index(r["kind"]))
+                cols["matchup"].append(self._intern(r["matchup"], added))
+                cols["team"].append(self._intern(r["team"], added))
+                cols["proj"].append(r["proj"])
+                cols["win_prob"].append(r["win_prob"])
+                cols["current"].append(np.nan if r.get("current") is None else r["current"])
+
+            self.directory.mkdir(parents=True, exist_ok=True)
+            if added:
+                # Names first, so every id a column refers to is resolvable
+                _atomic_write(self.directory / "strings.json", json.dumps(self._strings))
+            for month, cols in by_month.items():
+                partition = self.directory / month
+                partition.mkdir(exist_ok=True)
+                self._repair(partition)
+                for name, values in cols.items():
+                    with _column_path(partition, name).open("ab") as f:
+                        f.write(np.asarray(values, dtype=COLUMNS[name]).tobytes())
+        return len(rows)
+
+    def _repair(self, partition: Path):
+        """Truncate columns to the shortest one (a crash mid-append leaves them uneven)."""
+        n = self._row_count(partition)
+        for name, dtype in COLUMNS.items():
+            path = _column_path(partition, name)
+            if path.exists() and path.stat().st_size != n * dtype.itemsize:
+                with path.open("r+b") as f:
+                    f.truncate(n * dtype.itemsize)
+
+    @staticmethod
+    def _row_count(partition: Path) -> int:
+        counts = []
+        for name, dtype in COLUMNS.items():
+            path = _column_path(partition, name)
+            counts.append(path.stat().st_size // dtype.itemsize if path.exists() else 0)
+        return min(counts)
+
+    def record(self, result: dict, kind: str, ts: float | None = None) -> int:
+        """Append one row per team of a run_today_matchups / run_weekly_matchups result."""
+        ts = time.time() if ts is None else ts
+        rows = []
+        for m in result.get("matchups", []):
+            matchup = f"{m['home_team']} vs {m['away_team']}"
+            for side in ("home", "away"):
+                rows.append({
+                    "ts": ts,
+                    "kind": kind,
+                    "matchup": matchup,
+                    "team": m[f"{side}_team"],
+                    "proj": m[f"{side}_avg"],
+                    "win_prob": m[f"{side}_win_prob"],
+                    "current": m.get(f"{side}_current_score"),
+                })
+        return self.append(rows)
+
+    # ─── Reading ──────────────────────────────────────────────────────────────
+
+    def _partitions(self, start: float | None, end: float | None) -> list[Path]:
+        if start is not None and end is not None:
+            candidates = [self.directory / m for m in _months_between(start, end)]
+            return [p for p in candidates if p.is_dir()]
+        parts = sorted(p for p in self.directory.glob("????-??") if p.is_dir())
+        if start is not None:
+            parts = [p for p in parts if p.name >= _month(start)]
+        if end is not None:
+            parts = [p for p in parts if p.name <= _month(end)]
+        return parts
+
+    def query(self, team: str | None = None, start: float | None = None, end: float | None = None,
+              kind: str | None = None) -> list[dict]:
+        """Rows with start <= ts < end (team matched case-insensitively), oldest first."""
+        with self._lock:
+            strings = list(self._load_strings())
+            team_ids = None
+            if team is not None:
+                wanted = team.lower()
+                team_ids = [i for i, s in enumerate(strings) if s.lower() == wanted]
+                if not team_ids:
+                    return []
+            parts = self._partitions(start, end)
+            counts = [self._row_count(p) for p in parts]
+
+        out = []
+        for partition, n in zip(parts, counts):
+            if n == 0:
+                continue
+
+            def col(name):
+                return np.fromfile(_column_path(partition, name), dtype=COLUMNS[name], count=n)
+
+            mask = np.ones(n, dtype=bool)
+            if team_ids is not None:
+                mask &= np.isin(col("team"), team_ids)
+            if kind is not None:
+                mask &= col("kind") == KINDS.index(kind)
+            if not mask.any():
+                continue
+            ts = col("ts")
+            if start is not None:
+                mask &= ts >= start
+            if end is not None:
+                mask &= ts < end
+            idx = np.flatnonzero(mask)
+            if idx.size == 0:
+                continue
+            kinds, matchups, teams = col("kind")[idx], col("matchup")[idx], col("team")[idx]
+            proj, win, cur = col("proj")[idx], col("win_prob")[idx], col("current")[idx]
+            for j, i in enumerate(idx):
+                out.append({
+                    "ts": float(ts[i]),
+                    "time": datetime.fromtimestamp(float(ts[i]), LA).isoformat(),
+                    "kind": KINDS[kinds[j]],
+                    "matchup": strings[matchups[j]],
+                    "team": strings[teams[j]],
+                    "proj_score": round(float(proj[j]), 3),
+                    "win_prob": round(float(win[j]), 4),
+                    "current_score": None if np.isnan(cur[j]) else round(float(cur[j]), 2),
+                })
+        out.sort(key=lambda r: r["ts"])
+        return out
+
+    def usage(self) -> dict:
+        parts = self._partitions(None, None)
+        return {
+            "partitions": len(parts),
+            "rows": sum(self._row_count(p) for p in parts),
+            "bytes": sum(f.stat().st_size for p in parts for f in p.iterdir()),
+        }
+
+
+_archives: dict[int, OddsArchive] = {}
+_archives_lock = threading.Lock()
+
+
+def archive_for(lg=None) -> OddsArchive:
+    """Archive of a league (a LeagueSession / League / snapshot, or a league id); default league if None."""
+    league_id = lg if isinstance(lg, int) else getattr(lg, "league_id", None)
+    league_id = LEAGUE_ID if league_id is None else int(league_id)
+    with _archives_lock:
+        archive = _archives.get(league_id)
+        if archive is None:
+            archive = _archives[league_id] = OddsArchive(ODDS_ARCHIVE_DIR / str(league_id))
+        return archive
+
+
+def record_result(lg, result: dict, kind: str, writing: Path | None = None):
+    """
+    record() that never fails the run it archives. `writing` is the dated
+    result file the run is about to save, if any: it is claimed first so
+    import_result_files() never appends that snapshot a second time.
+    """
+    try:
+        archive = archive_for(lg)
+        if writing is not None:
+            archive.claim_file(Path(writing).name)
+        n = archive.record(result, kind)
+        print(f"[odds_archive] archived {n} {kind} rows")
+    except (OSError, KeyError, ValueError) as exc:
+        print(f"[odds_archive] could not archive {kind} result: {exc}")
+
+
+# ─── Import of pre-archive result files ──────────────────────────────────────
+
+def import_result_files(paths=None) -> dict[int, int]:
+    """
+    Append the dated *_projScore.json / *_weekly_odds.json files in the
+    working directory (or `paths`) to their league's archive. Files already
+    imported are skipped. Returns {league_id: rows added}.
+    """
+    if paths is None:
+        paths = sorted(Path(".").glob("*_projScore.json")) + sorted(Path(".").glob("*_weekly_odds.json"))
+    added: dict[int, int] = {}
+    for path in map(Path, paths):
+        match = _RESULT_FILE.match(path.name)
+        if match is None:
+            print(f"[import_result_files] skipping {path.name}: not a dated result file")
+            continue
+        league_id = int(match.group(1)) if match.group(1) else LEAGUE_ID
+        kind = "today" if match.group(3) == "projScore" else "weekly"
+        archive = archive_for(league_id)
+        if archive.is_archived(path.name):
+            continue
+        try:
+            result = json.loads(path.read_text(encoding="utf-8"))
+            # Weekly files record the day they were computed in "date"
+            day = date.fromisoformat(result.get("date") or match.group(2))
+        except (OSError, ValueError, TypeError) as exc:
+            print(f"[import_result_files] could not import {path.name}: {exc}")
+            continue
+        if not archive.claim_file(path.name):
+            continue
+        try:
+            added[league_id] = added.get(league_id, 0) + archive.record(result, kind, ts=day_start(day))
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            print(f"[import_result_files] could not import {path.name}: {exc}")
+    for league_id, n in added.items():
+        print(f"[import_result_files] league {league_id}: imported {n} rows")
+    return added
+
+
+def parse_bound(value: str | None, end: bool = False) -> float | None:
+    """
+    Epoch seconds of an ISO date or datetime query bound. A bare date as
+    an end bound includes that whole (LA) day. Raises ValueError.
+    """
+    if not value:
+        return None
+    if len(value) == 10:
+        d = date.fromisoformat(value)
+        return day_start(d + timedelta(days=1) if end else d)
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=LA)
+    return dt.timestamp()
+
+
+if __name__ == "__main__":
+    # python odds_archive.py import [files...]
+    # python odds_archive.py query <team> [from] [to]
+    cmd = sys.argv[1] if len(sys.argv) > 1 else "import"
+    if cmd == "import":
+        import_result_files(sys.argv[2:] or None)
+        print(archive_for().usage())
+    elif cmd == "query":
+        args = sys.argv[2:] + [None, None]
+        for row in archive_for().query(team=args[0], start=parse_bound(args[1]), end=parse_bound(args[2], end=True)):
+            print(row["time"], row["kind"], f"{row['proj_score']:7.2f}", f"{row['win_prob']:.3f}", row["matchup"])
+    else:
+        sys.exit(f"unknown command {cmd!r} (expected 'import' or 'query')")
@@ -3,18 +3,18 @@ import unicodedata
 
 import json
 from pathlib import Path
-import time
 
 from fantasy import league
-from NBAintegration import (
-    find_nba_player_id,
-    build_fantasy_history_for_player,
-    current_nba_season_str,
-)
+from NBAintegration import current_nba_season_str
+from history_backfill import atomic_write_json, clear_checkpoints
+from ingest_scheduler import refresh_history
+from scoring import ScoringSettings
+from stat_cube import StatCube, cube_path_for, rescore_history
 
 
 HISTORY_PATH = Path("fantasy_player_history_2025-26.json")
-RATE_LIMIT_SECONDS = 5
+CUBE_PATH = cube_path_for(HISTORY_PATH)
+# Rate limiting lives in upstream_client.nba_stats (NBA_STATS_RATE etc.)
 
 
 def load_history():
@@ -24,81 +24,18 @@ def load_history():
 
 
 def save_history(history_map):
-    HISTORY_PATH.write_text(json.dumps(history_map, indent=2), encoding="utf-8")
+    atomic_write_json(HISTORY_PATH, history_map)
     print(f"Saved updated history to {HISTORY_PATH}")
 
 
-def serialize_history_rows(rows):
-    """Convert rows from build_fantasy_history_for_player into JSON-friendly dicts."""
-    hist_serializable = []
-    for h in rows:
-        date_val = h["date"]
-        date_str = date_val.isoformat() if hasattr(date_val, "isoformat") else str(date_val)
-        hist_serializable.append(
-            {
-                "date": date_str,
-                "fantasy_points": float(h["fantasy_points"]),
-                "opponent": h["opponent"],
-                "game_id": h["game_id"],
-            }
-        )
-    return hist_serializable
-
-
-def append_new_games(history, pid_str, nba_id, player_name, season):
-    """
-    Fetch the full season log and append only games we don't already have
-    (matching on game_id if present, otherwise on date string).
-    """
+def league_scoring(lg) -> ScoringSettings | None:
+    """The league's own scoring rules, or None (after a loud warning) if ESPN doesn't give them."""
     try:
-        fresh_rows = build_fantasy_history_for_player(nba_id, season=season)
+        return ScoringSettings.from_espn_league(lg)
     except Exception as e:
-        print(f"!! Error fetching history for {player_name}: {e}")
-        return 0
-    # Rate limit between player fetches
-    time.sleep(RATE_LIMIT_SECONDS)
-
-    existing = history.get(pid_str, {})
-    existing_hist = existing.get("history", [])
-    existing_game_ids = {h.get("game_id") for h in existing_hist if h.get("game_id")}
-    existing_dates = {h.get("date") for h in existing_hist}
-
-    to_add = []
-    for row in fresh_rows:
-        date_val = row["date"]
-        date_str = date_val.isoformat() if hasattr(date_val, "isoformat") else str(date_val)
-        game_id = row.get("game_id")
-
-        if game_id and game_id in existing_game_ids:
-            continue
-        if not game_id and date_str in existing_dates:
-            continue
-
-        to_add.append(
-            {
-                "date": date_str,
-                "fantasy_points": float(row["fantasy_points"]),
-                "opponent": row["opponent"],
-                "game_id": game_id,
-            }
-        )
-
-    if not to_add:
-        return 0
-
-    existing_hist.extend(to_add)
-    # keep history sorted by date just in case
-    existing_hist.sort(key=lambda h: h.get("date", ""))
-
-    history[pid_str] = {
-        **existing,
-        "nba_player_id": nba_id,
-        "history": existing_hist,
-        "season": season,
-        "name": existing.get("name", player_name),
-    }
-
-    return len(to_add)
+        print(f"!! [league_scoring] could not read the league's scoring settings: {e}")
+        print("!! [league_scoring] skipping the rescore; stored points stay on DEFAULT_SCORING")
+        return None
 
 
 def main():
@@ -106,90 +43,29 @@ def main():
     print(f"Using season: {season}")
 
     history = load_history()
+    cube = StatCube.load(CUBE_PATH)
 
-    # Track missing players
-    missing = []
-
-    for team in league.teams:
-        print(f"Checking team: {team.team_name}")
-        for p in team.roster:
-            pid_str = str(p.playerId)
-            if pid_str not in history:
-                missing.append(p)
-
-    if not missing:
-        print("No missing players in history file.")
-        return
-
-    print("\nMissing players found:")
-    for p in missing:
-        print(f"  - {p.name} (ESPN ID {p.playerId}, team {p.proTeam})")
-
-    # If you only want to patch the four you mentioned,
-    # you can filter here:
-    target_names = {
-        "Collin Gillespie",
-        "Ryan Nembhard",
-        "Santi Aldama",
-    }
-
-    to_patch = [p for p in missing if p.name in target_names] or missing
-
-    print("\nPatching these players:")
-    for p in to_patch:
-        print(f"  - {p.name} (ESPN ID {p.playerId})")
-
-    for p in to_patch:
-        nba_id = find_nba_player_id(p.name)
-        if nba_id is None:
-            print(f"!! Could not find NBA ID for {p.name}, skipping")
-            continue
-
-        print(f"Fetching history for {p.name} (NBA ID {nba_id})...")
-        try:
-            rows = build_fantasy_history_for_player(nba_id, season=season)
-        except Exception as e:
-            print(f"!! Error fetching history for {p.name}: {e}")
-            continue
-        # Rate limit between player fetches
-        time.sleep(RATE_LIMIT_SECONDS)
-
-        hist_serializable = serialize_history_rows(rows)
-        history[str(p.playerId)] = {
-            "espn_player_id": p.playerId,
-            "nba_player_id": nba_id,
-            "name": p.name,
-            "proTeam": p.proTeam,
-            "season": season,
-            "history": hist_serializable,
-        }
-
-        print(f"  -> Added {len(hist_serializable)} games for {p.name}")
-
-    # Pass 2: update existing roster players with any games not yet recorded
-    print("\nUpdating existing players with new games...")
-    updated_count = 0
-
-    for team in league.teams:
-        for p in team.roster:
-            pid_str = str(p.playerId)
-            if pid_str not in history:
-                continue  # handled above
-
-            nba_id = history[pid_str].get("nba_player_id") or find_nba_player_id(p.name)
-            if nba_id is None:
-                print(f"!! Could not find NBA ID for {p.name}, skipping update")
-                continue
-
-            added = append_new_games(history, pid_str, nba_id, p.name, season)
-            if added:
-                print(f"  -> Added {added} new games for {p.name}")
-                updated_count += added
-
-    if not updated_count:
-        print("No new games to add for existing players.")
+    # Backfill rostered players we don't have yet, and pull new games only
+    # for players whose team has played since their last update
+    summary = refresh_history(history, season, league, cube=cube)
+    for e in summary["failed"]:
+        print(f"!! {e}")
+
+    if not summary["rows_added"] and not summary["backfilled"]:
+        print("No new games to add.")
+
+    # Re-derive points from raw stats, so a change to the league's scoring
+    # settings reaches every game the cube has stats for
+    scoring = league_scoring(league)
+    if scoring is not None:
+        changed, uncovered = rescore_history(history, cube, scoring)
+        print(f"Rescored {changed} games from raw stats ({uncovered} without raw stats kept as stored)")
+        summary["rescored"] = changed
 
     save_history(history)
+    cube.save(CUBE_PATH)
+    clear_checkpoints(season, summary["backfilled_ids"])
+    return summary
 
 
 if __name__ == "__main__":
@@ -0,0 +1,202 @@
+# precompute.py
+"""
+Background scheduler that keeps today / weekly odds warm, so the API
+serves a finished result instead of simulating inside the request.
+
+A single thread polls the (cheap) live NBA scoreboard and recomputes:
+
+  - on startup and when the (LA) date rolls over
+  - every PRECOMPUTE_LIVE_INTERVAL seconds while any game is live
+    (weekly every PRECOMPUTE_WEEKLY_LIVE_INTERVAL)
+  - whenever a game tips off or goes final (scoreboard status change)
+  - after roster / lineup changes, checked by reloading the ESPN league
+    every PRECOMPUTE_ROSTER_INTERVAL seconds
+
+Each result is stored as a new version, in memory for the endpoints and
+under precomputed/<name>.json for other processes / inspection:
+
+    precomputed.latest("today") -> {"version", "computed_at", "trigger",
+                                    "runtime_seconds", "source_version", "data"}
+"""
+
+import os
+import threading
+import time
+from pathlib import Path
+
+from history_backfill import atomic_write_json
+from league_index import roster_signature
+from nbaTest import _la_today
+
+PRECOMPUTE_DIR = Path(os.environ.get("PRECOMPUTE_DIR", "precomputed"))
+PRECOMPUTE_POLL_SECONDS = float(os.environ.get("PRECOMPUTE_POLL_SECONDS", "30"))
+PRECOMPUTE_LIVE_INTERVAL = float(os.environ.get("PRECOMPUTE_LIVE_INTERVAL", "60"))
+PRECOMPUTE_WEEKLY_LIVE_INTERVAL = float(os.environ.get("PRECOMPUTE_WEEKLY_LIVE_INTERVAL", "300"))
+PRECOMPUTE_ROSTER_INTERVAL = float(os.environ.get("PRECOMPUTE_ROSTER_INTERVAL", "600"))
+
+# Params the precomputed results are built with; endpoints only serve them
+# for requests asking for exactly these
+TODAY_TRIALS = 20000
+WEEKLY_TRIALS = 10000
+
+
+class PrecomputedStore:
+    def __init__(self, directory: Path = PRECOMPUTE_DIR):
+        self.directory = Path(directory)
+        self._results: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def publish(self, name: str, data, trigger: str, runtime: float, source_version) -> dict:
+        with self._lock:
+            prev = self._results.get(name)
+            entry = {
+                "version": (prev["version"] + 1) if prev else 1,
+                "computed_at": time.time(),
+                "trigger": trigger,
+                "runtime_seconds": round(runtime, 2),
+                "source_version": source_version,
+                "data": data,
+            }
+            self._results[name] = entry
+        self.directory.mkdir(parents=True, exist_ok=True)
+        atomic_write_json(self.directory / f"{name}.json", entry, indent=None)
+        return entry
+
+    def latest(self, name: str) -> dict | None:
+        return self._results.get(name)
+
+
+class PrecomputeScheduler:
+    def __init__(self, store: PrecomputedStore, lg, run_today, run_weekly, fetch_live_games, source=None):
+        self.store = store
+        self.lg = lg
+        self.source = source
+        self.run_today = run_today
+        self.run_weekly = run_weekly
+        self.fetch_live_games = fetch_live_games
+
+        self._stop = threading.Event()
+        self._thread = None
+        self._game_status: dict[str, int] = {}
+        self._roster_sig = None
+        self._last_today = 0.0
+        self._last_weekly = 0.0
+        self._last_roster_check = 0.0
+        self._day = None
+
+    # ─── Triggers ─────────────────────────────────────────────────────────────
+
+    def _poll_games(self) -> tuple[bool, list[str]]:
+        """Return (any game live, list of tip-off / final events since last poll)."""
+        data = self.fetch_live_games()
+        events = []
+        live = False
+        for g in data.get("response", []) or []:
+            game_id = g.get("gameId")
+            status = int(g.get("gameStatus", 0) or 0)
+            live = live or status == 2
+            prev = self._game_status.get(game_id)
+            if prev is not None and prev != status:
+                if status == 2:
+                    events.append(f"tipoff:{game_id}")
+                elif status == 3:
+                    events.append(f"final:{game_id}")
+            self._game_status[game_id] = status
+        return live, events
+
+    def _roster_changed(self) -> bool:
+        self.lg.refresh()
+        sig = roster_signature(self.lg)
+        changed = self._roster_sig is not None and sig != self._roster_sig
+        self._roster_sig = sig
+        return changed
+
+    # ─── Work ─────────────────────────────────────────────────────────────────
+
+    def _source_version(self):
+        src = self.source if self.source is not None else self.lg
+        return getattr(src, "snapshot_version", None)
+
+    def _compute(self, name: str, fn, trigger: str):
+        t0 = time.perf_counter()
+        try:
+            data = fn()
+        except Exception as e:
+            print(f"[PrecomputeScheduler] {name} ({trigger}) failed: {e}")
+            return
+        entry = self.store.publish(name, data, trigger, time.perf_counter() - t0, self._source_version())
+        print(f"[PrecomputeScheduler] {name} v{entry['version']} ({trigger}) "
+              f"in {entry['runtime_seconds']}s")
+
+    def compute_today(self, trigger: str):
+        self._compute("today", lambda: self.run_today(trials=TODAY_TRIALS, source=self.source), trigger)
+        self._last_today = time.monotonic()
+
+    def compute_weekly(self, trigger: str):
+        self._compute("weekly", lambda: self.run_weekly(trials=WEEKLY_TRIALS, save=True, source=self.source),
+                      trigger)
+        self._last_weekly = time.monotonic()
+
+    def tick(self, first: bool = False):
+        """One scheduling pass; public so it can be driven manually."""
+        if first:
+            self._day = _la_today()
+            self.compute_today("startup")
+            self.compute_weekly("startup")
+            if self.source is None:
+                self._roster_sig = roster_signature(self.lg)
+                self._last_roster_check = time.monotonic()
+            return
+
+        if self.source is not None:
+            return  # a snapshot never changes
+
+        now = time.monotonic()
+        try:
+            live, events = self._poll_games()
+        except Exception as e:
+            print(f"[PrecomputeScheduler] scoreboard poll failed: {e}")
+            live, events = False, []
+
+        roster_changed = False
+        if now - self._last_roster_check >= PRECOMPUTE_ROSTER_INTERVAL:
+            self._last_roster_check = now
+            try:
+                roster_changed = self._roster_changed()
+            except Exception as e:
+                print(f"[PrecomputeScheduler] roster check failed: {e}")
+
+        new_day = _la_today() != self._day
+        if new_day:
+            self._day = _la_today()
+
+        if events or roster_changed or new_day:
+            trigger = ",".join(events) if events else "roster" if roster_changed else "new-day"
+            self.compute_today(trigger)
+            self.compute_weekly(trigger)
+            return
+
+        if live and now - self._last_today >= PRECOMPUTE_LIVE_INTERVAL:
+            self.compute_today("live")
+        if live and now - self._last_weekly >= PRECOMPUTE_WEEKLY_LIVE_INTERVAL:
+            self.compute_weekly("live")
+
+    def _run(self):
+        first = True
+        while not self._stop.is_set():
+            try:
+                self.tick(first=first)
+            except Exception as e:
+                print(f"[PrecomputeScheduler] tick failed: {e}")
+            first = False
+            self._stop.wait(PRECOMPUTE_POLL_SECONDS)
+
+    def start(self) -> "PrecomputeScheduler":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="precompute", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,193 @@
+# profiling.py
+"""
+On-demand cProfile capture of single API requests.
+
+Off unless PROFILING=1. With it on, a request opts in with the header
+`X-Profile: 1` or the query flag `?profile=1`; its endpoint runs under
+cProfile and the response carries `X-Profile-Id`. Profiles are kept in a
+ring buffer of the last PROFILE_MAX files under PROFILE_DIR and served by
+/debug/profiles/{id} as:
+
+  - pstats    the raw cProfile dump (python -m pstats / snakeviz)
+  - collapsed folded stacks ("a;b;c <microseconds>") for flamegraph.pl /
+              speedscope, derived from the pstats call graph
+
+cProfile is deterministic and per-thread: it covers the endpoint's own
+thread (where the Monte Carlo loops and ESPN / scoreboard calls run), not
+helper threads it fans out to. The collapsed view splits each function's
+time across its callers in proportion to call-edge time, so deep stacks
+are an approximation.
+
+When PROFILING is unset nothing is installed: no middleware, no wrappers.
+"""
+
+import contextvars
+import cProfile
+import functools
+import json
+import os
+import pstats
+import time
+import uuid
+from pathlib import Path
+
+PROFILING_ENABLED = os.environ.get("PROFILING", "0") == "1"
+PROFILE_DIR = Path(os.environ.get("PROFILE_DIR", ".profiles"))
+PROFILE_MAX = int(os.environ.get("PROFILE_MAX", "20"))
+PROFILE_HEADER = "x-profile"
+PROFILE_QUERY = "profile"
+
+# Set per request by the middleware; the endpoint wrapper fills in "profile"
+_request_profile: contextvars.ContextVar[dict | None] = contextvars.ContextVar("request_profile", default=None)
+
+
+# ─── Capture ──────────────────────────────────────────────────────────────────
+
+def profiled_endpoint(endpoint):
+    """Wrap a sync endpoint so it runs under cProfile when the request asked for it."""
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        slot = _request_profile.get()
+        if slot is None:
+            return endpoint(*args, **kwargs)
+        prof = cProfile.Profile()
+        try:
+            return prof.runcall(endpoint, *args, **kwargs)
+        finally:
+            slot["profile"] = prof
+    return wrapper
+
+
+def wants_profile(request) -> bool:
+    flag = request.headers.get(PROFILE_HEADER) or request.query_params.get(PROFILE_QUERY)
+    return flag is not None and flag.lower() in ("1", "true", "yes")
+
+
+def install(app) -> bool:
+    """
+    Hook profiling into a FastAPI app (call before routes are declared).
+    No-op unless PROFILING=1.
+    """
+    if not PROFILING_ENABLED:
+        return False
+
+    from fastapi.routing import APIRoute
+
+    class ProfiledRoute(APIRoute):
+        def __init__(self, path, endpoint, **kwargs):
+            super().__init__(path, profiled_endpoint(endpoint), **kwargs)
+
+    app.router.route_class = ProfiledRoute
+
+    @app.middleware("http")
+    async def profile_request(request, call_next):
+        if not wants_profile(request):
+            return await call_next(request)
+        slot = {"profile": None}
+        token = _request_profile.set(slot)
+        t0 = time.perf_counter()
+        try:
+            response = await call_next(request)
+        finally:
+            _request_profile.reset(token)
+        if slot["profile"] is not None:
+            profile_id = save_profile(slot["profile"], {
+                "method": request.method,
+                "path": request.url.path,
+                "query": str(request.url.query),
+                "status": response.status_code,
+                "wall_seconds": round(time.perf_counter() - t0, 4),
+            })
+            response.headers["X-Profile-Id"] = profile_id
+        return response
+
+    print(f"[profiling] enabled; profiles kept in {PROFILE_DIR} (last {PROFILE_MAX})")
+    return True
+
+
+# ─── Ring buffer ──────────────────────────────────────────────────────────────
+
+def _paths(profile_id: str) -> tuple[Path, Path]:
+    return PROFILE_DIR / f"{profile_id}.pstats", PROFILE_DIR / f"{profile_id}.json"
+
+
+def save_profile(prof: cProfile.Profile, meta: dict) -> str:
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    profile_id = time.strftime("%Y%m%dT%H%M%S") + "-" + uuid.uuid4().hex[:6]
+    stats_path, meta_path = _paths(profile_id)
+
+    tmp = stats_path.with_name(f".{stats_path.name}.tmp")
+    prof.dump_stats(tmp)
+    os.replace(tmp, stats_path)
+    meta_path.write_text(json.dumps({"id": profile_id, "created_at": time.time(), **meta}), encoding="utf-8")
+
+    _evict()
+    print(f"[profiling] {meta.get('method')} {meta.get('path')} → profile {profile_id}")
+    return profile_id
+
+
+def _evict():
+    stats = sorted(PROFILE_DIR.glob("*.pstats"), key=lambda p: p.stat().st_mtime)
+    for old in stats[:-PROFILE_MAX] if PROFILE_MAX > 0 else stats:
+        for path in _paths(old.stem):
+            path.unlink(missing_ok=True)
+
+
+def list_profiles() -> list[dict]:
+    out = []
+    for meta_path in PROFILE_DIR.glob("*.json"):
+        try:
+            out.append(json.loads(meta_path.read_text(encoding="utf-8")))
+        except (OSError, json.JSONDecodeError):
+            continue
+    return sorted(out, key=lambda m: m.get("created_at", 0), reverse=True)
+
+
+def profile_path(profile_id: str) -> Path | None:
+    """Path of a stored pstats dump, or None (also for ids that aren't ours)."""
+    stats_path, _ = _paths(profile_id)
+    if stats_path.parent != PROFILE_DIR or not stats_path.exists():
+        return None
+    return stats_path
+
+
+# ─── Collapsed stacks ─────────────────────────────────────────────────────────
+
+def _frame_name(func: tuple) -> str:
+    filename, line, name = func
+    if filename == "~":
+        return name  # builtins, e.g. <built-in method time.sleep>
+    return f"{Path(filename).name}:{name}:{line}"
+
+
+def collapsed_stacks(stats_path: Path, max_depth: int = 64, min_seconds: float = 1e-5) -> str:
+    """Folded-stack text ("root;child;leaf <microseconds>") from a pstats dump."""
+    raw = pstats.Stats(str(stats_path)).stats
+    callees: dict[tuple, list] = {}
+    for func, (_cc, _nc, _tt, _ct, callers) in raw.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+
+    folded: dict[str, float] = {}
+
+    def walk(func, path, share):
+        _cc, _nc, tt, ct, _callers = raw[func]
+        if ct * share < min_seconds:
+            return  # keeps path enumeration bounded on large call graphs
+        stack = path + (_frame_name(func),)
+        if tt * share > 0:
+            key = ";".join(stack)
+            folded[key] = folded.get(key, 0.0) + tt * share
+        if len(stack) >= max_depth or ct <= 0:
+            return
+        for child, edge_ct in callees.get(func, ()):
+            if _frame_name(child) in stack:
+                continue  # recursion: time already counted on the first visit
+            walk(child, stack, share * min(1.0, edge_ct / ct))
+
+    roots = [f for f, v in raw.items() if not v[4]]
+    for root in roots:
+        walk(root, (), 1.0)
+
+    lines = [f"{stack} {int(round(seconds * 1e6))}" for stack, seconds in sorted(folded.items())]
+    return "\n".join(line for line in lines if not line.endswith(" 0")) + "\n"
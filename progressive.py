@@ -0,0 +1,146 @@
+# progressive.py
+"""
+Progressive refinement of expensive results: answer right away with a
+cheap estimate, keep computing the precise one in the background, and
+let the client fetch (or long-poll for) the refined version by id.
+
+    ref = refinements.get_or_start(key, estimate, refine, precision_fn)
+    ref.to_response()     # {..data.., "result_id", "refinement": "pending"}
+    refinements.wait(ref.id, timeout=10)             # -> refined Refinement
+
+Requests for a key that is still refining (or refined recently) share the
+existing Refinement instead of starting another background run. The key
+is reserved before the estimate is computed, so concurrent first requests
+wait for one estimate rather than each computing their own.
+"""
+
+import os
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+
+PENDING = "pending"
+FINAL = "final"
+FAILED = "failed"
+
+PROGRESSIVE_MAX_RESULTS = int(os.environ.get("PROGRESSIVE_MAX_RESULTS", "64"))
+# Refined results are reused for the same key this long
+PROGRESSIVE_TTL = float(os.environ.get("PROGRESSIVE_TTL", "300"))
+
+
+class Refinement:
+    def __init__(self, key, data, precision_fn):
+        self.id = uuid.uuid4().hex[:12]
+        self.key = key
+        self.data = data
+        self.precision_fn = precision_fn
+        self.status = PENDING
+        self.error = None
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.estimated = threading.Event()  # data holds at least the estimate
+        self.refined = threading.Event()
+
+    def to_response(self) -> dict:
+        return {
+            **self.data,
+            "result_id": self.id,
+            "refinement": self.status,
+            "refinement_error": self.error,
+            "precision": self.precision_fn(self.data),
+        }
+
+
+class RefinementStore:
+    def __init__(self, name: str, max_results: int = PROGRESSIVE_MAX_RESULTS, ttl: float = PROGRESSIVE_TTL):
+        self.name = name
+        self.max_results = max_results
+        self.ttl = ttl
+        self._by_id: "OrderedDict[str, Refinement]" = OrderedDict()
+        self._by_key: dict = {}
+        self._lock = threading.Lock()
+
+    def _current(self, key) -> Refinement | None:
+        """Refinement for key that is estimating, refining or refined within ttl (caller holds _lock)."""
+        ref = self._by_key.get(key)
+        if ref is None or ref.status == FAILED:
+            return None
+        if ref.status == FINAL and time.time() - ref.updated_at > self.ttl:
+            return None
+        return ref
+
+    def get_or_start(self, key, estimate, refine, precision_fn) -> Refinement:
+        """
+        Current Refinement for key, or a new one: `estimate()` is computed by
+        the first caller (later callers for the same key block until it is
+        in) and `refine()` then runs in the background. Pass refine=None
+        when the estimate is already final. Errors from estimate() are
+        raised to every caller waiting on it.
+        """
+        with self._lock:
+            ref = self._current(key)
+            owner = ref is None
+            if owner:
+                ref = Refinement(key, None, precision_fn)
+                self._by_id[ref.id] = ref
+                self._by_key[key] = ref
+                while len(self._by_id) > self.max_results:
+                    _, old = self._by_id.popitem(last=False)
+                    if self._by_key.get(old.key) is old:
+                        del self._by_key[old.key]
+
+        if not owner:
+            ref.estimated.wait()
+            if ref.data is None:
+                raise RuntimeError(f"estimate failed: {ref.error}")
+            return ref
+
+        try:
+            ref.data = estimate()
+        except Exception as e:
+            ref.error = str(e)
+            ref.status = FAILED
+            ref.estimated.set()
+            ref.refined.set()
+            with self._lock:
+                self._by_id.pop(ref.id, None)
+                if self._by_key.get(key) is ref:
+                    del self._by_key[key]
+            raise
+        ref.estimated.set()
+
+        if refine is None:
+            ref.status = FINAL
+            ref.refined.set()
+        else:
+            threading.Thread(target=self._run, args=(ref, refine), name=f"{self.name}-refine", daemon=True).start()
+        return ref
+
+    def _run(self, ref: Refinement, refine):
+        t0 = time.perf_counter()
+        try:
+            ref.data = refine()
+            ref.status = FINAL
+        except Exception as e:
+            traceback.print_exc()
+            ref.error = str(e)
+            ref.status = FAILED
+        ref.updated_at = time.time()
+        ref.refined.set()
+        print(f"[RefinementStore:{self.name}] {ref.id} {ref.status} in {time.perf_counter() - t0:.1f}s")
+
+    def get(self, result_id: str) -> Refinement | None:
+        ref = self._by_id.get(result_id)
+        return ref if ref is not None and ref.estimated.is_set() else None
+
+    def wait(self, result_id: str, timeout: float) -> Refinement | None:
+        """get(), but block up to timeout seconds for a pending refinement."""
+        ref = self.get(result_id)
+        if ref is not None and timeout > 0:
+            ref.refined.wait(timeout)
+        return ref
+
+
+weekly_refinements = RefinementStore("weekly")
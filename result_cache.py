@@ -0,0 +1,134 @@
+# result_cache.py
+"""
+In-process result cache for expensive API computations.
+
+    value, status, age = odds_cache.get_or_compute(key, compute, version=...)
+
+- Keyed by (key, version). `version` is the input snapshot version (e.g.
+  league.snapshot_version), so a reloaded league never serves old results.
+- Fresh for `ttl` seconds: hits return immediately.
+- Single-flight: concurrent misses for the same key wait on one in-flight
+  computation instead of each running it.
+- Stale-while-revalidate: between `ttl` and `stale_ttl` the last result is
+  returned immediately and one background refresh is started.
+- Errors are never cached; every caller waiting on a failed computation
+  gets the exception.
+
+status is one of "hit", "stale", "miss" (this caller computed it) or
+"coalesced" (waited on another caller's computation).
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+from metrics import register_cache
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: BaseException | None = None
+
+
+class _Entry:
+    def __init__(self, value, computed_at: float):
+        self.value = value
+        self.computed_at = computed_at
+
+
+class ResultCache:
+    def __init__(self, name: str, ttl: float, stale_ttl: float, max_entries: int = 256):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, ttl)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._flights: dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hit": 0, "stale": 0, "miss": 0, "coalesced": 0, "error": 0}
+
+    def _store(self, full_key, value):
+        with self._lock:
+            self._entries[full_key] = _Entry(value, time.time())
+            self._entries.move_to_end(full_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _run_flight(self, full_key, flight: _Flight, compute: Callable[[], Any]):
+        try:
+            flight.value = compute()
+            self._store(full_key, flight.value)
+        except BaseException as e:
+            flight.error = e
+            with self._lock:
+                self.stats["error"] += 1
+        finally:
+            with self._lock:
+                self._flights.pop(full_key, None)
+            flight.done.set()
+
+    def _refresh_in_background(self, full_key, flight: _Flight, compute):
+        def run():
+            self._run_flight(full_key, flight, compute)
+            if flight.error is not None:
+                print(f"[ResultCache:{self.name}] background refresh of {full_key} failed: {flight.error}")
+
+        threading.Thread(target=run, name=f"{self.name}-refresh", daemon=True).start()
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any], version: Hashable = None):
+        """Return (value, status, age_seconds) for key at the given input version."""
+        full_key = (key, version)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(full_key)
+            age = now - entry.computed_at if entry is not None else None
+            if entry is not None and age <= self.ttl:
+                self._entries.move_to_end(full_key)
+                self.stats["hit"] += 1
+                return entry.value, "hit", age
+
+            flight = self._flights.get(full_key)
+            stale = entry is not None and age <= self.stale_ttl
+            owner = flight is None
+            if owner:
+                flight = self._flights[full_key] = _Flight()
+            self.stats["stale" if stale else "miss" if owner else "coalesced"] += 1
+
+        if stale:
+            if owner:
+                self._refresh_in_background(full_key, flight, compute)
+            return entry.value, "stale", age
+
+        if owner:
+            self._run_flight(full_key, flight, compute)
+        else:
+            flight.done.wait()
+
+        if flight.error is not None:
+            raise flight.error
+        return flight.value, "miss" if owner else "coalesced", 0.0
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Live odds move with the game clock, so results only stay fresh briefly
+ODDS_CACHE_TTL = float(os.environ.get("ODDS_CACHE_TTL", "15"))
+ODDS_CACHE_STALE_TTL = float(os.environ.get("ODDS_CACHE_STALE_TTL", "300"))
+ODDS_CACHE_MAX_ENTRIES = int(os.environ.get("ODDS_CACHE_MAX_ENTRIES", "256"))
+
+
+def new_odds_cache(name: str = "odds") -> ResultCache:
+    """An odds cache with the ODDS_CACHE_* settings, exposed on /metrics."""
+    cache = ResultCache(name, ttl=ODDS_CACHE_TTL, stale_ttl=ODDS_CACHE_STALE_TTL, max_entries=ODDS_CACHE_MAX_ENTRIES)
+    register_cache(cache)
+    return cache
+
+
+odds_cache = new_odds_cache()
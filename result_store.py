@@ -0,0 +1,157 @@
+# result_store.py
+"""
+Content-addressed on-disk store for simulation results.
+
+A result is filed under the hash of everything it was computed from, so
+runs with different trial counts, rosters, live states or history never
+collide, and repeating a computation is a lookup:
+
+    key = content_key(kind="today", roster=..., live=..., history=..., trials=..., seed=..., engine=...)
+    result = result_store.get(key)
+    if result is None:
+        result = compute()
+        result_store.put(key, result, kind="today")
+
+Layout under RESULT_STORE_DIR (default .results/):
+
+    index.json          {key: {"kind", "size", "created_at", "last_access"}}
+    <key>.json          one result per file
+
+The index is loaded once into an LRU-ordered dict, so lookups are O(1)
+without touching the directory. Files and the index are written to a temp
+file and renamed into place. When the stored bytes exceed
+RESULT_STORE_MAX_BYTES the least recently used results are deleted.
+RESULT_STORE_MAX_BYTES=0 disables the store.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+RESULT_STORE_DIR = Path(os.environ.get("RESULT_STORE_DIR", ".results"))
+RESULT_STORE_MAX_BYTES = int(os.environ.get("RESULT_STORE_MAX_BYTES", str(256 * 1024 * 1024)))
+# last_access updates are flushed to index.json at most this often
+INDEX_FLUSH_SECONDS = 30.0
+
+
+def content_key(**parts) -> str:
+    """sha256 over a canonical JSON encoding of the inputs."""
+    raw = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def file_version(path) -> str | None:
+    """Cheap version stamp for an input file (size + mtime), None if missing."""
+    try:
+        st = Path(path).stat()
+    except OSError:
+        return None
+    return f"{st.st_size}-{st.st_mtime_ns}"
+
+
+def _atomic_write(path: Path, text: str):
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(text, encoding="utf-8")
+    os.replace(tmp, path)
+
+
+class ResultStore:
+    def __init__(self, directory: Path = RESULT_STORE_DIR, max_bytes: int = RESULT_STORE_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._index: "OrderedDict[str, dict] | None" = None
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+        self._dirty = False
+        self.stats = {"hit": 0, "miss": 0, "evicted": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def _load_index(self) -> "OrderedDict[str, dict]":
+        if self._index is None:
+            entries = {}
+            try:
+                entries = json.loads((self.directory / "index.json").read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError):
+                pass
+            ordered = sorted(entries.items(), key=lambda kv: kv[1].get("last_access", 0))
+            self._index = OrderedDict(ordered)
+            self._bytes = sum(e.get("size", 0) for e in self._index.values())
+        return self._index
+
+    def _flush_index(self, force: bool = False):
+        now = time.time()
+        if not self._dirty or (not force and now - self._last_flush < INDEX_FLUSH_SECONDS):
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        _atomic_write(self.directory / "index.json", json.dumps(self._index))
+        self._last_flush = now
+        self._dirty = False
+
+    def get(self, key: str):
+        """Stored result for key, or None."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            index = self._load_index()
+            entry = index.get(key)
+            if entry is None:
+                self.stats["miss"] += 1
+                return None
+            try:
+                data = json.loads(self._path(key).read_text(encoding="utf-8"))
+            except (OSError, json.JSONDecodeError):
+                # File vanished or is corrupt: forget it
+                self._bytes -= index.pop(key).get("size", 0)
+                self._dirty = True
+                self.stats["miss"] += 1
+                return None
+            entry["last_access"] = time.time()
+            index.move_to_end(key)
+            self._dirty = True
+            self._flush_index()
+            self.stats["hit"] += 1
+            return data
+
+    def put(self, key: str, data, kind: str = "") -> None:
+        if not self.enabled:
+            return
+        text = json.dumps(data)
+        with self._lock:
+            index = self._load_index()
+            self.directory.mkdir(parents=True, exist_ok=True)
+            _atomic_write(self._path(key), text)
+            old = index.pop(key, None)
+            if old is not None:
+                self._bytes -= old.get("size", 0)
+            now = time.time()
+            index[key] = {"kind": kind, "size": len(text), "created_at": now, "last_access": now}
+            self._bytes += len(text)
+            self._evict()
+            self._dirty = True
+            self._flush_index(force=True)
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and len(self._index) > 1:
+            key, entry = self._index.popitem(last=False)
+            self._path(key).unlink(missing_ok=True)
+            self._bytes -= entry.get("size", 0)
+            self.stats["evicted"] += 1
+
+    def usage(self) -> dict:
+        with self._lock:
+            index = self._load_index()
+            return {"entries": len(index), "bytes": self._bytes, "max_bytes": self.max_bytes, **self.stats}
+
+
+result_store = ResultStore()
@@ -0,0 +1,194 @@
+# scoring.py
+"""
+Single fantasy scoring engine for history ingest and the live path.
+
+A ScoringSettings holds per-stat weights (nba_api column names) plus the
+DD / TD / QD bonuses. It compiles once to a weight vector and a bonus
+lookup table, then scores whole batches in one vectorized call:
+
+    s = DEFAULT_SCORING                      # this league's rules
+    s = ScoringSettings.from_espn_league(league)
+    s.score(df)          # DataFrame of game-log / box-score rows -> np.ndarray
+    s.score(arr, cols)   # 2-D array whose columns are `cols`
+    s.score_one(row)     # single dict / Series -> float
+
+Bonuses stack: a triple-double earns DD + TD, a quadruple-double
+DD + TD + QD. Categories counted for the bonus are PTS/REB/AST/STL/BLK.
+"""
+
+import hashlib
+import json
+
+import numpy as np
+
+from upstream_client import espn
+
+# Stat columns the engine understands (nba_api names)
+STAT_COLUMNS = (
+    "FGM", "FGA", "FTM", "FTA", "FG3M", "FG3A",
+    "OREB", "DREB", "REB", "AST", "STL", "BLK", "TOV", "PF", "PTS",
+)
+BONUS_CATEGORIES = ("PTS", "REB", "AST", "STL", "BLK")
+
+# ESPN scoring statIds (espn_api.basketball.constant.STATS_MAP) -> nba_api column
+ESPN_STAT_COLUMNS = {
+    0: "PTS", 1: "BLK", 2: "STL", 3: "AST", 4: "OREB", 5: "DREB", 6: "REB",
+    9: "PF", 11: "TOV", 13: "FGM", 14: "FGA", 15: "FTM", 16: "FTA",
+    17: "FG3M", 18: "FG3A",
+}
+# Missed-shot stats, expressed as attempts minus makes
+ESPN_MISSED_STATS = {23: ("FGA", "FGM"), 24: ("FTA", "FTM"), 25: ("FG3A", "FG3M")}
+ESPN_DD, ESPN_TD, ESPN_QD = 37, 38, 39
+
+
+class CompiledScoring:
+    def __init__(self, columns: tuple, weights: np.ndarray, bonus_table: np.ndarray):
+        self.columns = columns
+        self.weights = weights
+        # Indexed by how many BONUS_CATEGORIES reached 10 (0..5)
+        self.bonus_table = bonus_table
+
+
+def _column_reader(data, columns=None):
+    """Return (col(name) -> float64 array, n_rows) over a frame, dict or 2-D array."""
+    if columns is not None:
+        arr = np.asarray(data, dtype=np.float64)
+        if arr.ndim == 1:
+            arr = arr.reshape(1, -1)
+        pos = {name: i for i, name in enumerate(columns)}
+        n = len(arr)
+
+        def col(name):
+            return np.nan_to_num(arr[:, pos[name]]) if name in pos else np.zeros(n)
+        return col, n
+
+    keys = set(data.columns if hasattr(data, "columns") else data.keys())
+    n = len(data) if hasattr(data, "columns") else (len(next(iter(data.values()))) if keys else 0)
+
+    def col(name):
+        if name not in keys:
+            return np.zeros(n)
+        return np.nan_to_num(np.asarray(data[name], dtype=np.float64))
+    return col, n
+
+
+class ScoringSettings:
+    def __init__(self, weights: dict[str, float], dd: float = 0.0, td: float = 0.0, qd: float = 0.0):
+        unknown = set(weights) - set(STAT_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown scoring stats: {sorted(unknown)}")
+        self.weights = {k: float(v) for k, v in weights.items() if v}
+        self.dd = float(dd)
+        self.td = float(td)
+        self.qd = float(qd)
+        self._compiled: CompiledScoring | None = None
+
+    def __repr__(self):
+        return f"ScoringSettings({self.weights}, dd={self.dd}, td={self.td}, qd={self.qd})"
+
+    def to_dict(self) -> dict:
+        return {"weights": dict(sorted(self.weights.items())), "dd": self.dd, "td": self.td, "qd": self.qd}
+
+    @property
+    def ruleset_hash(self) -> str:
+        """Stable short hash of the rules, for caching derived points."""
+        raw = json.dumps(self.to_dict(), sort_keys=True).encode("utf-8")
+        return hashlib.sha1(raw).hexdigest()[:12]
+
+    @classmethod
+    def from_espn_league(cls, lg) -> "ScoringSettings":
+        """
+        Build settings from the league's scoring items, read from ESPN's own
+        mSettings payload (settings.scoringSettings.scoringItems) rather
+        than from espn_api's parsed objects. Raises ValueError when the
+        league has no ESPN connection (e.g. a snapshot) or no items.
+        """
+        request = getattr(lg, "espn_request", None)
+        if request is None:
+            raise ValueError(f"{type(lg).__name__} has no ESPN connection to read scoring settings from")
+        data = espn.call(request.league_get, params={"view": "mSettings"})
+        items = (((data or {}).get("settings") or {}).get("scoringSettings") or {}).get("scoringItems")
+        if not items:
+            raise ValueError("League has no scoring items; use DEFAULT_SCORING")
+        return cls.from_espn_scoring_items(items)
+
+    @classmethod
+    def from_espn_scoring_items(cls, items: list[dict]) -> "ScoringSettings":
+        """
+        Build settings from ESPN scoringItems ({"statId", "points"}). Stats
+        the engine can't compute from a box score (e.g. ejections) are ignored.
+        """
+        weights: dict[str, float] = {}
+        bonus = {ESPN_DD: 0.0, ESPN_TD: 0.0, ESPN_QD: 0.0}
+        for item in items:
+            stat_id = int(item.get("statId", -1))
+            points = float(item.get("points", 0.0))
+            if stat_id in ESPN_STAT_COLUMNS:
+                col = ESPN_STAT_COLUMNS[stat_id]
+                weights[col] = weights.get(col, 0.0) + points
+            elif stat_id in ESPN_MISSED_STATS:
+                attempts, makes = ESPN_MISSED_STATS[stat_id]
+                weights[attempts] = weights.get(attempts, 0.0) + points
+                weights[makes] = weights.get(makes, 0.0) - points
+            elif stat_id in bonus:
+                bonus[stat_id] = points
+            else:
+                print(f"[ScoringSettings.from_espn_scoring_items] ignoring unsupported statId {stat_id} ({points} pts)")
+
+        return cls(weights, dd=bonus[ESPN_DD], td=bonus[ESPN_TD], qd=bonus[ESPN_QD])
+
+    def compile(self) -> CompiledScoring:
+        if self._compiled is None:
+            columns = tuple(c for c in STAT_COLUMNS if c in self.weights)
+            weights = np.array([self.weights[c] for c in columns], dtype=np.float64)
+            dd, td, qd = self.dd, self.dd + self.td, self.dd + self.td + self.qd
+            bonus_table = np.array([0.0, 0.0, dd, td, qd, qd])
+            self._compiled = CompiledScoring(columns, weights, bonus_table)
+        return self._compiled
+
+    def score(self, data, columns=None) -> np.ndarray:
+        """
+        Fantasy points for every row of `data`:
+          - a DataFrame (or dict of equal-length arrays) keyed by stat name;
+            missing stats count as 0
+          - a 2-D array, with `columns` naming its columns
+        """
+        c = self.compile()
+        col, n = _column_reader(data, columns)
+        stats = np.column_stack([col(k) for k in c.columns]) if c.columns else np.zeros((n, 0))
+        cats = np.column_stack([col(k) for k in BONUS_CATEGORIES])
+        n_double = (cats >= 10).sum(axis=1)
+        return stats @ c.weights + c.bonus_table[n_double]
+
+    def score_one(self, row) -> float:
+        """Score a single dict-like stat row (missing stats count as 0)."""
+        def g(key):
+            try:
+                val = float(row.get(key, 0) if hasattr(row, "get") else row[key])
+            except (KeyError, TypeError, ValueError):
+                return 0.0
+            return 0.0 if val != val else val
+
+        total = sum(w * g(k) for k, w in self.weights.items())
+        n_double = sum(1 for k in BONUS_CATEGORIES if g(k) >= 10)
+        return total + float(self.compile().bonus_table[n_double])
+
+
+# This league's rules (matches ESPN league 538595081)
+DEFAULT_SCORING = ScoringSettings(
+    {
+        "FGM": 2,
+        "FTM": 1,
+        "FTA": -1,
+        "FG3M": 1,   # 3PM
+        "REB": 1,
+        "AST": 2,
+        "STL": 4,
+        "BLK": 4,
+        "TOV": -2,   # Turnovers
+        "PTS": 1,
+    },
+    dd=5,
+    td=8,
+    qd=13,
+)
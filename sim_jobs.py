@@ -0,0 +1,250 @@
+# sim_jobs.py
+"""
+Asynchronous Monte Carlo jobs: the API enqueues a simulation and returns a
+job id; the trials run in a process pool so they don't hold the GIL of
+the server process.
+
+    job = sim_jobs.submit("custom", prepare, respond, trials=100000)
+    sim_jobs.get(job.id).to_dict()   # status, progress, (partial) result
+    sim_jobs.cancel(job.id)
+
+`prepare()` does the ESPN / NBA I/O on a dispatcher thread and returns
+(prepared, meta), where prepared is simulate_matchup.prepare_matchup()
+output (plain picklable data). The trials are split into chunks of
+SIM_JOB_CHUNK_TRIALS, each run in a worker with its own seed; counts are
+merged as chunks finish, which is what progress reports. `respond(meta,
+summary)` turns the final summary into the response body.
+
+At most SIM_JOB_MAX_PENDING jobs may be queued or running at once;
+submit() raises QueueFull beyond that. Cancelling drops every chunk that
+hasn't started (a chunk already running finishes and is discarded).
+"""
+
+import multiprocessing
+import os
+import random
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from background_jobs import FAILED, MAX_FINISHED_JOBS, QUEUED, RUNNING, SUCCEEDED
+from metrics import STAGE_SECONDS, count_trials
+from simulate_matchup import merge_sim_counts, simulate_prepared, summarize_sim_counts
+
+CANCELLED = "cancelled"
+
+SIM_JOB_WORKERS = int(os.environ.get("SIM_JOB_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+SIM_JOB_MAX_PENDING = int(os.environ.get("SIM_JOB_MAX_PENDING", "8"))
+SIM_JOB_MAX_TRIALS = int(os.environ.get("SIM_JOB_MAX_TRIALS", "500000"))
+SIM_JOB_CHUNK_TRIALS = int(os.environ.get("SIM_JOB_CHUNK_TRIALS", "5000"))
+# Threads doing the per-job setup I/O before trials are handed to the pool
+SIM_JOB_DISPATCHERS = int(os.environ.get("SIM_JOB_DISPATCHERS", "2"))
+
+
+class QueueFull(Exception):
+    pass
+
+
+def _run_chunk(prepared, trials: int, seed: int) -> tuple[dict, float]:
+    """
+    Worker entry point (module level so it pickles). Returns the counts and
+    the time spent, since metrics recorded in a worker never reach /metrics.
+    """
+    t0 = time.perf_counter()
+    counts = simulate_prepared(prepared, trials, seed=seed)
+    return counts, time.perf_counter() - t0
+
+
+class SimJob:
+    def __init__(self, name: str, trials: int, params: dict):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.trials = trials
+        self.params = params
+        self.seed = random.getrandbits(32)
+        self.status = QUEUED
+        self.counts = None
+        self.meta = None
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._futures = []
+
+    @property
+    def done(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED, CANCELLED)
+
+    @property
+    def completed_trials(self) -> int:
+        return self.counts["trials"] if self.counts else 0
+
+    def to_dict(self) -> dict:
+        out = {
+            "id": self.id,
+            "name": self.name,
+            "status": self.status,
+            "params": self.params,
+            "progress": {
+                "completed_trials": self.completed_trials,
+                "trials": self.trials,
+                "fraction": round(self.completed_trials / self.trials, 4) if self.trials else 0.0,
+            },
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        # Running estimate from the chunks finished so far
+        if self.status == RUNNING and self.counts:
+            out["partial"] = summarize_sim_counts(self.counts)
+        return out
+
+
+class SimJobManager:
+    def __init__(self, workers: int = SIM_JOB_WORKERS, max_pending: int = SIM_JOB_MAX_PENDING,
+                 chunk_trials: int = SIM_JOB_CHUNK_TRIALS):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.chunk_trials = chunk_trials
+        self._jobs: dict[str, SimJob] = {}
+        self._lock = threading.Lock()
+        self._pool = None
+        self._dispatch = ThreadPoolExecutor(max_workers=SIM_JOB_DISPATCHERS, thread_name_prefix="sim-dispatch")
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn: forking a threaded server process can deadlock the children
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
+
+    def _reset_pool(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    # ─── Lifecycle ────────────────────────────────────────────────────────────
+
+    def pending(self) -> int:
+        with self._lock:
+            return sum(1 for j in self._jobs.values() if not j.done)
+
+    def submit(self, name: str, prepare, respond, trials: int, params: dict | None = None) -> SimJob:
+        if not 1 <= trials <= SIM_JOB_MAX_TRIALS:
+            raise ValueError(f"trials must be between 1 and {SIM_JOB_MAX_TRIALS}")
+        with self._lock:
+            active = sum(1 for j in self._jobs.values() if not j.done)
+            if active >= self.max_pending:
+                raise QueueFull(f"{active} simulation jobs already queued or running")
+            job = SimJob(name, trials, params or {})
+            self._jobs[job.id] = job
+        self._dispatch.submit(self._start, job, prepare, respond)
+        return job
+
+    def _finish(self, job: SimJob, status: str, error: str | None = None):
+        with self._lock:
+            if job.done:
+                return
+            job.status = status
+            job.error = error
+            job.finished_at = time.time()
+        elapsed = job.finished_at - (job.started_at or job.created_at)
+        print(f"[SimJobManager] {job.name} {job.id} {status} ({job.completed_trials}/{job.trials} trials) "
+              f"in {elapsed:.1f}s")
+        self._prune()
+
+    def _start(self, job: SimJob, prepare, respond):
+        if job.done:  # cancelled while queued
+            return
+        job.status = RUNNING
+        job.started_at = time.time()
+        try:
+            prepared, job.meta = prepare()
+        except Exception as e:
+            traceback.print_exc()
+            self._finish(job, FAILED, str(e))
+            return
+
+        sizes = [self.chunk_trials] * (job.trials // self.chunk_trials)
+        if job.trials % self.chunk_trials:
+            sizes.append(job.trials % self.chunk_trials)
+
+        try:
+            pool = self._get_pool()
+            with self._lock:
+                if job.done:
+                    return
+                job._futures = [
+                    pool.submit(_run_chunk, prepared, n, (job.seed + i) & 0xFFFFFFFF)
+                    for i, n in enumerate(sizes)
+                ]
+        except BrokenProcessPool as e:
+            self._reset_pool()
+            self._finish(job, FAILED, f"worker pool broken: {e}")
+            return
+
+        for fut in job._futures:
+            fut.add_done_callback(lambda f, job=job: self._chunk_done(job, f, respond))
+
+    def _chunk_done(self, job: SimJob, fut, respond):
+        if fut.cancelled() or job.done:
+            return
+        err = fut.exception()
+        if err is not None:
+            if isinstance(err, BrokenProcessPool):
+                self._reset_pool()
+            self.cancel(job.id, status=FAILED, error=str(err) or type(err).__name__)
+            return
+
+        counts, seconds = fut.result()
+        STAGE_SECONDS.observe(seconds, stage="simulation")
+        count_trials("job", counts["trials"], seconds)
+        with self._lock:
+            job.counts = merge_sim_counts(job.counts, counts)
+            complete = job.counts["trials"] >= job.trials
+        if complete:
+            try:
+                job.result = respond(job.meta, summarize_sim_counts(job.counts))
+            except Exception as e:
+                traceback.print_exc()
+                self._finish(job, FAILED, str(e))
+                return
+            self._finish(job, SUCCEEDED)
+
+    def cancel(self, job_id: str, status: str = CANCELLED, error: str | None = None) -> SimJob | None:
+        """Stop a job; chunks not yet started are dropped. Finished jobs are left as they are."""
+        job = self._jobs.get(job_id)
+        if job is None or job.done:
+            return job
+        for fut in list(job._futures):
+            fut.cancel()
+        self._finish(job, status, error)
+        return job
+
+    def _prune(self):
+        with self._lock:
+            finished = [j for j in self._jobs.values() if j.done]
+            finished.sort(key=lambda j: j.finished_at)
+            for j in finished[:-MAX_FINISHED_JOBS]:
+                del self._jobs[j.id]
+
+    def get(self, job_id: str) -> SimJob | None:
+        return self._jobs.get(job_id)
+
+    def shutdown(self):
+        for job in list(self._jobs.values()):
+            self.cancel(job.id)
+        self._dispatch.shutdown(wait=False, cancel_futures=True)
+        self._reset_pool()
+
+
+sim_jobs = SimJobManager()
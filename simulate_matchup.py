@@ -1,16 +1,37 @@
 import json
+import os
 import random
+import sys
+import time
 from datetime import date
 from pathlib import Path
+from types import SimpleNamespace
 
-from fantasy import league
+import numpy as np
+
+from fantasy import LEAGUE_ID, league
 from nbaTest import teams_playing_on
-from live_odds import build_live_state_for_league, simulate_player_tonight_linear
+from upstream_client import espn
+from league_index import get_league_index, roster_signature
+from metrics import STAGE_SECONDS, count_trials, stage
+from result_store import content_key, file_version, result_store
+from odds_archive import record_result
+from live_odds import (
+    build_live_state_for_league,
+    simulate_player_tonight_linear,
+    project_live_rest_of_game,
+    LIVE_PROJECTION_MODES,
+)
 from datetime import datetime
 from zoneinfo import ZoneInfo
 
-def load_history(path="fantasy_player_history_2025-26.json"):
-    with open(path, "r", encoding="utf-8") as f:
+HISTORY_FILE = "fantasy_player_history_2025-26.json"
+# Part of every stored result's key; bump when simulation logic changes
+SIM_ENGINE_VERSION = 2
+
+
+def load_history(path=HISTORY_FILE):
+    with stage("history_load"), open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
 
@@ -59,36 +80,87 @@ def active_player_entries(team, history_map, game_day, playing_teams):
             entries.append((p, dist))
     return entries
 
-def team_score_once(player_entries, history_map, live_state=None):
+def team_score_once(player_entries, history_map, live_state=None, live_draws=None, trial=0, rng=None):
     """
     If live_state has an entry for this player, use live projection.
     Otherwise, sample from full-game history.
+
+    live_draws ({playerId: array of per-trial scores}) comes from
+    live_odds.project_live_rest_of_game and takes precedence over the
+    linear per-trial projection. rng is the run's random.Random (default:
+    the module-level generator).
     """
+    rng = rng or random
     total = 0.0
     for player, dist in player_entries:
-        if live_state is not None and player.playerId in live_state:
-            total += simulate_player_tonight_linear(player, history_map, live_state)
+        if live_draws is not None and player.playerId in live_draws:
+            total += live_draws[player.playerId][trial]
+        elif live_state is not None and player.playerId in live_state:
+            total += simulate_player_tonight_linear(player, history_map, live_state, rng=rng)
         else:
-            total += random.choice(dist)
+            total += rng.choice(dist)
     return total
 
 
 
-def monte_carlo(team1, team2, history_map, trials=50000, game_day=None, live_state=None):
+def prepare_matchup(team1, team2, history_map, game_day=None, live_state=None, live_mode="linear"):
+    """
+    Everything monte_carlo needs, reduced to plain picklable data (player
+    ids, their history and live state) so trials can run in another process.
+    """
     if game_day is None:
         game_day = date.today()
 
     playing_teams = teams_playing_on(game_day)
 
-    team1_entries = active_player_entries(team1, history_map, game_day, playing_teams)
-    team2_entries = active_player_entries(team2, history_map, game_day, playing_teams)
+    def slim(entries):
+        return [(SimpleNamespace(playerId=p.playerId, name=p.name), dist) for p, dist in entries]
+
+    with stage("entry_building"):
+        entries1 = slim(active_player_entries(team1, history_map, game_day, playing_teams))
+        entries2 = slim(active_player_entries(team2, history_map, game_day, playing_teams))
+    ids = {str(p.playerId) for p, _ in entries1 + entries2}
+    live_state = live_state or {}
+
+    return {
+        "team1_entries": entries1,
+        "team2_entries": entries2,
+        "history_map": {pid: history_map[pid] for pid in ids if pid in history_map},
+        "live_state": {p.playerId: live_state[p.playerId] for p, _ in entries1 + entries2
+                       if p.playerId in live_state},
+        "live_mode": live_mode,
+    }
+
+
+def simulate_prepared(prepared, trials, seed=None):
+    """
+    Run `trials` trials of a prepare_matchup() result. Returns raw counts
+    and sums, which add up across chunks (see merge_sim_counts).
+    """
+    t0 = time.perf_counter()
+    # A generator of our own: reseeding the global one would disturb (and be
+    # disturbed by) simulations running concurrently in other threads
+    rng = random.Random(seed)
+    team1_entries = prepared["team1_entries"]
+    team2_entries = prepared["team2_entries"]
+    history_map = prepared["history_map"]
+    live_state = prepared["live_state"] or None
+
+    # Stat-line mode draws every live player's rest-of-game in one batch up front
+    live_draws = None
+    if prepared["live_mode"] == "statline" and live_state:
+        live_players = [p for p, _ in team1_entries + team2_entries]
+        np_rng = np.random.default_rng(seed) if seed is not None else None
+        live_draws = project_live_rest_of_game(live_players, history_map, live_state, trials, rng=np_rng)
 
     t1_wins = t2_wins = ties = 0
     sum_t1 = sum_t2 = 0.0
 
-    for _ in range(trials):
-        s1 = team_score_once(team1_entries, history_map, live_state=live_state)
-        s2 = team_score_once(team2_entries, history_map, live_state=live_state)
+    for i in range(trials):
+        s1 = team_score_once(team1_entries, history_map, live_state=live_state,
+                             live_draws=live_draws, trial=i, rng=rng)
+        s2 = team_score_once(team2_entries, history_map, live_state=live_state,
+                             live_draws=live_draws, trial=i, rng=rng)
 
         sum_t1 += s1
         sum_t2 += s2
@@ -100,33 +172,115 @@ def monte_carlo(team1, team2, history_map, trials=50000, game_day=None, live_sta
         else:
             ties += 1
 
-    avg_t1 = sum_t1 / trials
-    avg_t2 = sum_t2 / trials
-
+    elapsed = time.perf_counter() - t0
+    STAGE_SECONDS.observe(elapsed, stage="simulation")
+    count_trials("daily", trials, elapsed)
     return {
         "team1_wins": t1_wins,
         "team2_wins": t2_wins,
         "ties": ties,
-        "p_team1": t1_wins / trials,
-        "p_team2": t2_wins / trials,
-        "p_tie": ties / trials,
-        "avg_team1": avg_t1,
-        "avg_team2": avg_t2,
+        "sum_team1": sum_t1,
+        "sum_team2": sum_t2,
+        "trials": trials,
+    }
+
+
+def merge_sim_counts(a, b):
+    if a is None:
+        return dict(b)
+    return {k: a[k] + b[k] for k in a}
+
+
+def summarize_sim_counts(counts):
+    trials = counts["trials"]
+    return {
+        "team1_wins": counts["team1_wins"],
+        "team2_wins": counts["team2_wins"],
+        "ties": counts["ties"],
+        "p_team1": counts["team1_wins"] / trials,
+        "p_team2": counts["team2_wins"] / trials,
+        "p_tie": counts["ties"] / trials,
+        "avg_team1": counts["sum_team1"] / trials,
+        "avg_team2": counts["sum_team2"] / trials,
         "trials": trials,
     }
+
+
+def monte_carlo(team1, team2, history_map, trials=50000, game_day=None, live_state=None,
+                live_mode="linear", seed=None):
+    prepared = prepare_matchup(team1, team2, history_map, game_day=game_day,
+                               live_state=live_state, live_mode=live_mode)
+    return summarize_sim_counts(simulate_prepared(prepared, trials, seed=seed))
+
+
 LA = ZoneInfo("America/Los_Angeles")
 
+# "linear" (P_curr + F * remaining) or "statline" (box-score aware)
+LIVE_PROJECTION_MODE = os.environ.get("LIVE_PROJECTION_MODE", "linear")
+
+
+def _resolve_live_mode(mode: str | None) -> str:
+    mode = mode or LIVE_PROJECTION_MODE
+    if mode not in LIVE_PROJECTION_MODES:
+        raise ValueError(f"Unknown live projection mode: {mode} (expected one of {LIVE_PROJECTION_MODES})")
+    return mode
 
-def run_today_matchups(trials: int = 20000):
+
+def _source_today(lg):
+    """'Today' in LA, or the snapshot's own game day when replaying one."""
+    if getattr(lg, "is_snapshot", False):
+        return datetime.combine(lg.game_day, datetime.min.time(), tzinfo=LA)
+    return datetime.now(tz=ZoneInfo("UTC")).astimezone(LA)
+
+
+def league_file(lg, name: str) -> Path:
+    """
+    Per-league name for a result file in the working directory. The default
+    league keeps the bare name (e.g. 2026-01-05_projScore.json); other
+    leagues get a "<league_id>_" prefix so they don't overwrite each other.
+    """
+    league_id = getattr(lg, "league_id", None)
+    if league_id is None or league_id == LEAGUE_ID:
+        return Path(name)
+    return Path(f"{league_id}_{name}")
+
+
+def league_inputs(lg, box_scores) -> dict:
+    """Roster and scoreboard state of a league, for result_store keys."""
+    return {
+        "league_id": getattr(lg, "league_id", None),
+        "teams": sorted((t.team_id, t.team_name, t.logo_url) for t in lg.teams),
+        "roster": roster_signature(lg),
+        "scores": [(b.home_team.team_id, b.home_score, b.away_team.team_id, b.away_score) for b in box_scores],
+    }
+
+
+def run_today_matchups(trials: int = 20000, mode: str | None = None, source=None, seed: int | None = None,
+                       live_state=None):
     """
     Runs Monte Carlo for all today's matchups and returns a list of dicts
     we can easily JSON-ify. If there are no live NBA games, persist the
     projected scores to a dated JSON file.
+
+    mode picks the live projection ("linear" or "statline"); defaults to
+    LIVE_PROJECTION_MODE. source is the league to simulate (default: the
+    live ESPN league; pass a league_snapshot.SnapshotLeague for replays,
+    which never writes the dated projection file). With seed the run is
+    reproducible. live_state is a build_live_state_for_league() result
+    the caller already has (weekly_sim); by default it is built here.
+
+    Results are kept in result_store under a hash of the roster, scores,
+    live state, history file, trials, seed, mode and SIM_ENGINE_VERSION;
+    a repeat of the same inputs skips the simulations. Every computed
+    (non-replay) result is appended to the league's odds_archive.
     """
+    mode = _resolve_live_mode(mode)
+    lg = source if source is not None else league
+    replay = getattr(lg, "is_snapshot", False)
     hist = load_history()
-    today = datetime.now(tz=ZoneInfo("UTC")).astimezone(LA)
+    today = _source_today(lg)
     date_str = today.date().isoformat()
-    proj_file = Path(f"{date_str}_projScore.json")
+    proj_file = league_file(lg, f"{date_str}_projScore.json")
     cached_proj_scores = None
     cached_win_probs = None
     if proj_file.exists():
@@ -139,14 +293,25 @@ def run_today_matchups(trials: int = 20000):
         except (OSError, json.JSONDecodeError) as exc:
             print(f"[run_today_matchups] failed to read cached projections: {exc}")
 
-    live_state = build_live_state_for_league(hist, game_day=today)
-    is_live = bool(live_state)  # live_state populated only when there are active games
-    box_scores = league.box_scores(matchup_total=False)
+    if live_state is None:
+        live_state = build_live_state_for_league(hist, game_day=today, mode=mode, source=lg)
+    # live_state also holds today's finished games; only in-progress ones make it live
+    is_live = any(state.get("game_status") == 2 for state in live_state.values())
+    box_scores = espn.call(lg.box_scores, matchup_total=False)
+
+    store_key = content_key(
+        kind="today", date=date_str, trials=trials, seed=seed, mode=mode, engine=SIM_ENGINE_VERSION,
+        history=file_version(HISTORY_FILE), live=live_state, **league_inputs(lg, box_scores),
+    )
+    stored = result_store.get(store_key)
+    if stored is not None:
+        print(f"[run_today_matchups] result store hit {store_key[:12]}")
+        return stored
 
     results_list = []
     current_scores = {}
 
-    for box in box_scores:
+    for i, box in enumerate(box_scores):
         home_team = box.home_team
         away_team = box.away_team
         home_current = box.home_score
@@ -159,6 +324,8 @@ def run_today_matchups(trials: int = 20000):
             trials=trials,
             game_day=today,
             live_state=live_state,
+            live_mode=mode,
+            seed=None if seed is None else seed + i,
         )
 
         results_list.append({
@@ -195,7 +362,11 @@ def run_today_matchups(trials: int = 20000):
         "win_probs": win_probs,
     }
 
-    if not is_live:
+    if not replay:
+        record_result(lg, result, "today", writing=None if is_live else proj_file)
+    if replay:
+        print(f"[run_today_matchups] replayed snapshot {lg.snapshot_version}; not saving projections.")
+    elif not is_live:
         filename = proj_file.name
         try:
             with open(filename, "w", encoding="utf-8") as f:
@@ -205,56 +376,75 @@ def run_today_matchups(trials: int = 20000):
             print(f"[run_today_matchups] could not write {filename}: {exc}")
     else:
         print(f"[run_today_matchups] NBA games are live; not saving projections.")
+    result_store.put(store_key, result, kind="today")
     return result
 
 
-def run_custom_matchup(team1_name: str, team2_name: str, trials: int = 20000):
+def prepare_custom_matchup(team1_name: str, team2_name: str, mode: str | None = None, source=None):
     """
-    Runs Monte Carlo for a specific pair of fantasy teams by name.
+    Do all the ESPN / NBA I/O for a custom matchup up front. Returns
+    (prepared, meta): prepared feeds simulate_prepared() (and is picklable),
+    meta carries the team names / logos / date for the response.
     """
+    mode = _resolve_live_mode(mode)
+    lg = source if source is not None else league
     hist = load_history()
-    today = date.today()
-    live_state = build_live_state_for_league(hist, game_day=today)
-
-    def find_team(name: str):
-        for t in league.teams:
-            if t.team_name.lower() == name.lower():
-                return t
-        return None
+    today = _source_today(lg).date()
 
-    team1 = find_team(team1_name)
-    team2 = find_team(team2_name)
+    idx = get_league_index(lg)
+    team1 = idx.team(team1_name, case_insensitive=True)
+    team2 = idx.team(team2_name, case_insensitive=True)
 
     if team1 is None or team2 is None:
         missing = [name for name, team in ((team1_name, team1), (team2_name, team2)) if team is None]
         raise ValueError(f"Team(s) not found: {', '.join(missing)}")
 
-    res = monte_carlo(
-        team1,
-        team2,
-        hist,
-        trials=trials,
-        game_day=today,
-        live_state=live_state,
-    )
-
-    return {
+    live_state = build_live_state_for_league(hist, game_day=today, mode=mode, source=lg)
+    prepared = prepare_matchup(team1, team2, hist, game_day=today, live_state=live_state, live_mode=mode)
+    meta = {
         "team1": team1.team_name,
         "team2": team2.team_name,
+        "team1_url": team1.logo_url,
+        "team2_url": team2.logo_url,
+        "date": today.isoformat(),
+    }
+    return prepared, meta
+
+
+def custom_matchup_response(meta, res):
+    return {
+        "team1": meta["team1"],
+        "team2": meta["team2"],
         "team1_win_prob": res["p_team1"],
         "team2_win_prob": res["p_team2"],
         "tie_prob": res["p_tie"],
         "team1_avg": res["avg_team1"],
         "team2_avg": res["avg_team2"],
         "trials": res["trials"],
-        "team1_url": team1.logo_url,
-        "team2_url": team2.logo_url,
-        "date": today.isoformat(),
+        "team1_url": meta["team1_url"],
+        "team2_url": meta["team2_url"],
+        "date": meta["date"],
     }
 
 
+def run_custom_matchup(team1_name: str, team2_name: str, trials: int = 20000, mode: str | None = None,
+                       source=None):
+    """
+    Runs Monte Carlo for a specific pair of fantasy teams by name.
+    """
+    prepared, meta = prepare_custom_matchup(team1_name, team2_name, mode=mode, source=source)
+    res = summarize_sim_counts(simulate_prepared(prepared, trials))
+    return custom_matchup_response(meta, res)
+
+
 if __name__ == "__main__":
-    data = run_today_matchups(trials=20000)
+    # Optional: python simulate_matchup.py snapshots/espn_..._spNNN.json.gz
+    snapshot = None
+    if len(sys.argv) > 1:
+        from league_snapshot import load_snapshot
+        snapshot = load_snapshot(sys.argv[1])
+
+    data = run_today_matchups(trials=20000, source=snapshot)
 
     print(f"Simulating today's matchups ({data['date']})...")
 
@@ -0,0 +1,303 @@
+# stat_cube.py
+"""
+Raw per-game counting stats for every tracked player, stored as a compact
+int16 cube so fantasy points can be rederived for any scoring rules
+without refetching game logs from stats.nba.com.
+
+    cube = StatCube.load(cube_path_for(HISTORY_PATH))
+    cube.upsert_frame(df)                  # PlayerGameLog / LeagueGameLog rows
+    pts = cube.fantasy_points(scoring)     # players × games float32, NaN padding
+    cube.save(path)
+
+Layout (one .npz next to the history JSON):
+
+    nba_ids    [P]         int64
+    counts     [P]         int16   games stored per player
+    stats      [P, G, S]   int16   S = CUBE_STATS, zero padded past counts
+    game_ids   [P, G]      str
+    dates      [P, G]      datetime64[D]
+    opponents  [P, G]      str     matchup text, e.g. "UTA vs. LAL"
+
+Fantasy points are cached per ScoringSettings.ruleset_hash until the cube
+changes.
+"""
+
+import os
+from pathlib import Path
+
+import numpy as np
+
+from scoring import DEFAULT_SCORING, STAT_COLUMNS, ScoringSettings
+
+CUBE_STATS = STAT_COLUMNS + ("MIN",)
+CUBE_FORMAT_VERSION = 1
+INITIAL_GAME_SLOTS = 96  # a full regular season fits without growing
+
+
+def cube_path_for(history_path) -> Path:
+    history_path = Path(history_path)
+    return history_path.with_name(history_path.stem + ".cube.npz")
+
+
+def _frame_column(df, *names):
+    for name in names:
+        if name in df.columns:
+            return df[name]
+    return None
+
+
+def parse_minutes(value) -> float:
+    """
+    Box score MIN comes back as "MM:SS", "MM.000000:SS", a plain number,
+    or None for players who haven't checked in.
+    """
+    if value is None:
+        return 0.0
+    if isinstance(value, (int, float)):
+        return 0.0 if value != value else float(value)  # NaN check
+    text = str(value)
+    if ":" in text:
+        mins, secs = text.split(":", 1)
+        try:
+            return float(mins) + float(secs) / 60.0
+        except ValueError:
+            return 0.0
+    try:
+        return float(text)
+    except ValueError:
+        return 0.0
+
+
+def frame_stat_matrix(df) -> np.ndarray:
+    """
+    [rows, CUBE_STATS] int16 from a game-log or box-score DataFrame
+    (missing stats = 0; MIN may be "MM:SS" text).
+    """
+    out = np.zeros((len(df), len(CUBE_STATS)), dtype=np.int16)
+    for j, stat in enumerate(CUBE_STATS):
+        if stat == "MIN" and stat in df.columns:
+            vals = np.array([parse_minutes(v) for v in df[stat]], dtype=np.float64)
+        elif stat in df.columns:
+            vals = np.nan_to_num(np.asarray(df[stat].astype("float64")))
+        else:
+            continue
+        out[:, j] = np.clip(np.rint(vals), -32768, 32767).astype(np.int16)
+    return out
+
+
+class StatCube:
+    def __init__(self):
+        self.nba_ids = np.zeros(0, dtype=np.int64)
+        self.counts = np.zeros(0, dtype=np.int16)
+        self.stats = np.zeros((0, INITIAL_GAME_SLOTS, len(CUBE_STATS)), dtype=np.int16)
+        self.game_ids = np.zeros((0, INITIAL_GAME_SLOTS), dtype="<U12")
+        self.dates = np.full((0, INITIAL_GAME_SLOTS), np.datetime64("NaT"), dtype="datetime64[D]")
+        self.opponents = np.zeros((0, INITIAL_GAME_SLOTS), dtype="<U16")
+
+        self.version = 0
+        self._row_of: dict[int, int] = {}
+        self._slots: dict[int, dict[str, int]] = {}
+        self._points_cache: dict[str, tuple[int, np.ndarray]] = {}
+
+    # ─── Persistence ──────────────────────────────────────────────────────────
+
+    @classmethod
+    def load(cls, path) -> "StatCube":
+        """Load a saved cube, or return an empty one if the file doesn't exist."""
+        cube = cls()
+        path = Path(path)
+        if not path.exists():
+            return cube
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["format_version"]) > CUBE_FORMAT_VERSION:
+                raise ValueError(f"Unsupported stat cube format: {int(data['format_version'])}")
+            stored = [str(s) for s in data["stat_names"]]
+            cube.nba_ids = data["nba_ids"]
+            cube.counts = data["counts"]
+            cube.game_ids = data["game_ids"]
+            cube.dates = data["dates"]
+            cube.opponents = data["opponents"]
+            # Older files may lack stats added since; they load as 0
+            stats = np.zeros(cube.game_ids.shape + (len(CUBE_STATS),), dtype=np.int16)
+            for j, stat in enumerate(CUBE_STATS):
+                if stat in stored:
+                    stats[:, :, j] = data["stats"][:, :, stored.index(stat)]
+            cube.stats = stats
+        cube._reindex()
+        print(f"[StatCube.load] {len(cube.nba_ids)} players, {int(cube.counts.sum())} games from {path}")
+        return cube
+
+    def save(self, path) -> None:
+        path = Path(path)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp.npz")
+        np.savez_compressed(
+            tmp,
+            format_version=np.int16(CUBE_FORMAT_VERSION),
+            stat_names=np.array(CUBE_STATS),
+            nba_ids=self.nba_ids,
+            counts=self.counts,
+            stats=self.stats,
+            game_ids=self.game_ids,
+            dates=self.dates,
+            opponents=self.opponents,
+        )
+        os.replace(tmp, path)
+        print(f"[StatCube.save] {len(self.nba_ids)} players → {path} ({path.stat().st_size} bytes)")
+
+    def _reindex(self):
+        self._row_of = {int(pid): i for i, pid in enumerate(self.nba_ids)}
+        self._slots = {}
+
+    # ─── Writes ───────────────────────────────────────────────────────────────
+
+    def _row(self, nba_id: int) -> int:
+        row = self._row_of.get(nba_id)
+        if row is not None:
+            return row
+        g = self.stats.shape[1]
+        self.nba_ids = np.append(self.nba_ids, np.int64(nba_id))
+        self.counts = np.append(self.counts, np.int16(0))
+        self.stats = np.concatenate([self.stats, np.zeros((1, g, len(CUBE_STATS)), dtype=np.int16)])
+        self.game_ids = np.concatenate([self.game_ids, np.zeros((1, g), dtype=self.game_ids.dtype)])
+        self.dates = np.concatenate([self.dates, np.full((1, g), np.datetime64("NaT"), dtype="datetime64[D]")])
+        self.opponents = np.concatenate([self.opponents, np.zeros((1, g), dtype=self.opponents.dtype)])
+        row = len(self.nba_ids) - 1
+        self._row_of[nba_id] = row
+        return row
+
+    def _grow_games(self, needed: int):
+        g = self.stats.shape[1]
+        if needed <= g:
+            return
+        extra = max(needed, g * 2) - g
+        p = len(self.nba_ids)
+        self.stats = np.concatenate([self.stats, np.zeros((p, extra, len(CUBE_STATS)), dtype=np.int16)], axis=1)
+        self.game_ids = np.concatenate([self.game_ids, np.zeros((p, extra), dtype=self.game_ids.dtype)], axis=1)
+        self.dates = np.concatenate([self.dates, np.full((p, extra), np.datetime64("NaT"), dtype="datetime64[D]")], axis=1)
+        self.opponents = np.concatenate([self.opponents, np.zeros((p, extra), dtype=self.opponents.dtype)], axis=1)
+
+    def _slot_map(self, row: int) -> dict[str, int]:
+        slots = self._slots.get(row)
+        if slots is None:
+            n = int(self.counts[row])
+            slots = self._slots[row] = {str(g): i for i, g in enumerate(self.game_ids[row, :n])}
+        return slots
+
+    def upsert_rows(self, nba_id: int, game_ids, dates, opponents, matrix) -> int:
+        """
+        Store one player's games (matrix is [games, CUBE_STATS]), overwriting
+        any game id already present. Returns the number of new games stored.
+        """
+        row = self._row(int(nba_id))
+        slots = self._slot_map(row)
+        dates = np.asarray(dates).astype("datetime64[D]")
+
+        added = 0
+        for i, game_id in enumerate(game_ids):
+            game_id = str(game_id)
+            slot = slots.get(game_id)
+            if slot is None:
+                slot = int(self.counts[row])
+                self._grow_games(slot + 1)
+                slots[game_id] = slot
+                self.counts[row] = slot + 1
+                added += 1
+            self.stats[row, slot] = matrix[i]
+            self.game_ids[row, slot] = game_id
+            self.dates[row, slot] = dates[i]
+            self.opponents[row, slot] = opponents[i]
+
+        self.version += 1
+        return added
+
+    def upsert_frame(self, df) -> int:
+        """Store every row of a PlayerGameLog / LeagueGameLog DataFrame."""
+        if df is None or len(df) == 0:
+            return 0
+        player_col = _frame_column(df, "PLAYER_ID", "Player_ID")
+        game_col = _frame_column(df, "GAME_ID", "Game_ID")
+        if player_col is None or game_col is None:
+            raise ValueError("game log frame needs PLAYER_ID and GAME_ID columns")
+
+        matrix = frame_stat_matrix(df)
+        dates = np.asarray(df["GAME_DATE"]).astype("datetime64[D]")
+        matchups = np.array(df["MATCHUP"].astype(str).tolist() if "MATCHUP" in df.columns else [""] * len(df))
+        player_ids = np.asarray(player_col.tolist(), dtype=np.int64)
+        game_ids = np.array(game_col.astype(str).tolist())
+
+        added = 0
+        for nba_id in np.unique(player_ids):
+            mask = player_ids == nba_id
+            added += self.upsert_rows(int(nba_id), game_ids[mask], dates[mask], matchups[mask], matrix[mask])
+        return added
+
+    # ─── Reads ────────────────────────────────────────────────────────────────
+
+    def game_ids_for(self, nba_id: int) -> set[str]:
+        """Game ids stored for one player (empty if the cube doesn't know them)."""
+        row = self._row_of.get(int(nba_id))
+        return set(self._slot_map(row)) if row is not None else set()
+
+    def fantasy_points(self, scoring: ScoringSettings | None = None) -> np.ndarray:
+        """[players, games] float32 fantasy points (NaN past each player's count)."""
+        scoring = scoring or DEFAULT_SCORING
+        key = scoring.ruleset_hash
+        cached = self._points_cache.get(key)
+        if cached is not None and cached[0] == self.version:
+            return cached[1]
+
+        p, g, s = self.stats.shape
+        pts = scoring.score(self.stats.reshape(p * g, s), CUBE_STATS).reshape(p, g).astype(np.float32)
+        pts[np.arange(g)[None, :] >= self.counts[:, None]] = np.nan
+        self._points_cache[key] = (self.version, pts)
+        return pts
+
+    def player_history(self, nba_id: int, scoring: ScoringSettings | None = None) -> list[dict]:
+        """History rows (same shape as the history JSON) for one player."""
+        row = self._row_of.get(int(nba_id))
+        if row is None:
+            return []
+        n = int(self.counts[row])
+        pts = self.fantasy_points(scoring)[row, :n]
+        order = np.argsort(self.dates[row, :n], kind="stable")
+        return [
+            {
+                "date": str(self.dates[row, i]),
+                "fantasy_points": float(pts[i]),
+                "opponent": str(self.opponents[row, i]),
+                "game_id": str(self.game_ids[row, i]),
+            }
+            for i in order
+        ]
+
+
+def rescore_history(history: dict, cube: StatCube, scoring: ScoringSettings) -> tuple[int, int]:
+    """
+    Rewrite fantasy_points in a history map from the cube's raw stats under
+    `scoring`. Only rows whose game_id is in the cube are touched; rows it
+    has no raw stats for (and players it doesn't know) keep their stored
+    points. `python history_backfill.py seed-cube` fills the cube with the
+    games already in the history, so the whole season is covered.
+
+    Returns (rows_changed, rows_without_raw_stats).
+    """
+    pts = cube.fantasy_points(scoring)
+    changed = uncovered = 0
+    for entry in history.values():
+        rows = entry.get("history", [])
+        nba_id = entry.get("nba_player_id")
+        row = cube._row_of.get(int(nba_id)) if nba_id is not None else None
+        if row is None:
+            uncovered += len(rows)
+            continue
+        slots = cube._slot_map(row)
+        for h in rows:
+            slot = slots.get(str(h["game_id"])) if h.get("game_id") else None
+            if slot is None:
+                uncovered += 1
+                continue
+            points = float(pts[row, slot])
+            if h.get("fantasy_points") != points:
+                h["fantasy_points"] = points
+                changed += 1
+    return changed, uncovered
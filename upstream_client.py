@@ -0,0 +1,283 @@
+"""
+Shared client layer for everything that talks to ESPN or stats.nba.com.
+
+Instead of sprinkling time.sleep() between calls, every upstream request goes
+through an UpstreamClient:
+
+  - a token bucket per upstream (steady rate + small burst)
+  - a semaphore bounding how many calls are in flight at once
+  - retry with jittered exponential backoff on transient failures
+    (connection errors, timeouts, HTTP 429 / 5xx); anything else raises
+    straight away
+  - one pooled requests.Session per upstream (nba_api is pointed at it)
+  - asyncio entry points (acall / agather) that never block the event loop
+
+Usage:
+    from upstream_client import nba_stats, espn
+
+    df = nba_stats.call(lambda: PlayerGameLog(player_id=pid).get_data_frames()[0])
+    boxes = espn.call(league.box_scores, matchup_total=False)
+
+    rows = await nba_stats.agather([(fetch_one, (pid,)) for pid in ids])
+
+Rates can be tuned per upstream via env vars, e.g.
+  NBA_STATS_RATE=0.5  NBA_STATS_BURST=1  NBA_STATS_CONCURRENCY=2
+"""
+
+import asyncio
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Callable, Iterable
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import STAGE_SECONDS, UPSTREAM_RETRIES
+
+try:
+    from espn_api.requests.espn_requests import ESPNUnknownError
+except ImportError:  # demo mode runs without espn_api
+    ESPNUnknownError = None
+
+
+# ─── Retry policy ─────────────────────────────────────────────────────────────
+
+# espn_api reports non-200 responses other than 401 / 404 as "ESPN returned an HTTP 503"
+_ESPN_STATUS = re.compile(r"HTTP (\d{3})")
+
+
+def _retryable_status(status: int) -> bool:
+    return status == 429 or 500 <= status < 600
+
+
+def is_transient(exc: BaseException) -> bool:
+    """
+    True for failures worth retrying: connection errors, timeouts and HTTP
+    429 / 5xx. Access-denied / invalid-league errors, other 4xx and
+    programming errors are permanent.
+    """
+    if isinstance(exc, (requests.ConnectionError, requests.Timeout, ConnectionError, TimeoutError)):
+        return True
+    if isinstance(exc, requests.HTTPError):
+        return exc.response is not None and _retryable_status(exc.response.status_code)
+    if ESPNUnknownError is not None and isinstance(exc, ESPNUnknownError):
+        m = _ESPN_STATUS.search(str(exc))
+        return m is not None and _retryable_status(int(m.group(1)))
+    return False
+
+
+# ─── Token bucket ─────────────────────────────────────────────────────────────
+
+class TokenBucket:
+    """
+    Classic token bucket: `rate` tokens/second refill, up to `burst` stored.
+    Thread-safe; acquire() blocks, aacquire() awaits.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token and return how long the caller must wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1.0
+            if self._tokens >= 0:
+                return 0.0
+            # Negative balance = queue position; each caller waits its turn
+            return -self._tokens / self.rate
+
+    def acquire(self) -> None:
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def aacquire(self) -> None:
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+# ─── Client ───────────────────────────────────────────────────────────────────
+
+class UpstreamClient:
+    """Rate-limited, retrying, bounded-concurrency gateway to one upstream."""
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        burst: int = 1,
+        concurrency: int = 4,
+        max_retries: int = 3,
+        backoff_base: float = 1.0,
+        backoff_cap: float = 30.0,
+        timeout: float = 30.0,
+        stage: str | None = None,
+    ):
+        self.name = name
+        # Pipeline stage this upstream's calls are timed under (metrics.STAGE_SECONDS)
+        self.stage = stage or f"{name}_fetch"
+        self.bucket = TokenBucket(rate, burst)
+        self.concurrency = max(1, int(concurrency))
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.timeout = timeout
+
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        self._session: requests.Session | None = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self) -> requests.Session:
+        """Persistent pooled session for this upstream (created on first use)."""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    s = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=self.concurrency, pool_maxsize=self.concurrency)
+                    s.mount("https://", adapter)
+                    s.mount("http://", adapter)
+                    self._session = s
+        return self._session
+
+    def _backoff(self, attempt: int) -> float:
+        # "Full jitter": uniform in [0, min(cap, base * 2^attempt)]
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+    def _attempt(self, fn: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+        """One try of fn, holding a concurrency slot for exactly its duration."""
+        with self._slots:
+            return fn(*args, **kwargs)
+
+    def _retry_delay(self, exc: Exception, attempt: int) -> float | None:
+        """Backoff before the next attempt, or None when exc should be raised."""
+        if attempt >= self.max_retries or not is_transient(exc):
+            return None
+        delay = self._backoff(attempt)
+        UPSTREAM_RETRIES.inc(upstream=self.name)
+        print(f"[upstream:{self.name}] {type(exc).__name__}: {exc} — retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+        return delay
+
+    def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Run fn(*args, **kwargs) under this upstream's rate limit and
+        concurrency cap, retrying transient failures (is_transient) with
+        jittered backoff.
+        """
+        with STAGE_SECONDS.time(stage=self.stage):
+            attempt = 0
+            while True:
+                self.bucket.acquire()
+                try:
+                    return self._attempt(fn, args, kwargs)
+                except Exception as e:
+                    delay = self._retry_delay(e, attempt)
+                    if delay is None:
+                        raise
+                time.sleep(delay)
+                attempt += 1
+
+    async def acall(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Async entry point. The blocking fn runs in a worker thread; waiting
+        for tokens and backoff happens on the event loop.
+
+        The slot is taken and released inside the worker thread, so a
+        cancelled caller never leaks it: the thread finishes its attempt
+        and gives the slot back on its own.
+        """
+        with STAGE_SECONDS.time(stage=self.stage):
+            attempt = 0
+            while True:
+                await self.bucket.aacquire()
+                try:
+                    return await asyncio.to_thread(self._attempt, fn, args, kwargs)
+                except Exception as e:
+                    delay = self._retry_delay(e, attempt)
+                    if delay is None:
+                        raise
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    async def agather(self, calls: Iterable[tuple], return_exceptions: bool = False) -> list:
+        """
+        Run many (fn, args[, kwargs]) tuples concurrently, bounded by the
+        concurrency cap and paced by the token bucket. Results keep input order.
+        """
+        tasks = []
+        for c in calls:
+            fn, args = c[0], c[1] if len(c) > 1 else ()
+            kwargs = c[2] if len(c) > 2 else {}
+            tasks.append(self.acall(fn, *args, **kwargs))
+        return await asyncio.gather(*tasks, return_exceptions=return_exceptions)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """GET through the pooled session, rate-limited and retried."""
+        kwargs.setdefault("timeout", self.timeout)
+
+        def _get():
+            resp = self.session.get(url, **kwargs)
+            if resp.status_code == 429 or resp.status_code >= 500:
+                resp.raise_for_status()
+            return resp
+
+        return self.call(_get)
+
+
+# ─── Shared instances ─────────────────────────────────────────────────────────
+
+def _env_float(key: str, default: float) -> float:
+    return float(os.environ.get(key, default))
+
+
+def _client_from_env(name: str, prefix: str, rate: float, burst: int, concurrency: int,
+                     stage: str | None = None) -> UpstreamClient:
+    return UpstreamClient(
+        name,
+        rate=_env_float(f"{prefix}_RATE", rate),
+        burst=int(_env_float(f"{prefix}_BURST", burst)),
+        concurrency=int(_env_float(f"{prefix}_CONCURRENCY", concurrency)),
+        max_retries=int(_env_float(f"{prefix}_MAX_RETRIES", 3)),
+        stage=stage,
+    )
+
+
+# stats.nba.com is the touchy one: ~1 request every 2s is what it tolerates
+nba_stats = _client_from_env("nba_stats", "NBA_STATS", rate=0.5, burst=1, concurrency=2)
+# cdn.nba.com live JSON (scoreboard / live box scores) is a static CDN
+nba_live = _client_from_env("nba_live", "NBA_LIVE", rate=4.0, burst=4, concurrency=4, stage="scoreboard_fetch")
+# ESPN fantasy API (espn_api League calls)
+espn = _client_from_env("espn", "ESPN", rate=5.0, burst=5, concurrency=4, stage="espn_fetch")
+
+UPSTREAMS = {c.name: c for c in (nba_stats, nba_live, espn)}
+
+
+def _install_nba_api_session() -> None:
+    """
+    Point nba_api's HTTP layer at our pooled sessions so its endpoint
+    classes reuse connections instead of opening one per request.
+    Older nba_api versions without set_session just keep their default.
+    """
+    try:
+        from nba_api.stats.library.http import NBAStatsHTTP
+        from nba_api.live.nba.library.http import NBALiveHTTP
+    except ImportError:
+        return
+    if hasattr(NBAStatsHTTP, "set_session"):
+        NBAStatsHTTP.set_session(nba_stats.session)
+    if hasattr(NBALiveHTTP, "set_session"):
+        NBALiveHTTP.set_session(nba_live.session)
+
+
+_install_nba_api_session()
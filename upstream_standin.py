@@ -0,0 +1,248 @@
+# upstream_standin.py
+"""
+Record/replay stand-in for ESPN and stats.nba.com, for offline end-to-end
+runs and load tests of api_server.
+
+1) Record real responses into fixtures (needs network once):
+
+       python upstream_standin.py record
+
+   This runs today's / weekly / one custom matchup pipeline with every
+   requests call captured into fixtures/upstream/<host>/<key>.json.
+
+2) Serve them from a local HTTP process, with optional latency and
+   error injection:
+
+       python upstream_standin.py serve --port 8900 --latency-ms 120 --jitter-ms 60 --error-rate 0.02
+
+3) Point the API at it:
+
+       UPSTREAM_STANDIN_URL=http://127.0.0.1:8900 uvicorn api_server:app
+
+   api_server then rewrites every request to a known upstream host to
+   <standin>/<host>/<path>?<query>, so espn_api and nba_api are unchanged.
+
+Drive load with load_test.py.
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+FIXTURE_DIR = Path("fixtures/upstream")
+
+UPSTREAM_HOSTS = {
+    "lm-api-reads.fantasy.espn.com",
+    "fantasy.espn.com",
+    "stats.nba.com",
+    "cdn.nba.com",
+}
+
+# ESPN varies responses on this header (same URL, different filter)
+KEY_HEADERS = ("x-fantasy-filter",)
+
+
+# ─── Fixture keys / storage ───────────────────────────────────────────────────
+
+def fixture_key(method: str, host: str, path: str, query: str, headers: dict) -> str:
+    """Stable key for a request: method, host, path, sorted query and KEY_HEADERS."""
+    params = sorted(parse_qsl(query, keep_blank_values=True))
+    lowered = {k.lower(): v for k, v in (headers or {}).items()}
+    extra = "|".join(f"{h}={lowered.get(h, '')}" for h in KEY_HEADERS)
+    raw = f"{method.upper()} {host}{path}?{urlencode(params)} {extra}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def fixture_path(host: str, key: str, directory: Path = FIXTURE_DIR) -> Path:
+    return Path(directory) / host / f"{key}.json"
+
+
+def save_fixture(method: str, url: str, headers: dict, status: int, content_type: str, body: str,
+                 directory: Path = FIXTURE_DIR) -> Path:
+    parts = urlsplit(url)
+    key = fixture_key(method, parts.hostname, parts.path, parts.query, headers)
+    path = fixture_path(parts.hostname, key, directory)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({
+        "method": method.upper(),
+        "url": url,
+        "status": status,
+        "content_type": content_type,
+        "body": body,
+    }), encoding="utf-8")
+    return path
+
+
+# ─── Client-side hooks (requests) ─────────────────────────────────────────────
+
+_original_send = None
+
+
+def _patch_send(wrapper):
+    import requests
+
+    global _original_send
+    if _original_send is None:
+        _original_send = requests.Session.send
+    requests.Session.send = wrapper
+
+
+def start_recording(directory: Path = FIXTURE_DIR) -> None:
+    """Capture every response from an upstream host into the fixture directory."""
+    def send(self, request, **kwargs):
+        resp = _original_send(self, request, **kwargs)
+        host = urlsplit(request.url).hostname
+        if host in UPSTREAM_HOSTS and resp.status_code < 500:
+            save_fixture(
+                request.method, request.url, dict(request.headers), resp.status_code,
+                resp.headers.get("Content-Type", "application/json"), resp.text, directory,
+            )
+        return resp
+
+    _patch_send(send)
+    print(f"[upstream_standin] recording upstream responses into {directory}")
+
+
+def install_standin_redirect(base_url: str) -> None:
+    """Send every request for an upstream host to the stand-in server instead."""
+    base_url = base_url.rstrip("/")
+
+    def send(self, request, **kwargs):
+        parts = urlsplit(request.url)
+        if parts.hostname in UPSTREAM_HOSTS:
+            query = f"?{parts.query}" if parts.query else ""
+            request.url = f"{base_url}/{parts.hostname}{parts.path}{query}"
+        return _original_send(self, request, **kwargs)
+
+    _patch_send(send)
+    print(f"[upstream_standin] redirecting upstream calls to {base_url}")
+
+
+# ─── Stand-in server ──────────────────────────────────────────────────────────
+
+class StandinConfig:
+    def __init__(self, directory: Path, latency_ms: float, jitter_ms: float, error_rate: float):
+        self.directory = Path(directory)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.hits = 0
+        self.misses = 0
+        self.injected_errors = 0
+        self.lock = threading.Lock()
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    config: StandinConfig = None  # set by serve()
+
+    def _reply(self, status: int, content_type: str, body: str):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _handle(self):
+        cfg = self.config
+        parts = urlsplit(self.path)
+        host, _, rest = parts.path.lstrip("/").partition("/")
+
+        delay = cfg.latency_ms + random.uniform(0, cfg.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+
+        if cfg.error_rate > 0 and random.random() < cfg.error_rate:
+            with cfg.lock:
+                cfg.injected_errors += 1
+            return self._reply(503, "application/json", '{"error": "injected"}')
+
+        key = fixture_key(self.command, host, "/" + rest, parts.query, dict(self.headers))
+        path = fixture_path(host, key, cfg.directory)
+        if not path.exists():
+            with cfg.lock:
+                cfg.misses += 1
+            print(f"[upstream_standin] no fixture for {self.command} {host}/{rest}?{parts.query}")
+            return self._reply(404, "application/json", '{"error": "no fixture"}')
+
+        fixture = json.loads(path.read_text(encoding="utf-8"))
+        with cfg.lock:
+            cfg.hits += 1
+        return self._reply(fixture["status"], fixture["content_type"], fixture["body"])
+
+    def do_GET(self):
+        if self.path == "/_standin/stats":
+            cfg = self.config
+            return self._reply(200, "application/json", json.dumps({
+                "hits": cfg.hits, "misses": cfg.misses, "injected_errors": cfg.injected_errors,
+            }))
+        self._handle()
+
+    def do_POST(self):
+        self._handle()
+
+    def log_message(self, fmt, *args):
+        pass  # per-request logging would dominate load tests
+
+
+def serve(port: int = 8900, directory: Path = FIXTURE_DIR, latency_ms: float = 0.0,
+          jitter_ms: float = 0.0, error_rate: float = 0.0, host: str = "127.0.0.1"):
+    StandinHandler.config = StandinConfig(directory, latency_ms, jitter_ms, error_rate)
+    server = ThreadingHTTPServer((host, port), StandinHandler)
+    print(
+        f"[upstream_standin] serving {directory} on http://{host}:{port} "
+        f"(latency {latency_ms}±{jitter_ms}ms, error rate {error_rate:.1%})"
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def record(directory: Path = FIXTURE_DIR, trials: int = 500):
+    """Run the main pipelines once against the real upstreams, capturing fixtures."""
+    start_recording(directory)
+
+    from fantasy import league
+    from simulate_matchup import run_today_matchups, run_custom_matchup
+    from weekly_sim import run_weekly_matchups
+
+    run_today_matchups(trials=trials)
+    run_weekly_matchups(trials=trials, save=False)
+    teams = league.teams
+    if len(teams) >= 2:
+        run_custom_matchup(teams[0].team_name, teams[1].team_name, trials=trials)
+
+    n = sum(1 for _ in Path(directory).rglob("*.json"))
+    print(f"[upstream_standin] {n} fixtures in {directory}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ESPN / NBA record-replay stand-in")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    rec = sub.add_parser("record", help="capture fixtures from the real upstreams")
+    rec.add_argument("--dir", default=str(FIXTURE_DIR))
+    rec.add_argument("--trials", type=int, default=500)
+
+    srv = sub.add_parser("serve", help="serve fixtures over HTTP")
+    srv.add_argument("--dir", default=str(FIXTURE_DIR))
+    srv.add_argument("--host", default="127.0.0.1")
+    srv.add_argument("--port", type=int, default=8900)
+    srv.add_argument("--latency-ms", type=float, default=0.0)
+    srv.add_argument("--jitter-ms", type=float, default=0.0)
+    srv.add_argument("--error-rate", type=float, default=0.0)
+
+    args = parser.parse_args()
+    if args.cmd == "record":
+        record(Path(args.dir), trials=args.trials)
+    else:
+        serve(args.port, Path(args.dir), args.latency_ms, args.jitter_ms, args.error_rate, args.host)
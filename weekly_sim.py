@@ -1,19 +1,43 @@
 # weekly_sim.py
 
 import json
+import math
+import os
+import random
+import sys
 import time
 from datetime import date, timedelta
 from datetime import datetime
 from zoneinfo import ZoneInfo
 from pathlib import Path
 from fantasy import league
-from nbaTest import teams_playing_on
+from nbaTest import get_schedule_index, teams_playing_on
+from upstream_client import espn
+from metrics import STAGE_SECONDS, count_trials, stage
 from simulate_matchup import (
     load_history,
     active_player_entries,
     team_score_once,
     run_today_matchups,
+    _source_today,
+    _resolve_live_mode,
+    league_file,
+    league_inputs,
+    HISTORY_FILE,
+    SIM_ENGINE_VERSION,
 )
+from result_store import content_key, file_version, result_store
+from odds_archive import record_result
+from history_backfill import atomic_write_json
+from live_odds import build_live_state_for_league
+
+# Upper bound on client-requested weekly trials, and the trial count used
+# for the quick first answer of a progressive /odds/weekly request
+WEEKLY_MAX_TRIALS = int(os.environ.get("WEEKLY_MAX_TRIALS", "100000"))
+WEEKLY_QUICK_TRIALS = int(os.environ.get("WEEKLY_QUICK_TRIALS", "1000"))
+# Date of the league's first scoring period (default: the NBA schedule's
+# first regular-season game day)
+LEAGUE_FIRST_SCORING_DAY = os.environ.get("LEAGUE_FIRST_SCORING_DAY")
 
 
 def week_bounds_from_today(today: date | None = None) -> tuple[date, date]:
@@ -98,21 +122,39 @@ def monte_carlo_week(
     start_day: date,
     end_day: date,
     trials: int = 10000,
+    seed: int | None = None,
+    fixed_days: dict[date, tuple[float, float]] | None = None,
+    live_day: date | None = None,
+    live_state=None,
 ):
     """
     Outer Monte Carlo over full-week outcomes.
+
+    fixed_days ({day: (team1_pts, team2_pts)}) are days already final: their
+    actual totals are added to every trial and they aren't simulated, so
+    the cost is proportional to the days left. On live_day, players in
+    live_state are projected from their current line (rest of game only).
     """
+    rng = random.Random(seed)  # per run, so concurrent simulations don't share state
+    fixed_days = fixed_days or {}
+    sim_start_day = start_day
+    while sim_start_day in fixed_days and sim_start_day <= end_day:
+        sim_start_day += timedelta(days=1)
+    fixed_t1 = sum(s1 for s1, _ in fixed_days.values())
+    fixed_t2 = sum(s2 for _, s2 in fixed_days.values())
+
     print(
-        f"Simulating days: {start_day} → {end_day} "
-        f"({(end_day - start_day).days + 1} days)"
+        f"Simulating days: {sim_start_day} → {end_day} "
+        f"({max(0, (end_day - sim_start_day).days + 1)} days, {len(fixed_days)} final)"
     )
 
     # Precompute entries per day per team
-    #print(f"\n=== Precomputing active players for {team1.team_name} ===")
-    t1_entries_by_day = build_entries_for_range(team1, history_map, start_day, end_day)
+    with stage("entry_building"):
+        #print(f"\n=== Precomputing active players for {team1.team_name} ===")
+        t1_entries_by_day = build_entries_for_range(team1, history_map, sim_start_day, end_day)
 
-    #print(f"\n=== Precomputing active players for {team2.team_name} ===")
-    t2_entries_by_day = build_entries_for_range(team2, history_map, start_day, end_day)
+        #print(f"\n=== Precomputing active players for {team2.team_name} ===")
+        t2_entries_by_day = build_entries_for_range(team2, history_map, sim_start_day, end_day)
 
     # Quick sanity check
     total_t1_players = sum(len(v) for v in t1_entries_by_day.values())
@@ -125,19 +167,21 @@ def monte_carlo_week(
 
     t1_wins = t2_wins = ties = 0
     sum_t1 = sum_t2 = 0.0
-    all_days = sorted(set(t1_entries_by_day.keys()) | set(t2_entries_by_day.keys()))
+    all_days = sorted((set(t1_entries_by_day) | set(t2_entries_by_day)) - set(fixed_days))
     day_sums_t1 = {d: 0.0 for d in all_days}
     day_sums_t2 = {d: 0.0 for d in all_days}
+    day_live = {d: live_state if d == live_day else None for d in all_days}
 
+    sim_start = time.perf_counter()
     for _ in range(trials):
-        weekly_t1 = 0.0
-        weekly_t2 = 0.0
+        weekly_t1 = fixed_t1
+        weekly_t2 = fixed_t2
 
         for day in all_days:
             t1_entries = t1_entries_by_day.get(day, [])
             t2_entries = t2_entries_by_day.get(day, [])
-            s1_day = team_score_once(t1_entries, history_map)
-            s2_day = team_score_once(t2_entries, history_map)
+            s1_day = team_score_once(t1_entries, history_map, live_state=day_live[day], rng=rng)
+            s2_day = team_score_once(t2_entries, history_map, live_state=day_live[day], rng=rng)
             weekly_t1 += s1_day
             weekly_t2 += s2_day
             day_sums_t1[day] += s1_day
@@ -153,16 +197,24 @@ def monte_carlo_week(
         else:
             ties += 1
 
+    sim_seconds = time.perf_counter() - sim_start
+    STAGE_SECONDS.observe(sim_seconds, stage="simulation")
+    count_trials("weekly", trials, sim_seconds)
+
     avg_t1 = sum_t1 / trials
     avg_t2 = sum_t2 / trials
 
     daily_avgs = {
+        d.isoformat(): {"team1": s1, "team2": s2, "final": True}
+        for d, (s1, s2) in sorted(fixed_days.items())
+    }
+    daily_avgs.update({
         d.isoformat(): {
             "team1": day_sums_t1[d] / trials,
             "team2": day_sums_t2[d] / trials,
         }
         for d in all_days
-    }
+    })
 
     return {
         "team1_wins": t1_wins,
@@ -177,81 +229,178 @@ def monte_carlo_week(
         "daily_avgs": daily_avgs,
     }
 
+
+def scoring_period_for(lg, day: date) -> int | None:
+    """
+    ESPN scoring period of a calendar day: one period per day, counted
+    from the league's first scoring day (firstScoringPeriod). None when
+    the first day isn't known.
+    """
+    if LEAGUE_FIRST_SCORING_DAY:
+        first_day = date.fromisoformat(LEAGUE_FIRST_SCORING_DAY)
+    else:
+        first_day = get_schedule_index().regular_season_start
+    if first_day is None:
+        return None
+    return getattr(lg, "firstScoringPeriod", 1) + (day - first_day).days
+
+
+def load_completed_days(lg, week_start: date, today: date, persist: bool = True) -> dict[date, dict[int, float]]:
+    """
+    Actual fantasy points per team ({day: {team_id: pts}}) for every day
+    of the week before today, from ESPN's per-scoring-period box scores.
+
+    Final days are kept in <week_start>_weekly_days.json, so each is fetched
+    from ESPN once per week. Days ESPN can't serve (e.g. a snapshot only
+    has its own scoring period) are left out and get simulated instead.
+    """
+    path = league_file(lg, f"{week_start.isoformat()}_weekly_days.json")
+    stored: dict[str, dict[str, float]] = {}
+    if path.exists():
+        try:
+            stored = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as exc:
+            print(f"[load_completed_days] ignoring unreadable {path.name}: {exc}")
+    # Days stored by team name (older files) are refetched
+    stored = {iso: scores for iso, scores in stored.items() if all(k.isdigit() for k in scores)}
+
+    days: dict[date, dict[int, float]] = {}
+    fetched = 0
+    day = week_start
+    while day < today:
+        iso = day.isoformat()
+        if iso not in stored:
+            scoring_period = scoring_period_for(lg, day)
+            if scoring_period is None:
+                print(f"[load_completed_days] first scoring day unknown; simulating {iso}")
+                day += timedelta(days=1)
+                continue
+            try:
+                boxes = espn.call(lg.box_scores, scoring_period=scoring_period, matchup_total=False)
+            except Exception as exc:
+                print(f"[load_completed_days] no box scores for {iso} (period {scoring_period}): {exc}")
+                day += timedelta(days=1)
+                continue
+            scores = {}
+            for box in boxes:
+                scores[str(box.home_team.team_id)] = float(box.home_score or 0.0)
+                scores[str(box.away_team.team_id)] = float(box.away_score or 0.0)
+            stored[iso] = scores
+            fetched += 1
+        days[day] = {int(team_id): pts for team_id, pts in stored[iso].items()}
+        day += timedelta(days=1)
+
+    if fetched and persist:
+        atomic_write_json(path, stored)
+    print(f"[load_completed_days] {len(days)} final days ({fetched} fetched) for week of {week_start}")
+    return days
+
+
+def save_partial_days(lg, week_start: date, today: date, partials: dict[str, dict[str, float]]):
+    """
+    Keep the simulated per-day averages ({day: {team_id: pts}}) of today's
+    run in <week_start>_weekly_partials.json, under today's date, so the
+    projection for each day of the week can be followed as it firms up.
+    """
+    path = league_file(lg, f"{week_start.isoformat()}_weekly_partials.json")
+    stored: dict[str, dict] = {}
+    if path.exists():
+        try:
+            stored = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as exc:
+            print(f"[save_partial_days] ignoring unreadable {path.name}: {exc}")
+    stored[today.isoformat()] = partials
+    try:
+        atomic_write_json(path, stored)
+    except OSError as exc:
+        print(f"[save_partial_days] could not write {path.name}: {exc}")
+
+
+def weekly_precision(data: dict) -> dict:
+    """
+    Monte Carlo precision of a run_weekly_matchups result: the standard
+    error of the win probabilities, sqrt(p(1-p)/trials), worst matchup.
+    """
+    worst = 0.0
+    trials = None
+    for m in data.get("matchups", []):
+        n = m.get("trials") or 0
+        if not n:
+            continue
+        p = m.get("home_win_prob") or 0.0
+        worst = max(worst, math.sqrt(p * (1.0 - p) / n))
+        trials = n if trials is None else min(trials, n)
+    return {
+        "trials": trials,
+        "win_prob_stderr": round(worst, 5),
+        "win_prob_ci95": round(1.96 * worst, 5),
+    }
+
+
 LA = ZoneInfo("America/Los_Angeles")
-def run_weekly_matchups(trials: int = 10000, save: bool = True):
+def run_weekly_matchups(trials: int = 10000, save: bool = True, source=None, seed: int | None = None):
     """
     Simulate weekly odds for all current matchups and return a dict with
     per-matchup odds and per-day projected scoring.
+
+    source is the league to simulate (default: the live ESPN league). With a
+    league_snapshot.SnapshotLeague the week is anchored on the snapshot's
+    game day and nothing is written to the weekly cache file. save=False
+    (quick / exploratory runs) never writes it either.
+
+    Days of the week before today are taken as final: their actual ESPN
+    totals (load_completed_days) are fixed and only today (from the live
+    state) and the days after it are simulated. Every saved run rewrites
+    the weekly odds file with its fresh result and adds its simulated
+    per-day averages to the week's partials (save_partial_days).
+
+    Like run_today_matchups, results are kept in result_store keyed by
+    everything they depend on, so identical inputs reuse the stored result.
+    Computed results (not replays or save=False runs) are appended to the
+    league's odds_archive.
     """
-    print("currentMatchupPeriod", league.currentMatchupPeriod)
-    print("scoringPeriodId", league.scoringPeriodId)
-    print("matchup_periods", league.settings.matchup_periods)
+    lg = source if source is not None else league
+    replay = getattr(lg, "is_snapshot", False)
+    print("currentMatchupPeriod", lg.currentMatchupPeriod)
+    print("scoringPeriodId", lg.scoringPeriodId)
+    print("matchup_periods", lg.settings.matchup_periods)
     start_ts = time.time()
     hist = load_history()
     # Use date (not datetime) for stable week key and cache naming
-    today_dt = datetime.now(tz=ZoneInfo("UTC")).astimezone(LA)
+    today_dt = _source_today(lg)
     today_date = today_dt.date()
     week_start, week_end = week_bounds_from_today(today_date)
     week_start_str = week_start.strftime("%Y-%m-%d")
     # Align cache naming with daily simulate_matchup convention: YYYY-MM-DD_projScore.json
-    cache_file = Path(f"{week_start_str}_weekly_odds.json")
-    today_data = run_today_matchups(trials=trials)
+    cache_file = league_file(lg, f"{week_start_str}_weekly_odds.json")
+    # One live state (in-progress and finished games) conditions both
+    # today's odds and today's share of the week
+    mode = _resolve_live_mode(None)
+    live_state = build_live_state_for_league(hist, game_day=today_date, mode=mode, source=lg)
+    today_data = run_today_matchups(trials=trials, mode=mode, source=source, seed=seed, live_state=live_state)
     today_proj_scores = today_data.get("proj_scores", {}) if today_data else {}
     today_current_scores = today_data.get("current_scores", {}) if today_data else {}
     today_is_live = today_data.get("is_live") if today_data else None
 
-    cached_proj_scores = None
-    cached_win_probs = None
-    cached_current_scores = None
-    if cache_file.exists():
-        try:
-            with cache_file.open("r", encoding="utf-8") as f:
-                cached = json.load(f)
-            cached_proj_scores = cached.get("proj_scores")
-
-            cached_win_probs = cached.get("win_probs")
-            print("~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~")
-            print("Cache file name:", cache_file.name   )
-            print(cached_win_probs) 
-            print("~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~")
-            cached_current_scores = cached.get("current_scores")
-            # Backfill from matchups if top-level maps are missing or legacy formatted
-            matchups_cached = cached.get("matchups", [])
-            if (cached_proj_scores is None or cached_win_probs is None) and matchups_cached:
-                proj_tmp = {}
-                win_tmp = {}
-                for m in matchups_cached:
-                    home = m.get("home_team")
-                    away = m.get("away_team")
-                    if home:
-                        proj_tmp[home] = m.get("home_avg")
-                        win_tmp[home] = m.get("home_win_prob")
-                    if away:
-                        proj_tmp[away] = m.get("away_avg")
-                        win_tmp[away] = m.get("away_win_prob")
-                if cached_proj_scores is None:
-                    cached_proj_scores = proj_tmp
-                if cached_win_probs is None:
-                    print("~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~")
-                    print(win_tmp)
-                    cached_win_probs = win_tmp
-            print(f"[run_weekly_matchups] loaded cached weekly projections from {cache_file.name}")
-        except (OSError, json.JSONDecodeError) as exc:
-            print(f"[run_weekly_matchups] failed to read cached weekly projections: {exc}")
+    results_list = []
+    partials: dict[str, dict[str, float]] = {}
 
-    if not today_current_scores and cached_current_scores:
-        today_current_scores = cached_current_scores
-    if today_is_live is None and cache_file.exists():
-        try:
-            with cache_file.open("r", encoding="utf-8") as f:
-                cached = json.load(f)
-            today_is_live = cached.get("is_live")
-        except Exception:
-            pass
+    boxes = espn.call(lg.box_scores, matchup_total=True, matchup_period=lg.currentMatchupPeriod)
+    completed = load_completed_days(lg, week_start, today_date, persist=not replay)
 
-    results_list = []
+    store_key = content_key(
+        kind="weekly", week_start=week_start_str, today=today_date.isoformat(), trials=trials, seed=seed,
+        engine=SIM_ENGINE_VERSION, history=file_version(HISTORY_FILE),
+        today_proj=today_proj_scores, today_current=today_current_scores, is_live=today_is_live,
+        live=live_state,
+        completed={d.isoformat(): scores for d, scores in completed.items()}, **league_inputs(lg, boxes),
+    )
+    stored = result_store.get(store_key)
+    if stored is not None:
+        print(f"[run_weekly_matchups] result store hit {store_key[:12]}")
+        return stored
 
-    for box in league.box_scores(matchup_total=True, matchup_period=(league.currentMatchupPeriod)):
+    for i, box in enumerate(boxes):
         home_team = box.home_team
         away_team = box.away_team
 
@@ -262,9 +411,24 @@ def run_weekly_matchups(trials: int = 10000, save: bool = True):
             start_day=week_start,
             end_day=week_end,
             trials=trials,
+            seed=None if seed is None else seed + i,
+            # A team missing from a day's box scores gets that day simulated
+            fixed_days={
+                d: (scores[home_team.team_id], scores[away_team.team_id])
+                for d, scores in completed.items()
+                if home_team.team_id in scores and away_team.team_id in scores
+            },
+            live_day=today_date,
+            live_state=live_state,
         )
 
-        today_iso = today_dt.isoformat()
+        for d, scores in res["daily_avgs"].items():
+            if not scores.get("final"):
+                day_partials = partials.setdefault(d, {})
+                day_partials[str(home_team.team_id)] = scores["team1"]
+                day_partials[str(away_team.team_id)] = scores["team2"]
+
+        today_iso = today_date.isoformat()
         home_current = box.home_score
         away_current = box.away_score
         home_today_score = today_current_scores.get(home_team.team_name)
@@ -319,17 +483,6 @@ def run_weekly_matchups(trials: int = 10000, save: bool = True):
         "remaining:", m["away_today_remaining_proj"]
     )
 
-    print("~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~")
-    print("~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~")
-    print(away_today_total_proj)
-    print(away_today_remaining_proj)
-    print("~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~")
-    print("~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~")
-    if cached_proj_scores:
-        proj_scores = cached_proj_scores
-    if cached_win_probs:
-        win_probs = cached_win_probs
-
     result = {
         "week_start": week_start.isoformat(),
         "week_end": week_end.isoformat(),
@@ -342,34 +495,39 @@ def run_weekly_matchups(trials: int = 10000, save: bool = True):
         "runtime_seconds": round(time.time() - start_ts, 2),
     }
 
-    if not cache_file.exists():
-        filename = cache_file.name
+    if replay:
+        print(f"[run_weekly_matchups] replayed snapshot {lg.snapshot_version}; not saving weekly odds.")
+    elif save:
+        record_result(lg, result, "weekly", writing=cache_file)
+        save_partial_days(lg, week_start, today_date, partials)
         try:
-            with open(filename, "w", encoding="utf-8") as f:
-                json.dump(result, f, indent=2)
-            print(f"[run_weekly_matchups] saved weekly odds to {filename}")
+            atomic_write_json(cache_file, result)
+            print(f"[run_weekly_matchups] saved weekly odds to {cache_file.name}")
         except OSError as exc:
-            print(f"[run_weekly_matchups] could not write {filename}: {exc}")
-    elif save:
-        print(f"[run_weekly_matchups] cache file already exists: {cache_file.name}")
+            print(f"[run_weekly_matchups] could not write {cache_file.name}: {exc}")
     print(result)
+    result_store.put(store_key, result, kind="weekly")
     return result
 
 
 if __name__ == "__main__":
+    # Optional: python weekly_sim.py snapshots/espn_..._spNNN.json.gz
+    snapshot = None
+    if len(sys.argv) > 1:
+        from league_snapshot import load_snapshot
+        snapshot = load_snapshot(sys.argv[1])
+
     start_ts = time.time()
-    data = run_weekly_matchups(trials=10000, save=True)
-    proj_scores = data.get("proj_scores", {})
-    win_probs = data.get("win_probs", {})
+    data = run_weekly_matchups(trials=10000, save=True, source=snapshot)
     print(f"Weekly simulations for {data['week_start']} → {data['week_end']}")
     for m in data["matchups"]:
         print("\n---------------------------------------")
         print(f"{m['home_team']} vs {m['away_team']}")
         print(f"Trials: {m['trials']}")
-        print(f"Avg score {m['home_team']}: {m['home_avg']:.1f} (orig proj: {proj_scores.get(m['home_team'], 0):.1f})")
-        print(f"Avg score {m['away_team']}: {m['away_avg']:.1f} (orig proj: {proj_scores.get(m['away_team'], 0):.1f})")
-        print(f"{m['home_team']} win prob: {m['home_win_prob']*100:.2f}% (orig: {win_probs.get(m['home_team'], 0)*100:.2f}%)")
-        print(f"{m['away_team']} win prob: {m['away_win_prob']*100:.2f}% (orig: {win_probs.get(m['away_team'], 0)*100:.2f}%)")
+        print(f"Avg score {m['home_team']}: {m['home_avg']:.1f}")
+        print(f"Avg score {m['away_team']}: {m['away_avg']:.1f}")
+        print(f"{m['home_team']} win prob: {m['home_win_prob']*100:.2f}%")
+        print(f"{m['away_team']} win prob: {m['away_win_prob']*100:.2f}%")
         print(f"Tie prob: {m['tie_prob']*100:.2f}%")
         print("Daily projected averages:")
         for day, scores in sorted(m["daily_scores"].items()):